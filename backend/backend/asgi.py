@@ -5,3 +5,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
+
+from tournaments import jobs, matchmaking  # noqa: E402
+
+jobs.start()
+matchmaking.start()
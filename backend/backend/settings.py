@@ -59,15 +59,19 @@ SOCIALACCOUNT_EMAIL_REQUIRED = True
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'tournaments.metrics.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'tournaments.profiling.ProfilingMiddleware',
     'allauth.account.middleware.AccountMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'tournaments.middleware.OnlineStatusMiddleware',
+    'tournaments.db_router.ReplicaRoutingMiddleware',
+    'tournaments.loaders.LoaderMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -89,10 +93,43 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'backend.wsgi.application'
 
+# Connections are kept open for DB_CONN_MAX_AGE seconds and health-checked
+# before reuse. DB_POOL=1 switches Postgres to Django's native pool instead,
+# which needs psycopg 3 (psycopg[pool]) and CONN_MAX_AGE=0.
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 600))
+DB_POOL = os.environ.get('DB_POOL') == '1'
+
+def database_config(env):
+    config = dj_database_url.config(
+        env=env,
+        conn_max_age=0 if DB_POOL else DB_CONN_MAX_AGE,
+        conn_health_checks=not DB_POOL,
+        disable_server_side_cursors=os.environ.get('DB_DISABLE_SERVER_SIDE_CURSORS') == '1',
+    )
+    if DB_POOL and config.get('ENGINE', '').endswith('postgresql'):
+        config.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 20)),
+        }
+    return config
+
 DATABASES = {
-    'default': dj_database_url.config(default=os.environ.get('DATABASE_URL'))
+    'default': database_config('DATABASE_URL'),
 }
 
+# Optional read replica, e.g. DATABASE_REPLICA_URL=sqlite:///replica.sqlite3
+# locally. Safe-method requests read from it; a client that wrote is pinned to
+# the primary for DATABASE_PRIMARY_STICKY_SECONDS. Users are pinned through
+# the cache, so with several processes set CACHE_REDIS_URL as well.
+DATABASE_REPLICA_ALIAS = 'replica'
+DATABASE_PRIMARY_STICKY_SECONDS = 5
+DATABASE_ROUTERS = []
+
+if os.environ.get('DATABASE_REPLICA_URL'):
+    DATABASES[DATABASE_REPLICA_ALIAS] = database_config('DATABASE_REPLICA_URL')
+    DATABASES[DATABASE_REPLICA_ALIAS]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_ROUTERS = ['tournaments.db_router.PrimaryReplicaRouter']
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -146,3 +183,73 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
 }
+
+REALTIME_BROKER = os.environ.get('REALTIME_BROKER', 'memory')
+REALTIME_REDIS_URL = os.environ.get('REALTIME_REDIS_URL', 'redis://localhost:6379/0')
+REALTIME_HEARTBEAT_SECONDS = 15
+REALTIME_HISTORY = 100
+
+OUTBOX_SETTLE_SECONDS = 2
+
+# How often a process's tournament browse index reads new outbox events.
+BROWSE_REFRESH_SECONDS = 1.0
+
+# A Redis cache shared by every process. Without it Django falls back to a
+# per-process local-memory cache.
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', '')
+if CACHE_REDIS_URL:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_REDIS_URL}}
+
+# Lifetime of a user's cached team memberships; writes invalidate them sooner.
+# Only cached across requests in the shared cache: a local-memory entry would
+# miss invalidations made by other processes.
+MEMBERSHIP_CACHE_SECONDS = 300 if CACHE_REDIS_URL else 0
+
+# Match scheduling: length of a match, rest a team gets between matches and
+# game servers available at once.
+MATCH_DURATION_MINUTES = 60
+MATCH_REST_MINUTES = 30
+MATCH_SERVER_SLOTS = 4
+
+# Number of web worker processes (the gunicorn convention).
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+# Scrim matchmaking: 'memory' runs the matcher in the web process and is
+# refused with more than one web worker, 'redis' queues through a local Redis
+# for the run_matchmaker command.
+MATCHMAKING_BACKEND = os.environ.get('MATCHMAKING_BACKEND', 'memory' if WEB_CONCURRENCY == 1 else 'redis')
+MATCHMAKING_REDIS_URL = os.environ.get('MATCHMAKING_REDIS_URL', REALTIME_REDIS_URL)
+MATCHMAKING_INTERVAL_SECONDS = 1.0
+# Rating gap a team accepts: starts at the base and widens while it waits.
+MATCHMAKING_BASE_WINDOW = 50
+MATCHMAKING_WIDEN_PER_SECOND = 5
+MATCHMAKING_MAX_WINDOW = 500
+
+ONLINE_THRESHOLD_MINUTES = 5
+
+JOBS_BACKEND = os.environ.get('JOBS_BACKEND', 'database')
+JOBS_THREAD_WORKERS = 4
+# A running job refreshes its lock every JOBS_HEARTBEAT_SECONDS; one not
+# refreshed for JOBS_LOCK_TIMEOUT_SECONDS is taken to have lost its worker.
+JOBS_LOCK_TIMEOUT_SECONDS = 600
+JOBS_HEARTBEAT_SECONDS = 60
+JOBS_PERIODIC = {
+    'update_online_statuses': 60,
+    'refresh_tournament_details': 300,
+    'prune_team_eligibility': 3600,
+}
+
+# Requests with an `X-Profile: 1` header from an admin are profiled, as is a
+# random PROFILING_SAMPLE_RATE fraction of all traffic (0 disables sampling).
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_DIR = Path(os.environ.get('PROFILING_DIR', BASE_DIR / 'profiles'))
+PROFILING_MAX_PROFILES = 50
+PROFILING_MAX_QUERIES = 500
+
+# Per-view latency histograms. Each worker process writes its counts to
+# METRICS_DIR every METRICS_FLUSH_SECONDS; /api/metrics/ sums them up and is
+# served to admins or to a scraper sending METRICS_TOKEN as a bearer token.
+METRICS_DIR = Path(os.environ.get('METRICS_DIR', '/tmp/lvl-metrics'))
+METRICS_FLUSH_SECONDS = 5
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
@@ -5,3 +5,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+from tournaments import jobs, matchmaking  # noqa: E402
+
+jobs.start()
+matchmaking.start()
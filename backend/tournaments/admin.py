@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Player, Team, TeamMember, SocialAccount, Tournament, TournamentParticipant, TournamentMatch, News, TournamentTeam, Squad, SquadMember
+from .models import Player, Team, TeamMember, SocialAccount, Tournament, TournamentParticipant, TournamentMatch, News, TournamentTeam, Squad, SquadMember, DomainEvent, Checkpoint
 
 @admin.register(Player)
 class PlayerAdmin(admin.ModelAdmin):
@@ -84,4 +84,14 @@ class SquadMemberAdmin(admin.ModelAdmin):
 @admin.register(SocialAccount)
 class SocialAccountAdmin(admin.ModelAdmin):
     list_display = ('user', 'provider', 'uid')
-    search_fields = ('user__username', 'provider', 'uid')
\ No newline at end of file
+    search_fields = ('user__username', 'provider', 'uid')
+
+@admin.register(DomainEvent)
+class DomainEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'topic', 'event_type', 'object_id', 'tournament_id', 'created_at')
+    list_filter = ('topic', 'event_type')
+
+@admin.register(Checkpoint)
+class CheckpointAdmin(admin.ModelAdmin):
+    list_display = ('name', 'position', 'updated_at')
+
@@ -5,4 +5,5 @@ class TournamentsConfig(AppConfig):
     name = 'tournaments'
 
     def ready(self):
-        from . import signals
\ No newline at end of file
+        from . import eligibility, metrics, projections, signals, tasks
+        metrics.install()
@@ -0,0 +1,279 @@
+import math
+
+import numpy as np
+from django.db import transaction
+
+from . import outbox
+from .models import Squad, SquadMember, SquadType, TeamMember, TournamentParticipant
+
+ACTION_ROLES = [key for key, _ in SquadMember.ACTION_ROLE_CHOICES]
+# Seats per 64 players, after the 64v64 composition the client recommends
+# (its two SUPPORT seats are infantry here).
+ROLE_DEMAND = {'INFANTRY': 42, 'ARMOR': 12, 'HELI': 6, 'JET': 4}
+UNLISTED_COST = {'INFANTRY': 3}
+UNLISTED_DEFAULT_COST = 4
+# How much skill matters next to one step down a player's preference list;
+# better players are put in the scarce vehicle seats first.
+SKILL_WEIGHT = 0.25
+# Keeps the squad split from trading a role quota for skill balance.
+ROLE_LOCK = 10.0
+
+TIER_WEIGHTS = {'BRONZE': 1, 'SILVER': 2, 'GOLD': 3, 'PLATINUM': 4, 'DIAMOND': 5}
+# Rating points a tier step is worth on top of skill_rating.
+TIER_BONUS = 100
+# Specialist roles kept even across groups; infantry is whatever is left.
+SPECIALIST_ROLES = ('ARMOR', 'HELI', 'JET')
+ROLE_WEIGHT = 0.5
+SQUAD_SIZE = 8
+MAX_SWEEPS = 50
+
+
+def strength(player):
+    return player['skill_rating'] + TIER_BONUS * TIER_WEIGHTS.get(player['tier'], 1)
+
+
+def player_features(players):
+    """Feature matrix for grouping players: normalised strength, then one column per specialist role."""
+    strengths = np.array([strength(player) for player in players], dtype=float)
+    spread = strengths.std()
+    features = np.zeros((len(players), 1 + len(SPECIALIST_ROLES)))
+    features[:, 0] = (strengths - strengths.mean()) / spread if spread else 0.0
+    for index, player in enumerate(players):
+        preferred = [str(role).upper() for role in player['preferred_roles'] or []]
+        for column, role in enumerate(SPECIALIST_ROLES, start=1):
+            if role in preferred[:1]:
+                features[index, column] = ROLE_WEIGHT
+    return strengths, features
+
+
+def improve(features, groups, group_count):
+    """Pairwise-swap local search minimising the spread of per-group feature sums.
+
+    For groups a and b with feature sums A and B, swapping i in
+    a with j in b changes the squared error by 2·D·(B − A) + 2·D² summed over
+    features, with D = F_i − F_j; every candidate pair is scored at once.
+    """
+    sums = np.array([features[groups == group].sum(axis=0) for group in range(group_count)])
+    for _ in range(MAX_SWEEPS):
+        improved = False
+        for a in range(group_count):
+            for b in range(a + 1, group_count):
+                members_a = np.flatnonzero(groups == a)
+                members_b = np.flatnonzero(groups == b)
+                if not len(members_a) or not len(members_b):
+                    continue
+                diff = features[members_a][:, None, :] - features[members_b][None, :, :]
+                change = 2 * (diff @ (sums[b] - sums[a])) + 2 * (diff ** 2).sum(axis=2)
+                i, j = np.unravel_index(np.argmin(change), change.shape)
+                if change[i, j] < -1e-9:
+                    swap_a, swap_b = members_a[i], members_b[j]
+                    groups[swap_a], groups[swap_b] = b, a
+                    sums[a] -= diff[i, j]
+                    sums[b] += diff[i, j]
+                    improved = True
+        if not improved:
+            break
+    return groups
+
+
+def squad_count(tournament, side_size):
+    min_squads, max_squads = tournament.get_squad_limits()
+    wanted = math.ceil(side_size / SQUAD_SIZE) if side_size else 0
+    return max(1, min(max(wanted, min_squads), max_squads or wanted, len(SquadType.choices), side_size))
+
+
+def hungarian(cost):
+    """Minimum-cost assignment of every row to a distinct column (rows <= columns).
+
+    Shortest augmenting path with potentials, O(n²·m); the inner column scan is
+    vectorised. Returns the column chosen for each row.
+    """
+    cost = np.asarray(cost, dtype=float)
+    rows, columns = cost.shape
+    u = np.zeros(rows + 1)
+    v = np.zeros(columns + 1)
+    owner = np.zeros(columns + 1, dtype=int)
+    way = np.zeros(columns + 1, dtype=int)
+    for row in range(1, rows + 1):
+        owner[0] = row
+        column = 0
+        min_reduced = np.full(columns + 1, np.inf)
+        used = np.zeros(columns + 1, dtype=bool)
+        while True:
+            used[column] = True
+            current = owner[column]
+            reduced = cost[current - 1] - u[current] - v[1:]
+            free = ~used[1:]
+            better = free & (reduced < min_reduced[1:])
+            min_reduced[1:][better] = reduced[better]
+            way[1:][better] = column
+            candidates = np.where(free, min_reduced[1:], np.inf)
+            next_column = int(np.argmin(candidates)) + 1
+            delta = candidates[next_column - 1]
+            visited = np.flatnonzero(used)
+            u[owner[visited]] += delta
+            v[visited] -= delta
+            min_reduced[1:][free] -= delta
+            column = next_column
+            if owner[column] == 0:
+                break
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+    result = np.empty(rows, dtype=int)
+    for column in range(1, columns + 1):
+        if owner[column]:
+            result[owner[column] - 1] = column - 1
+    return result
+
+
+def role_slots(count):
+    """Split ``count`` seats across action roles in ROLE_DEMAND proportions (largest remainder)."""
+    total = sum(ROLE_DEMAND.values())
+    exact = {role: count * demand / total for role, demand in ROLE_DEMAND.items()}
+    seats = {role: int(value) for role, value in exact.items()}
+    for role in sorted(exact, key=lambda role: seats[role] - exact[role])[:count - sum(seats.values())]:
+        seats[role] += 1
+    return seats
+
+
+def role_cost(player, role):
+    preferred = [str(value).upper() for value in player['preferred_roles'] or []]
+    if role in preferred:
+        return preferred.index(role)
+    return UNLISTED_COST.get(role, UNLISTED_DEFAULT_COST)
+
+
+def assign_roles(players, strengths):
+    """Pick each player's action role: min-cost matching of players to role seats."""
+    seats = [role for role, count in role_slots(len(players)).items() for _ in range(count)]
+    spread = strengths.max() - strengths.min()
+    skill = (strengths - strengths.min()) / spread if spread else np.zeros(len(players))
+    cost = np.array([
+        [role_cost(player, role) - (SKILL_WEIGHT * skill[index] if role != 'INFANTRY' else 0) for role in seats]
+        for index, player in enumerate(players)
+    ])
+    return [seats[column] for column in hungarian(cost)]
+
+
+def solve(players, squad_count):
+    """Assign action roles and squads to ``players`` (dicts with id, skill_rating,
+    tier, preferred_roles and an optional team_role).
+
+    Roles come from the matching above; squads then get an even share of each
+    role and similar total strength, and exactly one LEADER each. The team
+    CAPTAIN keeps that role unless they are alone in their squad.
+    Returns a list of squads, each a list of (player, action_role, role).
+    """
+    if not players:
+        return []
+    strengths, features = player_features(players)
+    roles = assign_roles(players, strengths)
+
+    # Deal each role round-robin over the squads, strongest first, then let the
+    # swap search even out skill; the role columns make cross-role swaps a loss.
+    groups = np.empty(len(players), dtype=int)
+    dealt = 0
+    for role in ACTION_ROLES:
+        members = sorted((index for index, value in enumerate(roles) if value == role), key=lambda index: -strengths[index])
+        for index in members:
+            groups[index] = dealt % squad_count
+            dealt += 1
+    locked = np.zeros((len(players), len(ACTION_ROLES)))
+    for index, role in enumerate(roles):
+        locked[index, ACTION_ROLES.index(role)] = ROLE_LOCK
+    groups = improve(np.hstack([features[:, :1], locked]), groups, squad_count)
+
+    squads = []
+    for squad in range(squad_count):
+        members = sorted(np.flatnonzero(groups == squad), key=lambda index: (roles[index] != 'INFANTRY', -strengths[index]))
+        captain = next((index for index in members if players[index].get('team_role') == 'CAPTAIN'), None)
+        if captain is not None and len(members) == 1:
+            captain = None
+        leader = next(index for index in members if index != captain)
+        squads.append([
+            (players[index], roles[index], 'CAPTAIN' if index == captain else 'LEADER' if index == leader else 'NONE')
+            for index in members
+        ])
+    return [squad for squad in squads if squad]
+
+
+def roster(team_ids):
+    """{team id: [player dict, ...]} for solve(), one query."""
+    rows = TeamMember.objects.filter(team_id__in=team_ids).order_by('player_id').values(
+        'team_id', 'role', 'player_id', 'player__skill_rating', 'player__tier', 'player__preferred_roles'
+    )
+    players = {team_id: [] for team_id in team_ids}
+    for row in rows:
+        players[row['team_id']].append({
+            'id': row['player_id'],
+            'skill_rating': row['player__skill_rating'],
+            'tier': row['player__tier'],
+            'preferred_roles': row['player__preferred_roles'],
+            'team_role': row['role'],
+        })
+    return players
+
+
+@transaction.atomic
+def write_squads(assignments):
+    """Replace the squads of each participant in {participant id: solve() result}."""
+    Squad.objects.filter(participant_id__in=list(assignments)).delete()
+    squad_types = [value for value, _ in SquadType.choices]
+    squads = Squad.objects.bulk_create([
+        Squad(participant_id=participant_id, squad_type=squad_types[index])
+        for participant_id, squads in assignments.items()
+        for index in range(len(squads))
+    ])
+    by_key = {(squad.participant_id, squad.squad_type): squad for squad in squads}
+    members = SquadMember.objects.bulk_create([
+        SquadMember(squad=by_key[participant_id, squad_types[index]], player_id=player['id'], action_role=action_role, role=role)
+        for participant_id, squads in assignments.items()
+        for index, squad in enumerate(squads)
+        for player, action_role, role in squad
+    ])
+    outbox.record_bulk(squads, 'created')
+    outbox.record_bulk(members, 'created')
+    return squads
+
+
+def assign_participant(participant):
+    """Solve and store squads for one registered team."""
+    players = roster([participant.team_id])[participant.team_id]
+    squads = solve(players, squad_count(participant.tournament, len(players)))
+    write_squads({participant.id: squads})
+    return squads
+
+
+def solve_tournament(tournament):
+    """solve() for every registered team's own roster. Players never move
+    between teams; one on several registered teams plays for the first.
+
+    Returns {participant id: solve() result}.
+    """
+    participants = list(TournamentParticipant.objects.filter(tournament=tournament).order_by('id').values_list('id', 'team_id'))
+    rosters = roster([team_id for _, team_id in participants])
+    seen = set()
+    result = {}
+    for participant_id, team_id in participants:
+        members = [player for player in rosters[team_id] if player['id'] not in seen]
+        seen.update(player['id'] for player in members)
+        result[participant_id] = solve(members, squad_count(tournament, len(members)))
+    return result
+
+
+def assign_tournament(tournament):
+    """Solve and store squads for every registered team."""
+    result = solve_tournament(tournament)
+    write_squads(result)
+    return result
+
+
+def squad_spread(result):
+    """{participant id: strongest minus weakest squad strength} for a solve_tournament() result."""
+    spreads = {}
+    for participant_id, squads in result.items():
+        totals = [sum(strength(player) for player, _, _ in squad) for squad in squads]
+        spreads[participant_id] = max(totals) - min(totals) if totals else 0
+    return spreads
@@ -0,0 +1,182 @@
+import math
+import random
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import outbox
+from .models import Team, TournamentMatch
+from .realtime import publish_match
+
+
+@transaction.atomic
+def generate_matches(tournament, teams):
+    """Replace the tournament's matches with a fresh bracket; returns the number of matches created."""
+    generator = GENERATORS.get(tournament.bracket_type)
+    if generator is None:
+        raise ValueError(f"Unsupported bracket type {tournament.bracket_type}")
+
+    TournamentMatch.objects.filter(tournament=tournament).delete()
+    generator(tournament, teams)
+    return TournamentMatch.objects.filter(tournament=tournament).count()
+
+
+def generate_single_elimination(tournament, teams):
+    """Generate single elimination bracket"""
+    # Shuffle teams for random seeding
+    teams_list = list(teams)
+    random.shuffle(teams_list)
+
+    # Calculate number of rounds needed
+    num_teams = len(teams_list)
+    num_rounds = math.ceil(math.log2(num_teams))
+
+    # Create first round matches
+    match_number = 1
+    for i in range(0, len(teams_list) - 1, 2):
+        TournamentMatch.objects.create(
+            tournament=tournament,
+            team1=teams_list[i],
+            team2=teams_list[i + 1] if i + 1 < len(teams_list) else None,
+            round_number=1,
+            match_number=match_number,
+            scheduled_time=tournament.start_date
+        )
+        match_number += 1
+
+    # Create placeholder matches for subsequent rounds
+    for round_num in range(2, num_rounds + 1):
+        matches_in_round = max(1, num_teams // (2 ** round_num))
+        for match_num in range(1, matches_in_round + 1):
+            TournamentMatch.objects.create(
+                tournament=tournament,
+                team1=None,
+                team2=None,
+                round_number=round_num,
+                match_number=match_num,
+                scheduled_time=tournament.start_date + timedelta(days=round_num - 1)
+            )
+
+
+def generate_double_elimination(tournament, teams):
+    """Generate double elimination bracket (simplified)"""
+    # For now, just create a single elimination bracket
+    # Full double elimination would require winner/loser brackets
+    generate_single_elimination(tournament, teams)
+
+
+def generate_round_robin(tournament, teams):
+    """Generate round robin bracket"""
+    teams_list = list(teams)
+    match_number = 1
+
+    # Create matches between every pair of teams
+    for i in range(len(teams_list)):
+        for j in range(i + 1, len(teams_list)):
+            TournamentMatch.objects.create(
+                tournament=tournament,
+                team1=teams_list[i],
+                team2=teams_list[j],
+                round_number=1,  # All matches are in round 1 for round robin
+                match_number=match_number,
+                scheduled_time=tournament.start_date + timedelta(days=match_number - 1)
+            )
+            match_number += 1
+
+
+def advance_winners(matches):
+    """Put each decided match's winner into the next round: match n feeds
+    match (n + 1) // 2, odd numbers as team1. Returns the matches changed."""
+    decided = [match for match in matches if match.winner_id]
+    if not decided:
+        return []
+    slots = {
+        (match.tournament_id, match.round_number + 1, (match.match_number + 1) // 2): (
+            'team1_id' if match.match_number % 2 == 1 else 'team2_id', match.winner_id
+        )
+        for match in decided
+    }
+    candidates = TournamentMatch.objects.filter(
+        tournament_id__in={match.tournament_id for match in decided},
+        round_number__in={match.round_number + 1 for match in decided},
+    )
+    now = timezone.now()
+    changed = []
+    for following in candidates:
+        slot = slots.get((following.tournament_id, following.round_number, following.match_number))
+        if slot is None or getattr(following, slot[0]) == slot[1]:
+            continue
+        setattr(following, slot[0], slot[1])
+        following.row_version += 1
+        following.updated_at = now
+        changed.append(following)
+    TournamentMatch.objects.bulk_update(changed, ['team1', 'team2', 'row_version', 'updated_at'])
+    outbox.record_bulk(changed, 'updated')
+    for following in changed:
+        publish_match(following)
+    return changed
+
+
+MATCH_FIELDS = (
+    'id', 'round', 'match', 'team1', 'team2', 'winner',
+    'team1_score', 'team2_score', 'is_completed', 'scheduled_time', 'next', 'slot',
+)
+ELIMINATION = {'SINGLE_ELIM', 'SINGLE_ELIMINATION', 'DOUBLE_ELIM', 'DOUBLE_ELIMINATION'}
+
+
+def bracket_payload(tournament):
+    """The whole bracket as a normalised document, in two queries.
+
+    Teams are listed once; each match is a row of MATCH_FIELDS where team1,
+    team2 and winner index into ``teams``, and ``next``/``slot`` give the
+    index of the match the winner advances to and which side they take
+    (elimination brackets only). ``rounds`` holds [round, first match index,
+    match count].
+    """
+    matches = list(TournamentMatch.objects.filter(tournament=tournament).order_by('round_number', 'match_number').values_list(
+        'id', 'round_number', 'match_number', 'team1_id', 'team2_id', 'winner_id',
+        'team1_score', 'team2_score', 'is_completed', 'scheduled_time',
+    ))
+    team_ids = sorted({team_id for match in matches for team_id in match[3:6] if team_id is not None})
+    teams = list(Team.objects.filter(id__in=team_ids).order_by('id').values_list('id', 'name', 'tier'))
+    team_index = {team[0]: index for index, team in enumerate(teams)}
+    match_index = {(match[1], match[2]): index for index, match in enumerate(matches)}
+    advances = tournament.bracket_type in ELIMINATION
+
+    rows = []
+    rounds = []
+    for index, (match_id, round_number, match_number, team1, team2, winner, score1, score2, completed, scheduled) in enumerate(matches):
+        if not rounds or rounds[-1][0] != round_number:
+            rounds.append([round_number, index, 0])
+        rounds[-1][2] += 1
+        next_index = match_index.get((round_number + 1, (match_number + 1) // 2)) if advances else None
+        rows.append([
+            match_id, round_number, match_number,
+            team_index.get(team1), team_index.get(team2), team_index.get(winner),
+            score1, score2, completed, scheduled.isoformat() if scheduled else None,
+            next_index, None if next_index is None else (match_number + 1) % 2,
+        ])
+
+    return {
+        'tournament': {
+            'id': tournament.id,
+            'title': tournament.title,
+            'bracket_type': tournament.bracket_type,
+            'current_round': tournament.current_round,
+        },
+        'team_fields': ['id', 'name', 'tier'],
+        'teams': [list(team) for team in teams],
+        'match_fields': list(MATCH_FIELDS),
+        'matches': rows,
+        'rounds': rounds,
+    }
+
+
+GENERATORS = {
+    'SINGLE_ELIM': generate_single_elimination,
+    'SINGLE_ELIMINATION': generate_single_elimination,
+    'DOUBLE_ELIM': generate_double_elimination,
+    'DOUBLE_ELIMINATION': generate_double_elimination,
+    'ROUND_ROBIN': generate_round_robin,
+}
@@ -0,0 +1,206 @@
+"""Faceted browse over active tournaments.
+
+Each process keeps a BrowseIndex: every active tournament gets a bit
+position, and each facet value a bitmap (a Python int) of the tournaments
+that have it. A query ANDs one OR-mask per filtered facet, and a facet's
+counts are popcounts of its value bitmaps against the masks of the other
+facets, so the page and every count come out of a single pass over the
+bitmaps.
+
+The index follows Tournament changes by tailing the outbox: events carry
+the full row, so they are applied without touching the tournament table.
+"""
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import DomainEvent, Tournament
+
+FACETS = ('game', 'region', 'platform', 'level', 'mode')
+FIELDS = ('id', 'start_date', 'is_active', 'is_completed', *FACETS)
+
+
+def _start_date(value):
+    """An aware start date from an event payload; None if it cannot be read."""
+    if isinstance(value, str):
+        try:
+            value = parse_datetime(value)
+        except ValueError:
+            value = None
+    if value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+class BrowseIndex:
+    def __init__(self):
+        self.positions = {}
+        self.rows = []
+        self.free = []
+        self.by_start = []
+        self.bitmaps = {facet: defaultdict(int) for facet in FACETS}
+        self.completed = 0
+        self.active = 0
+        self.loaded = False
+        self.settled = 0
+        self.refreshed_at = 0.0
+        self._started = None
+        self._lock = threading.Lock()
+
+    def upsert(self, row):
+        self.remove(row['id'])
+        if not row['is_active'] or row['start_date'] is None:
+            return
+        position = self.free.pop() if self.free else len(self.rows)
+        if position == len(self.rows):
+            self.rows.append(None)
+        self.rows[position] = row
+        self.positions[row['id']] = position
+        bit = 1 << position
+        self.active |= bit
+        for facet in FACETS:
+            self.bitmaps[facet][row[facet]] |= bit
+        if row['is_completed']:
+            self.completed |= bit
+        insort(self.by_start, (row['start_date'], position))
+        self._started = None
+
+    def remove(self, tournament_id):
+        position = self.positions.pop(tournament_id, None)
+        if position is None:
+            return
+        row = self.rows[position]
+        bit = 1 << position
+        self.active &= ~bit
+        self.completed &= ~bit
+        for facet in FACETS:
+            self.bitmaps[facet][row[facet]] &= ~bit
+        del self.by_start[bisect_left(self.by_start, (row['start_date'], position))]
+        self.rows[position] = None
+        self.free.append(position)
+        self._started = None
+
+    def started(self, now):
+        """Bitmap of tournaments whose start_date has passed; cached until the next start."""
+        if self._started is None or (self._started[1] is not None and now >= self._started[1]):
+            cut = bisect_right(self.by_start, (now, float('inf')))
+            bits = 0
+            for _, position in self.by_start[:cut]:
+                bits |= 1 << position
+            self._started = (bits, self.by_start[cut][0] if cut < len(self.by_start) else None)
+        return self._started[0]
+
+    def status_bitmaps(self, now):
+        started = self.started(now)
+        return {
+            'upcoming': self.active & ~started,
+            'ongoing': started & ~self.completed,
+            'completed': self.completed,
+        }
+
+    def search(self, filters, now, offset=0, limit=20):
+        """Tournament ids matching ``filters`` ({facet or 'status': set of values}) by start date,
+        the total, and {facet: {value: count}} where each facet ignores its own filter."""
+        values = {facet: self.bitmaps[facet] for facet in FACETS}
+        values['status'] = self.status_bitmaps(now)
+        masks = {}
+        for facet, wanted in filters.items():
+            mask = 0
+            for value in wanted:
+                mask |= values[facet].get(value, 0)
+            masks[facet] = mask
+
+        matched = self.active
+        for mask in masks.values():
+            matched &= mask
+        counts = {}
+        for facet, bitmaps in values.items():
+            base = self.active
+            for other, mask in masks.items():
+                if other != facet:
+                    base &= mask
+            counts[facet] = {value: (bits & base).bit_count() for value, bits in bitmaps.items() if bits & self.active}
+
+        ids = []
+        skipped = 0
+        for _, position in self.by_start:
+            if matched >> position & 1:
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                ids.append(self.rows[position]['id'])
+                if len(ids) == limit:
+                    break
+        return ids, matched.bit_count(), counts
+
+    def load(self):
+        # Start from the last event old enough to have settled: the table read
+        # below may miss a row whose event is still committing, and catch_up
+        # has to see that event.
+        settle = timezone.now() - timedelta(seconds=getattr(settings, 'OUTBOX_SETTLE_SECONDS', 2))
+        self.settled = DomainEvent.objects.filter(created_at__lte=settle).aggregate(last=Max('id'))['last'] or 0
+        self.loaded = True
+        for row in Tournament.objects.filter(is_active=True).values(*FIELDS):
+            self.upsert(row)
+
+    def catch_up(self):
+        """Apply tournament events since the last settled one.
+
+        Events newer than OUTBOX_SETTLE_SECONDS are applied but read again
+        next time, since a slower transaction may still commit a lower id;
+        re-applying a full row is harmless.
+        """
+        settle = timezone.now() - timedelta(seconds=getattr(settings, 'OUTBOX_SETTLE_SECONDS', 2))
+        events = DomainEvent.objects.filter(topic='tournament', id__gt=self.settled).order_by('id').values_list(
+            'id', 'event_type', 'object_id', 'payload', 'created_at'
+        )
+        settled = True
+        for event_id, event_type, object_id, payload, created_at in events:
+            if event_type == 'deleted':
+                self.remove(object_id)
+            else:
+                row = {field: payload.get(field) for field in FIELDS}
+                row['start_date'] = _start_date(row['start_date'])
+                self.upsert(row)
+            settled = settled and created_at <= settle
+            if settled:
+                self.settled = event_id
+
+    def refresh(self):
+        with self._lock:
+            if not self.loaded:
+                self.load()
+            elif time.monotonic() - self.refreshed_at >= getattr(settings, 'BROWSE_REFRESH_SECONDS', 1.0):
+                self.catch_up()
+            else:
+                return
+            self.refreshed_at = time.monotonic()
+
+    def query(self, filters, now=None, offset=0, limit=20):
+        self.refresh()
+        with self._lock:
+            return self.search(filters, now or timezone.now(), offset, limit)
+
+
+_index = BrowseIndex()
+
+
+def get_index():
+    return _index
+
+
+def parse_filters(params):
+    """{facet: set(values)} from query params such as ?region=EU,NA&status=upcoming."""
+    filters = {}
+    for facet in (*FACETS, 'status'):
+        raw = params.get(facet)
+        if raw:
+            filters[facet] = {value for value in raw.split(',') if value}
+    return filters
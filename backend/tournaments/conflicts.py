@@ -0,0 +1,136 @@
+"""Detects teams booked into overlapping matches, across tournaments.
+
+Every match lasts MATCH_DURATION_MINUTES, so two matches of a team overlap
+exactly when their start times are closer than that. The (team1,
+scheduled_time) and (team2, scheduled_time) indexes turn "does this team
+play near this time" into a range lookup, and TeamIntervals keeps each
+team's start times sorted so a batch of moves is checked with a bisect per
+match.
+"""
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import TournamentMatch
+
+MATCH_FIELDS = ('id', 'tournament_id', 'team1_id', 'team2_id', 'scheduled_time')
+
+
+def duration():
+    return timedelta(minutes=getattr(settings, 'MATCH_DURATION_MINUTES', 60))
+
+
+def conflict(team_id, match_id, other_id, start, other_start):
+    return {'team_id': team_id, 'match_id': match_id, 'conflicts_with': other_id, 'scheduled_time': start, 'other_time': other_start}
+
+
+class TeamIntervals:
+    """Sorted (start, match id) per team."""
+
+    def __init__(self, length=None):
+        self.length = length or duration()
+        self.teams = defaultdict(list)
+
+    def add(self, team_id, start, match_id):
+        insort(self.teams[team_id], (start, match_id))
+
+    def overlapping(self, team_id, start, exclude=None):
+        """Matches of ``team_id`` that overlap one starting at ``start``."""
+        entries = self.teams.get(team_id, [])
+        index = bisect_left(entries, (start - self.length, float('inf')))
+        found = []
+        while index < len(entries) and entries[index][0] < start + self.length:
+            if entries[index][1] != exclude:
+                found.append(entries[index])
+            index += 1
+        return found
+
+
+def _team_matches(team_ids, low, high):
+    """Matches of ``team_ids`` starting in (low, high), via the team/time indexes."""
+    return TournamentMatch.objects.filter(
+        Q(team1_id__in=team_ids) | Q(team2_id__in=team_ids),
+        scheduled_time__gt=low, scheduled_time__lt=high,
+    ).values_list(*MATCH_FIELDS)
+
+
+def check_match(match_id, team_ids, start):
+    """Conflicts for one match (re)scheduled at ``start`` with ``team_ids``."""
+    team_ids = [team_id for team_id in team_ids if team_id is not None]
+    if start is None or not team_ids:
+        return []
+    length = duration()
+    found = []
+    for other_id, _, team1_id, team2_id, other_start in _team_matches(team_ids, start - length, start + length).exclude(id=match_id):
+        for team_id in {team1_id, team2_id} & set(team_ids):
+            found.append(conflict(team_id, match_id, other_id, start, other_start))
+    return found
+
+
+def check_moves(moves):
+    """Conflicts if every match in {match id: new start} moved at once.
+
+    Moved matches are checked against each other as well as everything
+    already booked for their teams around the new times.
+    """
+    matches = {row[0]: row for row in TournamentMatch.objects.filter(id__in=list(moves)).values_list(*MATCH_FIELDS)}
+    starts = [start for start in moves.values() if start is not None]
+    if not starts:
+        return []
+    team_ids = {team_id for row in matches.values() for team_id in row[2:4] if team_id is not None}
+    index = TeamIntervals()
+    for match_id, _, team1_id, team2_id, start in _team_matches(team_ids, min(starts) - index.length, max(starts) + index.length):
+        if match_id in moves:
+            continue
+        for team_id in (team1_id, team2_id):
+            if team_id in team_ids:
+                index.add(team_id, start, match_id)
+
+    found = []
+    for match_id, start in sorted(moves.items(), key=lambda item: (item[1] is None, item[1], item[0])):
+        if start is None or match_id not in matches:
+            continue
+        for team_id in {matches[match_id][2], matches[match_id][3]} - {None}:
+            for other_start, other_id in index.overlapping(team_id, start, exclude=match_id):
+                found.append(conflict(team_id, match_id, other_id, start, other_start))
+            index.add(team_id, start, match_id)
+    return found
+
+
+def tournament_conflicts(tournament):
+    """Every overlap involving a match of ``tournament``: two queries, then one sweep per team.
+
+    Other tournaments' matches of the same teams are included, so a team
+    double-booked across events shows up too.
+    """
+    team_ids = set()
+    for team1_id, team2_id in TournamentMatch.objects.filter(tournament=tournament).values_list('team1_id', 'team2_id'):
+        team_ids.update((team1_id, team2_id))
+    team_ids.discard(None)
+    if not team_ids:
+        return []
+    rows = TournamentMatch.objects.filter(
+        Q(team1_id__in=team_ids) | Q(team2_id__in=team_ids), scheduled_time__isnull=False,
+    ).values_list(*MATCH_FIELDS)
+
+    by_team = defaultdict(list)
+    for match_id, tournament_id, team1_id, team2_id, start in rows:
+        for team_id in {team1_id, team2_id} & team_ids:
+            by_team[team_id].append((start, match_id, tournament_id))
+
+    length = duration()
+    found = []
+    for team_id, entries in by_team.items():
+        entries.sort()
+        # Equal lengths: a match can only overlap the ones that start before it ends.
+        for position, (start, match_id, tournament_id) in enumerate(entries):
+            following = position + 1
+            while following < len(entries) and entries[following][0] < start + length:
+                other_start, other_id, other_tournament = entries[following]
+                if tournament.id in (tournament_id, other_tournament):
+                    found.append(conflict(team_id, match_id, other_id, start, other_start))
+                following += 1
+    return found
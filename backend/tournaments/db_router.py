@@ -0,0 +1,119 @@
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PRIMARY_COOKIE = 'db_primary_until'
+
+# Per-request routing state; None outside requests (management commands,
+# jobs), where every read goes to the primary.
+_state = ContextVar('db_routing_state', default=None)
+
+
+class RoutingState:
+    __slots__ = ('use_primary', 'wrote')
+
+    def __init__(self, use_primary):
+        self.use_primary = use_primary
+        self.wrote = False
+
+
+def replica_alias():
+    return getattr(settings, 'DATABASE_REPLICA_ALIAS', 'replica')
+
+
+class PrimaryReplicaRouter:
+    """Send reads of safe requests to the replica, everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.use_primary or state.wrote:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return replica_alias()
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def _client_user_id(request):
+    """The user a request acts for, from its bearer token or session; None if anonymous.
+
+    Runs before DRF authenticates the request, so the token is only decoded
+    here; the user row is not read.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw = authentication.get_raw_token(header) if header else None
+    if raw is not None:
+        try:
+            return authentication.get_validated_token(raw).get(jwt_settings.USER_ID_CLAIM)
+        except (InvalidToken, TokenError):
+            return None
+    user = getattr(request, 'user', None)
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+def _pin_key(user_id):
+    return f'db_primary_until:{user_id}'
+
+
+class ReplicaRoutingMiddleware:
+    """Pins a client to the primary for DATABASE_PRIMARY_STICKY_SECONDS after it writes,
+    so it reads its own writes while the replica catches up.
+
+    Authenticated users are pinned by user id in the cache, since the
+    frontend calls the API cross-origin with a bearer token and no cookies;
+    anonymous clients get a cookie.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sticky_seconds = getattr(settings, 'DATABASE_PRIMARY_STICKY_SECONDS', 5)
+
+    def __call__(self, request):
+        user_id = _client_user_id(request)
+        state = RoutingState(use_primary=request.method not in SAFE_METHODS or self.is_pinned(request, user_id))
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        if state.wrote or request.method not in SAFE_METHODS:
+            until = time.time() + self.sticky_seconds
+            if user_id is not None:
+                cache.set(_pin_key(user_id), until, self.sticky_seconds)
+            else:
+                response.set_cookie(
+                    PRIMARY_COOKIE,
+                    str(int(until)),
+                    max_age=self.sticky_seconds,
+                    httponly=True,
+                    samesite='Lax',
+                )
+        return response
+
+    def is_pinned(self, request, user_id=None):
+        if user_id is not None:
+            return (cache.get(_pin_key(user_id)) or 0) > time.time()
+        try:
+            return float(request.COOKIES.get(PRIMARY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
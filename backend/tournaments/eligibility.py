@@ -0,0 +1,98 @@
+"""Per-team "available tournaments" feed.
+
+A TeamEligibility row exists while a team can still enter a tournament: it
+is active, not started, starts in the future, is not full, its level matches
+the team's tier and the team is not registered yet. Rows are refreshed per
+tournament by the team_eligibility outbox consumer (tournament and
+registration events) and per team when a team's tier changes; rows whose
+start date has passed are simply filtered out on read and pruned by a job.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from . import outbox
+from .models import Team, TeamEligibility, Tournament, TournamentParticipant
+
+
+def _open_tournaments(**filters):
+    return Tournament.objects.filter(
+        is_active=True, is_started=False, is_completed=False, start_date__gt=timezone.now(), **filters
+    ).annotate(entered=Count('participants')).filter(entered__lt=F('max_players'))
+
+
+def _registered(tournament_ids, team_ids=None):
+    registered = TournamentParticipant.objects.filter(tournament_id__in=tournament_ids)
+    if team_ids is not None:
+        registered = registered.filter(team_id__in=team_ids)
+    pairs = defaultdict(set)
+    for tournament_id, team_id in registered.values_list('tournament_id', 'team_id'):
+        pairs[tournament_id].add(team_id)
+    return pairs
+
+
+@transaction.atomic
+def refresh_tournaments(tournament_ids):
+    """Recompute which teams can enter each of ``tournament_ids``."""
+    tournament_ids = list(tournament_ids)
+    TeamEligibility.objects.filter(tournament_id__in=tournament_ids).delete()
+    tournaments = list(_open_tournaments(id__in=tournament_ids).values_list('id', 'level', 'start_date'))
+    registered = _registered([tournament_id for tournament_id, _, _ in tournaments])
+    teams = defaultdict(list)
+    for team_id, tier in Team.objects.filter(is_active=True, tier__in={level for _, level, _ in tournaments}).values_list('id', 'tier'):
+        teams[tier].append(team_id)
+    return TeamEligibility.objects.bulk_create([
+        TeamEligibility(team_id=team_id, tournament_id=tournament_id, start_date=start_date)
+        for tournament_id, level, start_date in tournaments
+        for team_id in teams[level] if team_id not in registered[tournament_id]
+    ], batch_size=1000)
+
+
+@transaction.atomic
+def refresh_teams(team_ids):
+    """Recompute the feed of each of ``team_ids`` (after a tier change or a new team)."""
+    team_ids = list(team_ids)
+    TeamEligibility.objects.filter(team_id__in=team_ids).delete()
+    teams = defaultdict(list)
+    for team_id, tier in Team.objects.filter(id__in=team_ids, is_active=True).values_list('id', 'tier'):
+        teams[tier].append(team_id)
+    tournaments = list(_open_tournaments(level__in=list(teams)).values_list('id', 'level', 'start_date'))
+    registered = _registered([tournament_id for tournament_id, _, _ in tournaments], team_ids)
+    return TeamEligibility.objects.bulk_create([
+        TeamEligibility(team_id=team_id, tournament_id=tournament_id, start_date=start_date)
+        for tournament_id, level, start_date in tournaments
+        for team_id in teams[level] if team_id not in registered[tournament_id]
+    ], batch_size=1000)
+
+
+def rebuild():
+    """Recompute every row, e.g. after deploying the table."""
+    TeamEligibility.objects.all().delete()
+    return refresh_tournaments(_open_tournaments().values_list('id', flat=True))
+
+
+def prune():
+    return TeamEligibility.objects.filter(start_date__lte=timezone.now()).delete()[0]
+
+
+def feed(team_ids):
+    """{team id: [tournament, ...]} in start order, one indexed query."""
+    rows = (
+        TeamEligibility.objects.filter(team_id__in=team_ids, start_date__gt=timezone.now())
+        .select_related('tournament').order_by('start_date', 'tournament_id')
+    )
+    result = {team_id: [] for team_id in team_ids}
+    for row in rows:
+        result[row.team_id].append(row.tournament)
+    return result
+
+
+@outbox.register
+class TeamEligibilityConsumer(outbox.Consumer):
+    name = 'team_eligibility'
+    topics = ('tournament', 'tournament_participant')
+
+    def handle(self, events):
+        refresh_tournaments({event.tournament_id for event in events if event.tournament_id is not None})
@@ -0,0 +1,107 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count
+
+from .models import Player, Team, TournamentMatch, TournamentParticipant
+
+CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def players(tournament_id=None):
+    fields = [
+        'id', 'username', 'email', 'discord_id', 'country_code', 'tier', 'rank', 'skill_rating',
+        'points', 'kill_death_ratio', 'win_rate', 'is_team_lead', 'date_joined',
+    ]
+    queryset = Player.objects.order_by('id')
+    if tournament_id is not None:
+        queryset = queryset.filter(teams__team__tournaments__tournament_id=tournament_id).distinct()
+    return fields, queryset.values(*fields)
+
+
+def teams(tournament_id=None):
+    fields = ['id', 'name', 'tier', 'is_active', 'join_code', 'created_at', 'lead_player_id', 'lead_player__email', 'member_count']
+    queryset = Team.objects.order_by('id')
+    if tournament_id is not None:
+        queryset = queryset.filter(tournaments__tournament_id=tournament_id)
+    return fields, queryset.annotate(member_count=Count('members')).values(*fields)
+
+
+def participants(tournament_id):
+    """One row per squad member, with participants or squads that have none still listed."""
+    fields = [
+        'id', 'team_id', 'team__name', 'registered_at',
+        'squads__id', 'squads__squad_type',
+        'squads__members__player_id', 'squads__members__player__username',
+        'squads__members__role', 'squads__members__action_role',
+    ]
+    queryset = (
+        TournamentParticipant.objects.filter(tournament_id=tournament_id)
+        .order_by('id', 'squads__id', 'squads__members__id')
+        .values(*fields)
+    )
+    return fields, queryset
+
+
+def matches(tournament_id):
+    fields = [
+        'id', 'round_number', 'match_number', 'scheduled_time', 'mode',
+        'team1_id', 'team1__name', 'team1_score', 'team2_id', 'team2__name', 'team2_score',
+        'winner_id', 'winner__name', 'is_completed',
+    ]
+    queryset = (
+        TournamentMatch.objects.filter(tournament_id=tournament_id)
+        .order_by('round_number', 'match_number')
+        .values(*fields)
+    )
+    return fields, queryset
+
+
+DATASETS = {
+    'players': players,
+    'teams': teams,
+}
+
+TOURNAMENT_DATASETS = {
+    'players': players,
+    'teams': teams,
+    'participants': participants,
+    'matches': matches,
+}
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _encoder(fields, fmt):
+    """(header line or None, row -> line) for ``fmt``."""
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        return writer.writerow(fields), lambda row: writer.writerow([row[field] for field in fields])
+    return None, lambda row: json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def stream(fields, queryset, fmt):
+    header, encode = _encoder(fields, fmt)
+    if header is not None:
+        yield header
+    for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+        yield encode(row)
+
+
+async def astream(fields, queryset, fmt):
+    """stream() for ASGI servers, which would otherwise buffer a sync iterator
+    whole; rows are fetched CHUNK_SIZE at a time in a worker thread."""
+    header, encode = _encoder(fields, fmt)
+    if header is not None:
+        yield header
+    async for row in queryset.aiterator(chunk_size=CHUNK_SIZE):
+        yield encode(row)
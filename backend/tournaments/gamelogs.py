@@ -0,0 +1,230 @@
+"""Game-server log ingestion.
+
+Logs are line oriented: a timestamp, an event name and key=value fields.
+Player names are usernames, discord ids or emails, and sides are 1 (team1)
+or 2 (team2) of the TournamentMatch:
+
+    2025-06-01T20:00:00Z MATCH_START match=42
+    2025-06-01T20:00:01Z PLAYER match=42 player=viper side=1
+    2025-06-01T20:03:12Z KILL match=42 killer=viper victim=ghost assist=hawk
+    2025-06-01T20:14:40Z ROUND_END match=42 winner=1
+    2025-06-01T20:52:09Z MATCH_END match=42
+
+The pipeline is a chain of generators, so memory stays bounded by the
+matches still in progress rather than the file size: read_lines() pages
+the file in through mmap (or streams .gz files), parse_events() turns lines
+into events, collect_matches() yields each match once it ends, and
+write_matches() stores them in batches.
+"""
+import gzip
+import mmap
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import outbox, stats
+from .brackets import advance_winners
+from .models import PlayerMatchStats, TournamentMatch
+from .realtime import publish_match
+from .resolvers import resolve_players
+
+EVENTS = {b'MATCH_START', b'PLAYER', b'KILL', b'ROUND_END', b'MATCH_END'}
+SCORE_PER_KILL = 100
+SCORE_PER_ASSIST = 50
+FLUSH_MATCHES = 50
+
+
+class LogResult:
+    def __init__(self, path=None):
+        self.path = path
+        self.lines = 0
+        self.matches = 0
+        self.stat_lines = 0
+        self.unknown_matches = set()
+        self.duplicate_matches = set()
+        self.unknown_players = set()
+        self.incomplete = 0
+
+    def as_dict(self):
+        return {
+            'path': self.path,
+            'lines': self.lines,
+            'matches': self.matches,
+            'stat_lines': self.stat_lines,
+            'unknown_matches': sorted(self.unknown_matches),
+            'duplicate_matches': sorted(self.duplicate_matches),
+            'unknown_players': len(self.unknown_players),
+            'incomplete': self.incomplete,
+        }
+
+
+class MatchLog:
+    __slots__ = ('match_id', 'sides', 'kills', 'deaths', 'assists', 'rounds')
+
+    def __init__(self, match_id):
+        self.match_id = match_id
+        self.sides = {}
+        self.kills = Counter()
+        self.deaths = Counter()
+        self.assists = Counter()
+        self.rounds = [0, 0]
+
+    def winner_side(self):
+        if self.rounds[0] == self.rounds[1]:
+            return None
+        return 1 if self.rounds[0] > self.rounds[1] else 2
+
+
+def read_lines(path):
+    if str(path).endswith('.gz'):
+        with gzip.open(path, 'rb') as stream:
+            yield from stream
+        return
+    with open(path, 'rb') as stream:
+        try:
+            mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return  # empty file
+        with mapped:
+            yield from iter(mapped.readline, b'')
+
+
+def parse_events(lines, result):
+    for line in lines:
+        result.lines += 1
+        parts = line.split()
+        if len(parts) < 3 or parts[1] not in EVENTS:
+            continue
+        fields = {}
+        for part in parts[2:]:
+            key, _, value = part.partition(b'=')
+            fields[key.decode()] = value.decode('utf-8', 'replace')
+        yield parts[1].decode(), fields
+
+
+def collect_matches(events, result):
+    open_matches = {}
+    for event, fields in events:
+        try:
+            match_id = int(fields['match'])
+        except (KeyError, ValueError):
+            continue
+        if event == 'MATCH_START':
+            open_matches[match_id] = MatchLog(match_id)
+            continue
+        log = open_matches.get(match_id)
+        if log is None:
+            continue
+        if event == 'PLAYER' and fields.get('side') in ('1', '2'):
+            log.sides[fields.get('player')] = int(fields['side'])
+        elif event == 'KILL':
+            killer, victim, assist = fields.get('killer'), fields.get('victim'), fields.get('assist')
+            if killer and killer != victim:
+                log.kills[killer] += 1
+            if victim:
+                log.deaths[victim] += 1
+            if assist:
+                log.assists[assist] += 1
+        elif event == 'ROUND_END' and fields.get('winner') in ('1', '2'):
+            log.rounds[int(fields['winner']) - 1] += 1
+        elif event == 'MATCH_END':
+            yield open_matches.pop(match_id)
+    result.incomplete += len(open_matches)
+
+
+def write_matches(logs, result):
+    """Store a batch of finished matches: scores, winners and stat lines, in one transaction.
+
+    Winners move on to the next round as with set_winner. A match logged more
+    than once in a batch keeps its first log; the repeats are reported.
+    """
+    unique = {}
+    for log in logs:
+        if log.match_id in unique:
+            result.duplicate_matches.add(log.match_id)
+        else:
+            unique[log.match_id] = log
+    logs = list(unique.values())
+    matches = TournamentMatch.objects.in_bulk([log.match_id for log in logs])
+    names = {name for log in logs for name in (*log.sides, *log.kills, *log.deaths, *log.assists)}
+    players = resolve_players(names)
+    result.unknown_players |= {name for name in names if name not in players}
+
+    now = timezone.now()
+    finished = []
+    lines_by_match = {}
+    for log in logs:
+        match = matches.get(log.match_id)
+        if match is None:
+            result.unknown_matches.add(log.match_id)
+            continue
+        match.team1_score, match.team2_score = log.rounds
+        winner_side = log.winner_side()
+        match.winner_id = {1: match.team1_id, 2: match.team2_id}.get(winner_side)
+        match.is_completed = True
+        match.row_version += 1
+        match.updated_at = now
+        finished.append(match)
+
+        lines = {}
+        for name in set(log.sides) | set(log.kills) | set(log.deaths) | set(log.assists):
+            player = players.get(name)
+            if player is None or player['id'] in lines:
+                continue
+            side = log.sides.get(name)
+            lines[player['id']] = PlayerMatchStats(
+                match=match,
+                player_id=player['id'],
+                team_id={1: match.team1_id, 2: match.team2_id}.get(side),
+                kills=log.kills[name],
+                deaths=log.deaths[name],
+                assists=log.assists[name],
+                score=SCORE_PER_KILL * log.kills[name] + SCORE_PER_ASSIST * log.assists[name],
+                won=side is not None and side == winner_side,
+            )
+        lines_by_match[match.pk] = list(lines.values())
+
+    with transaction.atomic():
+        TournamentMatch.objects.bulk_update(
+            finished, ['team1_score', 'team2_score', 'winner', 'is_completed', 'row_version', 'updated_at']
+        )
+        outbox.record_bulk(finished, 'updated')
+        created = stats.ingest(lines_by_match)
+        for match in finished:
+            publish_match(match)
+        advance_winners(finished)
+    result.matches += len(finished)
+    result.stat_lines += len(created)
+
+
+def ingest_file(path, flush=FLUSH_MATCHES):
+    result = LogResult(str(path))
+    matches = collect_matches(parse_events(read_lines(path), result), result)
+    while True:
+        batch = list(islice(matches, flush))
+        if not batch:
+            break
+        write_matches(batch, result)
+    return result.as_dict()
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def ingest_files(paths, workers=1, flush=FLUSH_MATCHES):
+    """Ingest each file, in a process pool when ``workers`` > 1; yields per-file results as they finish."""
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield ingest_file(path, flush)
+        return
+    # Forked workers must not share the parent's database connections.
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(ingest_file, path, flush) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,351 @@
+import csv
+import io
+import json
+import random
+import string
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import eligibility, membership, outbox
+from .models import Player, Team, TeamMember, Tournament
+from .resolvers import resolve_players
+
+CHUNK_SIZE = 1000
+
+
+class InvalidRow:
+    """Yielded by read_rows for a line that isn't a flat object; reported as that row's error."""
+
+    def __init__(self, message):
+        self.message = message
+
+
+def text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _ndjson_row(line):
+    try:
+        row = json.loads(line)
+    except ValueError:
+        return InvalidRow('invalid JSON')
+    if not isinstance(row, dict):
+        return InvalidRow('each line must be a JSON object')
+    values = {}
+    for key, value in row.items():
+        if isinstance(value, (dict, list)):
+            return InvalidRow(f'{key} must be a string or number')
+        values[key.strip()] = None if value is None else text(value)
+    return values
+
+
+def read_rows(stream, fmt):
+    """Yield dict rows of strings from a binary CSV or NDJSON stream without reading it all into memory."""
+    lines = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        for row in csv.DictReader(lines):
+            yield {key.strip(): (value.strip() if isinstance(value, str) else value) for key, value in row.items() if key}
+    else:
+        for line in lines:
+            if line.strip():
+                yield _ndjson_row(line)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.skipped = 0
+        self.errors = []
+
+    def error(self, row_number, message):
+        self.errors.append({'row': row_number, 'error': message})
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'skipped': self.skipped,
+            'errors': self.errors,
+        }
+
+
+class Importer:
+    """Validate every row first, then insert the valid ones with bulk_create.
+
+    Subclasses implement validate_chunk(), which resolves references for a
+    chunk of rows with batched IN queries and returns unsaved model instances,
+    and optionally after_create() for dependent rows. Nothing is written when
+    any row fails unless ``partial`` is set.
+    """
+    model = None
+    max_errors = 1000
+
+    def __init__(self, dry_run=False, partial=False, chunk_size=CHUNK_SIZE):
+        self.dry_run = dry_run
+        self.partial = partial
+        self.chunk_size = chunk_size
+
+    def run(self, rows):
+        result = ImportResult()
+        pending = []
+        numbered = enumerate(rows, start=1)
+        for chunk in chunked(numbered, self.chunk_size):
+            result.rows += len(chunk)
+            for number, row in chunk:
+                if isinstance(row, InvalidRow):
+                    result.error(number, row.message)
+            chunk = [(number, row) for number, row in chunk if not isinstance(row, InvalidRow)]
+            pending.extend(self.validate_chunk(chunk, result))
+            if len(result.errors) >= self.max_errors and not self.partial:
+                break
+
+        if self.dry_run or (result.errors and not self.partial):
+            return result
+
+        with transaction.atomic():
+            for batch in chunked(pending, self.chunk_size):
+                created = self.model.objects.bulk_create(batch)
+                self.after_create(created)
+                result.created += len(created)
+        return result
+
+    def validate_chunk(self, chunk, result):
+        raise NotImplementedError
+
+    def after_create(self, created):
+        pass
+
+    @staticmethod
+    def choice(value, choices, default=None):
+        value = text(value or default).upper()
+        if value not in {key for key, _ in choices}:
+            raise ValueError(f"must be one of {', '.join(key for key, _ in choices)}")
+        return value
+
+
+class PlayerImporter(Importer):
+    """Rows: email, username, discord_id?, tier?, country_code?, skill_rating?
+
+    Players already registered under the email, username or discord id are
+    skipped. Imported accounts get an unusable password and sign in through a
+    social provider or a password reset.
+    """
+    model = Player
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.seen = set()
+        # Any '!'-prefixed value is unusable; one per import skips 50k random strings.
+        self.unusable_password = make_password(None)
+
+    def validate_chunk(self, chunk, result):
+        existing = resolve_players(
+            value for _, row in chunk
+            for value in (text(row.get('email')).lower(), text(row.get('username')), text(row.get('discord_id')))
+        )
+        players = []
+        for number, row in chunk:
+            email = text(row.get('email')).lower()
+            username = text(row.get('username'))
+            discord_id = text(row.get('discord_id')) or None
+            if not email or '@' not in email or not username:
+                result.error(number, 'email and username are required')
+                continue
+            keys = {email, username} | ({discord_id} if discord_id else set())
+            if keys & self.seen:
+                result.error(number, 'duplicate of an earlier row')
+                continue
+            if any(key in existing for key in keys):
+                result.skipped += 1
+                continue
+            try:
+                tier = self.choice(row.get('tier'), Player.TIER_CHOICES, 'BRONZE')
+                skill_rating = int(row.get('skill_rating') or 1000)
+            except (TypeError, ValueError) as e:
+                result.error(number, str(e))
+                continue
+            self.seen |= keys
+            players.append(Player(
+                email=email,
+                username=username,
+                discord_id=discord_id,
+                tier=tier,
+                skill_rating=skill_rating,
+                country_code=text(row.get('country_code')).lower()[:2] or None,
+                password=self.unusable_password,
+            ))
+        return players
+
+
+def generate_join_codes(count, taken):
+    codes = set()
+    while len(codes) < count:
+        code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+        if code not in taken:
+            codes.add(code)
+    return list(codes)
+
+
+class TeamImporter(Importer):
+    """Rows: name, lead (email, username or discord id), tier?
+
+    Each lead is added as the team's CAPTAIN member, as TeamViewSet.create does.
+    """
+    model = Team
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.leads = set()
+        self.codes = set()
+
+    def validate_chunk(self, chunk, result):
+        leads = resolve_players(row.get('lead') for _, row in chunk)
+        lead_ids = {player['id'] for player in leads.values()}
+        already_leading = set(Team.objects.filter(lead_player_id__in=lead_ids).values_list('lead_player_id', flat=True))
+        teams = []
+        for number, row in chunk:
+            name = text(row.get('name'))
+            lead = leads.get(text(row.get('lead')))
+            if not name:
+                result.error(number, 'name is required')
+                continue
+            if lead is None:
+                result.error(number, 'lead player not found')
+                continue
+            if lead['id'] in already_leading or lead['id'] in self.leads:
+                result.error(number, 'lead player already leads a team')
+                continue
+            try:
+                tier = self.choice(row.get('tier'), Player.TIER_CHOICES, 'BRONZE')
+            except ValueError as e:
+                result.error(number, str(e))
+                continue
+            self.leads.add(lead['id'])
+            teams.append(Team(name=name, lead_player_id=lead['id'], tier=tier))
+
+        codes = generate_join_codes(len(teams), self.codes)
+        taken = set(Team.objects.filter(join_code__in=codes).values_list('join_code', flat=True))
+        while taken:
+            self.codes |= taken
+            codes = [code for code in codes if code not in taken]
+            replacements = generate_join_codes(len(teams) - len(codes), self.codes | set(codes))
+            taken = set(Team.objects.filter(join_code__in=replacements).values_list('join_code', flat=True))
+            codes += replacements
+        self.codes.update(codes)
+        for team, code in zip(teams, codes):
+            team.join_code = code
+        return teams
+
+    def after_create(self, created):
+        members = TeamMember.objects.bulk_create([
+            TeamMember(team=team, player_id=team.lead_player_id, role='CAPTAIN') for team in created
+        ])
+        outbox.record_bulk(members, 'created')
+        membership.invalidate([team.lead_player_id for team in created])
+        eligibility.refresh_teams([team.id for team in created])
+
+
+class TeamMemberImporter(Importer):
+    """Rows: team (join code), player (email, username or discord id), role?"""
+    model = TeamMember
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.seen = set()
+
+    def validate_chunk(self, chunk, result):
+        codes = {text(row.get('team')).upper() for _, row in chunk}
+        teams = dict(Team.objects.filter(join_code__in=codes).values_list('join_code', 'id'))
+        players = resolve_players(row.get('player') for _, row in chunk)
+        existing = set(TeamMember.objects.filter(
+            team_id__in=teams.values(),
+            player_id__in=[player['id'] for player in players.values()]
+        ).values_list('team_id', 'player_id'))
+
+        members = []
+        for number, row in chunk:
+            team_id = teams.get(text(row.get('team')).upper())
+            player = players.get(text(row.get('player')))
+            if team_id is None:
+                result.error(number, 'team join code not found')
+                continue
+            if player is None:
+                result.error(number, 'player not found')
+                continue
+            key = (team_id, player['id'])
+            if key in existing or key in self.seen:
+                result.skipped += 1
+                continue
+            try:
+                role = self.choice(row.get('role'), TeamMember.ROLE_CHOICES, 'MEMBER')
+            except ValueError as e:
+                result.error(number, str(e))
+                continue
+            self.seen.add(key)
+            members.append(TeamMember(team_id=team_id, player_id=player['id'], role=role))
+        return members
+
+    def after_create(self, created):
+        outbox.record_bulk(created, 'created')
+        membership.invalidate([member.player_id for member in created])
+
+
+class TournamentImporter(Importer):
+    """Rows: title, max_players, mode, region, level, platform, start_date, language, tournament_type, game?, bracket_type?"""
+    model = Tournament
+
+    def validate_chunk(self, chunk, result):
+        tournaments = []
+        for number, row in chunk:
+            try:
+                if not row.get('title'):
+                    raise ValueError('title is required')
+                start_date = parse_datetime(row.get('start_date') or '')
+                if start_date is None:
+                    raise ValueError('start_date must be an ISO 8601 datetime')
+                if timezone.is_naive(start_date):
+                    start_date = timezone.make_aware(start_date)
+                mode = row.get('mode')
+                if mode not in {key for key, _ in Tournament.MODE_CHOICES}:
+                    raise ValueError(f"mode must be one of {', '.join(key for key, _ in Tournament.MODE_CHOICES)}")
+                tournaments.append(Tournament(
+                    title=row['title'],
+                    max_players=int(row.get('max_players') or 0),
+                    mode=mode,
+                    region=self.choice(row.get('region'), Tournament.REGION_CHOICES),
+                    level=self.choice(row.get('level'), Tournament.LEVEL_CHOICES),
+                    platform=self.choice(row.get('platform'), Tournament.PLATFORM_CHOICES),
+                    game=self.choice(row.get('game'), Tournament.GAME_CHOICES, 'BATTLEFIELD'),
+                    bracket_type=self.choice(row.get('bracket_type'), Tournament.BRACKET_TYPES, 'SINGLE_ELIM'),
+                    start_date=start_date,
+                    language=row.get('language') or 'English',
+                    tournament_type=row.get('tournament_type') or '',
+                ))
+            except (TypeError, ValueError) as e:
+                result.error(number, str(e))
+        return tournaments
+
+    def after_create(self, created):
+        outbox.record_bulk(created, 'created')
+
+
+IMPORTERS = {
+    'players': PlayerImporter,
+    'teams': TeamImporter,
+    'team-members': TeamMemberImporter,
+    'tournaments': TournamentImporter,
+}
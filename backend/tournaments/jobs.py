@@ -0,0 +1,253 @@
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Checkpoint, Job
+
+logger = logging.getLogger(__name__)
+
+
+class JobSpec:
+    def __init__(self, func, max_attempts, retry_delay):
+        self.func = func
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+
+_registry = {}
+
+
+def job(name=None, max_attempts=3, retry_delay=30):
+    """Register a function as a background job; keyword arguments must be JSON serialisable."""
+    def decorator(func):
+        _registry[name or func.__name__] = JobSpec(func, max_attempts, retry_delay)
+        return func
+    return decorator
+
+
+def registered_jobs():
+    return sorted(_registry)
+
+
+def enqueue(name, kwargs=None, run_at=None, user=None):
+    if name not in _registry:
+        raise KeyError(f"Unknown job {name}")
+    queued = Job.objects.create(
+        name=name,
+        kwargs=kwargs or {},
+        max_attempts=_registry[name].max_attempts,
+        run_at=run_at or timezone.now(),
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+    get_backend().submit(queued)
+    return queued
+
+
+def _worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def claim(worker_id, limit=1):
+    """Lock due jobs for this worker with SELECT ... FOR UPDATE SKIP LOCKED.
+
+    A RUNNING job whose heartbeat stopped JOBS_LOCK_TIMEOUT_SECONDS ago lost
+    its worker: it is run again if it has attempts left, otherwise failed.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=getattr(settings, 'JOBS_LOCK_TIMEOUT_SECONDS', 600))
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(Q(status='QUEUED', run_at__lte=now) | Q(status='RUNNING', locked_at__lt=stale))
+            .order_by('run_at')[:limit]
+        )
+        for claimed in jobs:
+            if claimed.status == 'RUNNING' and claimed.attempts >= claimed.max_attempts:
+                claimed.status = 'FAILED'
+                claimed.error = f'Worker {claimed.locked_by} stopped responding'
+                claimed.finished_at = now
+                claimed.locked_by = ''
+                claimed.locked_at = None
+                logger.error('Job %s #%s abandoned by its worker (attempt %s)', claimed.name, claimed.pk, claimed.attempts)
+                continue
+            claimed.status = 'RUNNING'
+            claimed.attempts += 1
+            claimed.locked_by = worker_id
+            claimed.locked_at = now
+        Job.objects.bulk_update(jobs, ['status', 'attempts', 'error', 'finished_at', 'locked_by', 'locked_at'])
+    return [claimed for claimed in jobs if claimed.status == 'RUNNING']
+
+
+class Heartbeat:
+    """Refreshes a running job's locked_at from a background thread, so a
+    long job is not taken for one whose worker died."""
+
+    def __init__(self, claimed, interval=None):
+        self.claimed = claimed
+        self.interval = interval or getattr(settings, 'JOBS_HEARTBEAT_SECONDS', 60)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def beat(self):
+        Job.objects.filter(pk=self.claimed.pk, status='RUNNING', locked_by=self.claimed.locked_by).update(locked_at=timezone.now())
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    self.beat()
+                except Exception:
+                    logger.exception('Heartbeat for job #%s failed', self.claimed.pk)
+        finally:
+            connection.close()
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name=f'job-heartbeat-{self.claimed.pk}', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def execute(claimed):
+    spec = _registry.get(claimed.name)
+    try:
+        if spec is None:
+            raise KeyError(f"Unknown job {claimed.name}")
+        with Heartbeat(claimed):
+            result = spec.func(**claimed.kwargs)
+    except Exception:
+        claimed.error = traceback.format_exc()
+        if spec is not None and claimed.attempts < claimed.max_attempts:
+            claimed.status = 'QUEUED'
+            claimed.run_at = timezone.now() + timedelta(seconds=spec.retry_delay * 2 ** (claimed.attempts - 1))
+        else:
+            claimed.status = 'FAILED'
+            claimed.finished_at = timezone.now()
+        logger.exception('Job %s #%s failed (attempt %s)', claimed.name, claimed.pk, claimed.attempts)
+    else:
+        claimed.status = 'SUCCEEDED'
+        claimed.result = result
+        claimed.error = ''
+        claimed.finished_at = timezone.now()
+    claimed.locked_by = ''
+    claimed.locked_at = None
+    claimed.save(update_fields=['status', 'result', 'error', 'run_at', 'finished_at', 'locked_by', 'locked_at'])
+    return claimed
+
+
+def schedule_periodic(now=None):
+    """Enqueue JOBS_PERIODIC entries that are due; safe to call from many workers at once."""
+    now = now or timezone.now()
+    for name, interval in getattr(settings, 'JOBS_PERIODIC', {}).items():
+        with transaction.atomic():
+            state, _ = Checkpoint.objects.get_or_create(name=f"periodic:{name}")
+            state = Checkpoint.objects.select_for_update(skip_locked=True).filter(pk=state.pk).first()
+            if state is None or state.position > now.timestamp():
+                continue
+            state.position = int(now.timestamp()) + interval
+            state.save(update_fields=['position', 'updated_at'])
+            enqueue(name)
+
+
+def run_worker(worker_id=None, once=False, interval=1.0, batch=1):
+    worker_id = worker_id or _worker_id()
+    while True:
+        close_old_connections()
+        schedule_periodic()
+        jobs = claim(worker_id, limit=batch)
+        for claimed in jobs:
+            execute(claimed)
+        if not jobs:
+            if once:
+                return
+            time.sleep(interval)
+
+
+class DatabaseBackend:
+    """Jobs wait in the Job table until a `run_jobs` worker claims them."""
+
+    def submit(self, queued):
+        pass
+
+
+class ThreadPoolBackend:
+    """Runs jobs inside the web process; a ticker thread picks up retries and periodic jobs."""
+
+    def __init__(self, workers=4, interval=5.0):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='jobs')
+        self.interval = interval
+        self._ticker = None
+
+    def submit(self, queued):
+        if queued.run_at <= timezone.now():
+            transaction.on_commit(lambda: self.executor.submit(self._run, queued.pk))
+
+    def _run(self, job_id=None, claimed=None):
+        """Execute ``claimed``, or claim the queued job ``job_id`` first."""
+        close_old_connections()
+        try:
+            if claimed is None:
+                with transaction.atomic():
+                    claimed = Job.objects.select_for_update(skip_locked=True).filter(pk=job_id, status='QUEUED').first()
+                    if claimed is None:
+                        return
+                    claimed.status = 'RUNNING'
+                    claimed.attempts += 1
+                    claimed.locked_by = _worker_id()
+                    claimed.locked_at = timezone.now()
+                    claimed.save(update_fields=['status', 'attempts', 'locked_by', 'locked_at'])
+            execute(claimed)
+        finally:
+            close_old_connections()
+
+    def start(self):
+        if self._ticker is None:
+            self._ticker = threading.Thread(target=self._tick, name='jobs-ticker', daemon=True)
+            self._ticker.start()
+
+    def _tick(self):
+        while True:
+            try:
+                close_old_connections()
+                schedule_periodic()
+                for claimed in claim(_worker_id(), limit=10):
+                    self.executor.submit(self._run, claimed=claimed)
+            except Exception:
+                logger.exception('Job ticker failed')
+            time.sleep(self.interval)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if getattr(settings, 'JOBS_BACKEND', 'database') == 'thread':
+                    _backend = ThreadPoolBackend(workers=getattr(settings, 'JOBS_THREAD_WORKERS', 4))
+                else:
+                    _backend = DatabaseBackend()
+    return _backend
+
+
+def start():
+    """Called by the WSGI/ASGI entry points so thread-backed servers also run periodic jobs."""
+    backend = get_backend()
+    if isinstance(backend, ThreadPoolBackend):
+        backend.start()
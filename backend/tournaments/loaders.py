@@ -0,0 +1,150 @@
+"""Request-scoped batching of related-row lookups for serializers.
+
+A serializer opts in by listing forward relation paths, select_related
+style, in ``batch_load``:
+
+    class TeamMemberSerializer(BatchLoadMixin, serializers.ModelSerializer):
+        batch_load = ('team__lead_player', 'player')
+
+Before the serializer renders, the Loader walks those paths one level at a
+time over every instance being rendered, collects the missing primary keys
+per model and fetches each batch with one IN query, then fills the
+relations' caches so attribute access no longer hits the database. Rows are
+kept in an identity map for the rest of the request, so a team referenced
+by a hundred matches, or by several serializers, is loaded once; saves and
+deletes evict their row (see signals).
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.manager import BaseManager
+from rest_framework import serializers
+
+# The request's Loader; None outside requests, where each serializer call
+# gets its own.
+_current = ContextVar('loader', default=None)
+
+
+def _tree(paths):
+    tree = {}
+    for path in paths:
+        node = tree
+        for name in path.split('__'):
+            node = node.setdefault(name, {})
+    return tree
+
+
+class Loader:
+    def __init__(self):
+        self.rows = defaultdict(dict)
+
+    def load_many(self, model, ids):
+        """{pk: row} for ``ids``, fetching only the ones not seen yet in one query."""
+        known = self.rows[model]
+        missing = {pk for pk in ids if pk is not None and pk not in known}
+        if missing:
+            for row in model._base_manager.filter(pk__in=missing):
+                known[row.pk] = row
+        return known
+
+    def prime(self, instances, paths):
+        """Fill the forward relations along ``paths`` on every instance; one query per model per level."""
+        level = [(instances, _tree(paths))]
+        while level:
+            steps = []
+            wanted = defaultdict(set)
+            for objs, tree in level:
+                objs = [obj for obj in objs if obj is not None]
+                if not objs:
+                    continue
+                for name, subtree in tree.items():
+                    field = objs[0]._meta.get_field(name)
+                    known = self.rows[field.related_model]
+                    for obj in objs:
+                        if field.is_cached(obj):
+                            related = field.get_cached_value(obj)
+                            if related is not None:
+                                known.setdefault(related.pk, related)
+                        else:
+                            wanted[field.related_model].add(getattr(obj, field.attname))
+                    steps.append((objs, field, subtree))
+            for model, ids in wanted.items():
+                self.load_many(model, ids)
+
+            level = []
+            for objs, field, subtree in steps:
+                known = self.rows[field.related_model]
+                reached = {}
+                for obj in objs:
+                    if not field.is_cached(obj):
+                        pk = getattr(obj, field.attname)
+                        if pk is not None and pk not in known:
+                            continue
+                        field.set_cached_value(obj, known.get(pk))
+                    related = field.get_cached_value(obj)
+                    if related is not None:
+                        reached[id(related)] = related
+                if subtree:
+                    level.append((list(reached.values()), subtree))
+        return instances
+
+    def evict(self, instance):
+        self.rows.get(type(instance), {}).pop(instance.pk, None)
+
+
+def current():
+    return _current.get()
+
+
+def evict(instance):
+    loader = _current.get()
+    if loader is not None:
+        loader.evict(instance)
+
+
+@contextmanager
+def scope():
+    token = _current.set(Loader())
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
+
+
+class LoaderMiddleware:
+    """Gives each request its own Loader."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with scope():
+            return self.get_response(request)
+
+
+def prime(instances, paths):
+    return (current() or Loader()).prime(instances, paths)
+
+
+class BatchListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, BaseManager) else data)
+        prime(items, self.child.batch_load)
+        return super().to_representation(items)
+
+
+class BatchLoadMixin:
+    """Batch-loads the relation paths in ``batch_load`` before rendering."""
+    batch_load = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        meta = getattr(cls, 'Meta', None)
+        if meta is not None and not hasattr(meta, 'list_serializer_class'):
+            meta.list_serializer_class = BatchListSerializer
+
+    def to_representation(self, instance):
+        if not isinstance(self.parent, BatchListSerializer):
+            prime([instance], self.batch_load)
+        return super().to_representation(instance)
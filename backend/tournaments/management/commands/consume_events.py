@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tournaments import outbox
+
+
+class Command(BaseCommand):
+    help = 'Run outbox consumers over the DomainEvent log'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--consumer', action='append', dest='consumers',
+                            help='Consumer name to run (repeatable); defaults to all registered consumers')
+        parser.add_argument('--once', action='store_true', help='Drain the log and exit')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when idle')
+
+    def handle(self, *args, **options):
+        names = options['consumers'] or outbox.consumer_names()
+        unknown = set(names) - set(outbox.consumer_names())
+        if unknown:
+            raise CommandError(f"Unknown consumers: {', '.join(sorted(unknown))}")
+        if not names:
+            raise CommandError('No outbox consumers are registered')
+
+        self.stdout.write(f"Running consumers: {', '.join(names)}")
+        outbox.run([outbox.get_consumer(name) for name in names], once=options['once'], interval=options['interval'])
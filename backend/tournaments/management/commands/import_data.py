@@ -0,0 +1,28 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tournaments import imports
+
+
+class Command(BaseCommand):
+    help = 'Bulk import players, teams, team-members or tournaments from a CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(imports.IMPORTERS))
+        parser.add_argument('path')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only')
+        parser.add_argument('--partial', action='store_true', help='Import valid rows even when others fail')
+
+    def handle(self, *args, **options):
+        fmt = 'ndjson' if options['path'].endswith(('.ndjson', '.jsonl')) else 'csv'
+        importer = imports.IMPORTERS[options['kind']](dry_run=options['dry_run'], partial=options['partial'])
+        with open(options['path'], 'rb') as stream:
+            result = importer.run(imports.read_rows(stream, fmt))
+
+        for error in result.errors:
+            self.stderr.write(f"row {error['row']}: {error['error']}")
+        summary = {key: value for key, value in result.as_dict().items() if key != 'errors'}
+        self.stdout.write(json.dumps(summary))
+        if result.errors and not options['partial']:
+            raise CommandError(f'{len(result.errors)} rows failed validation; nothing was imported')
@@ -0,0 +1,18 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from tournaments import gamelogs
+
+
+class Command(BaseCommand):
+    help = 'Stream game-server log files into match scores and per-player stats'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+')
+        parser.add_argument('--workers', type=int, default=1, help='Files ingested in parallel')
+        parser.add_argument('--batch', type=int, default=gamelogs.FLUSH_MATCHES, help='Matches written per transaction')
+
+    def handle(self, *args, **options):
+        for result in gamelogs.ingest_files(options['paths'], options['workers'], options['batch']):
+            self.stdout.write(json.dumps(result))
@@ -0,0 +1,23 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from tournaments import recompute
+
+
+class Command(BaseCommand):
+    help = "Rebuild every player's points, ratios and tier (and team tiers) from match stats"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Shards recomputed in parallel')
+        parser.add_argument('--shard-size', type=int, default=recompute.SHARD_SIZE, help='Player ids per shard')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint of an interrupted run')
+
+    def handle(self, *args, **options):
+        def progress(done, total):
+            self.stderr.write(f'{done}/{total} shards')
+
+        result = recompute.run(
+            workers=options['workers'], shard_size=options['shard_size'], restart=options['restart'], progress=progress
+        )
+        self.stdout.write(json.dumps(result))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from tournaments import jobs
+
+
+class Command(BaseCommand):
+    help = 'Run a background job worker against the Job table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit when no job is due')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when idle')
+        parser.add_argument('--batch', type=int, default=1, help='Jobs claimed per poll')
+        parser.add_argument('--worker-id', help='Name recorded on claimed jobs')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Registered jobs: {', '.join(jobs.registered_jobs())}")
+        jobs.run_worker(
+            worker_id=options['worker_id'],
+            once=options['once'],
+            interval=options['interval'],
+            batch=options['batch'],
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from tournaments import matchmaking
+
+
+class Command(BaseCommand):
+    help = 'Run the scrim matchmaking loop (MATCHMAKING_BACKEND=redis)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run a single matching pass')
+
+    def handle(self, *args, **options):
+        matchmaking.run_loop(matchmaking.get_queue(), once=options['once'])
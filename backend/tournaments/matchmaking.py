@@ -0,0 +1,300 @@
+"""On-demand scrims: teams queue for an opponent of similar rating.
+
+Waiting tickets sit in buckets keyed by (region, platform, mode), each kept
+sorted by rating. Every tick the oldest tickets look outward from their own
+rating for the nearest opponent inside both teams' skill windows; a window
+starts at MATCHMAKING_BASE_WINDOW and widens the longer a team waits. Pairs
+become TournamentMatch rows in the ladder tournament for their bucket.
+
+One loop owns the buckets. With the memory backend it is a thread in the
+web process, so it only serves a single web worker; with the redis backend
+web processes push commands to a local Redis and the `run_matchmaker`
+command runs the loop.
+"""
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import assignment, outbox
+from .models import Tournament, TournamentMatch
+
+logger = logging.getLogger(__name__)
+
+LADDER_TYPE = 'LADDER'
+
+
+class Ticket:
+    __slots__ = ('team_id', 'region', 'platform', 'mode', 'rating', 'enqueued_at')
+
+    def __init__(self, team_id, region, platform, mode, rating, enqueued_at=None):
+        self.team_id = team_id
+        self.region = region
+        self.platform = platform
+        self.mode = mode
+        self.rating = rating
+        self.enqueued_at = time.time() if enqueued_at is None else enqueued_at
+
+    @property
+    def bucket(self):
+        return (self.region, self.platform, self.mode)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def window_at(now):
+    """Rating gap each ticket accepts at ``now``, as a function of the ticket."""
+    base = getattr(settings, 'MATCHMAKING_BASE_WINDOW', 50)
+    widen = getattr(settings, 'MATCHMAKING_WIDEN_PER_SECOND', 5)
+    cap = getattr(settings, 'MATCHMAKING_MAX_WINDOW', 500)
+    return lambda ticket: min(cap, base + widen * max(0.0, now - ticket.enqueued_at))
+
+
+class Matcher:
+    """Waiting tickets by bucket; not thread safe, the queue serialises access."""
+
+    def __init__(self):
+        self.tickets = {}
+        # bucket -> {team id: ticket}, oldest first; bucket -> sorted [(rating, team id)]
+        self.waiting = defaultdict(dict)
+        self.ratings = defaultdict(list)
+
+    def add(self, ticket):
+        self.remove(ticket.team_id)
+        self.tickets[ticket.team_id] = ticket
+        self.waiting[ticket.bucket][ticket.team_id] = ticket
+        insort(self.ratings[ticket.bucket], (ticket.rating, ticket.team_id))
+
+    def remove(self, team_id):
+        ticket = self.tickets.pop(team_id, None)
+        if ticket is None:
+            return None
+        del self.waiting[ticket.bucket][team_id]
+        entries = self.ratings[ticket.bucket]
+        del entries[bisect_left(entries, (ticket.rating, team_id))]
+        return ticket
+
+    def match(self, now=None):
+        """Pair what can be paired now; returns [(ticket, ticket)] and drops them from the queue."""
+        window = window_at(time.time() if now is None else now)
+        pairs = []
+        for bucket, waiting in self.waiting.items():
+            entries = self.ratings[bucket]
+            taken = set()
+            for ticket in waiting.values():
+                if ticket.team_id in taken:
+                    continue
+                opponent = self._nearest(ticket, entries, taken, window)
+                if opponent is not None:
+                    taken.update((ticket.team_id, opponent.team_id))
+                    pairs.append((ticket, opponent))
+        for pair in pairs:
+            for ticket in pair:
+                self.remove(ticket.team_id)
+        return pairs
+
+    def _nearest(self, ticket, entries, taken, window):
+        limit = window(ticket)
+        position = bisect_left(entries, (ticket.rating, ticket.team_id))
+        below, above = position - 1, position + 1
+        while below >= 0 or above < len(entries):
+            lower = ticket.rating - entries[below][0] if below >= 0 else float('inf')
+            upper = entries[above][0] - ticket.rating if above < len(entries) else float('inf')
+            if min(lower, upper) > limit:
+                return None
+            if lower <= upper:
+                team_id, below = entries[below][1], below - 1
+            else:
+                team_id, above = entries[above][1], above + 1
+            candidate = self.tickets[team_id]
+            if team_id not in taken and abs(candidate.rating - ticket.rating) <= window(candidate):
+                return candidate
+        return None
+
+
+class InProcessQueue:
+    """Tickets live in this process; start() runs the matcher loop in a thread."""
+
+    def __init__(self):
+        self.matcher = Matcher()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def enqueue(self, ticket):
+        with self._lock:
+            self.matcher.add(ticket)
+
+    def cancel(self, team_id):
+        with self._lock:
+            return self.matcher.remove(team_id) is not None
+
+    def status(self, team_id):
+        with self._lock:
+            return self.matcher.tickets.get(team_id)
+
+    def sync(self):
+        pass
+
+    def take_pairs(self, now=None):
+        with self._lock:
+            return self.matcher.match(now)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=run_loop, args=(self,), name='matchmaker', daemon=True)
+            self._thread.start()
+
+
+class RedisQueue(InProcessQueue):
+    """Tickets in a local Redis hash, changes in a command list the matcher loop drains."""
+
+    def __init__(self, url, prefix='lvl:matchmaking:'):
+        super().__init__()
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.tickets_key = prefix + 'tickets'
+        self.commands_key = prefix + 'commands'
+        self._loaded = False
+
+    def enqueue(self, ticket):
+        self.client.pipeline().hset(self.tickets_key, ticket.team_id, json.dumps(ticket.as_dict())).rpush(
+            self.commands_key, f'add:{ticket.team_id}'
+        ).execute()
+
+    def cancel(self, team_id):
+        removed, _ = self.client.pipeline().hdel(self.tickets_key, team_id).rpush(
+            self.commands_key, f'remove:{team_id}'
+        ).execute()
+        return bool(removed)
+
+    def status(self, team_id):
+        raw = self.client.hget(self.tickets_key, team_id)
+        return Ticket(**json.loads(raw)) if raw else None
+
+    def sync(self):
+        if not self._loaded:
+            # A restarted matcher rebuilds its buckets from the hash.
+            self.client.delete(self.commands_key)
+            for raw in self.client.hvals(self.tickets_key):
+                self.matcher.add(Ticket(**json.loads(raw)))
+            self._loaded = True
+        while True:
+            commands = self.client.lpop(self.commands_key, 1000)
+            if not commands:
+                return
+            for command in commands:
+                action, _, team_id = command.decode().partition(':')
+                team_id = int(team_id)
+                self.matcher.remove(team_id)
+                if action == 'add':
+                    raw = self.client.hget(self.tickets_key, team_id)
+                    if raw:
+                        self.matcher.add(Ticket(**json.loads(raw)))
+
+    def take_pairs(self, now=None):
+        pairs = self.matcher.match(now)
+        if pairs:
+            self.client.hdel(self.tickets_key, *[ticket.team_id for pair in pairs for ticket in pair])
+        return pairs
+
+    def start(self):
+        pass  # run by the run_matchmaker command
+
+
+def team_rating(team_id):
+    players = assignment.roster([team_id])[team_id]
+    if not players:
+        return None
+    return round(sum(assignment.strength(player) for player in players) / len(players))
+
+
+def ladder(region, platform, mode):
+    tournament, _ = Tournament.objects.get_or_create(
+        tournament_type=LADDER_TYPE, region=region, platform=platform, mode=mode,
+        defaults={
+            'title': f'{region} {platform} {mode} ladder', 'max_players': 0, 'level': 'BRONZE',
+            'start_date': timezone.now(), 'language': 'English', 'is_active': False, 'is_started': True,
+        },
+    )
+    return tournament
+
+
+@transaction.atomic
+def create_matches(pairs):
+    """One ladder TournamentMatch per pair, numbered after the ladder's existing matches."""
+    by_bucket = defaultdict(list)
+    for pair in pairs:
+        by_bucket[pair[0].bucket].append(pair)
+    now = timezone.now()
+    matches = []
+    for (region, platform, mode), bucket_pairs in by_bucket.items():
+        tournament = Tournament.objects.select_for_update().get(pk=ladder(region, platform, mode).pk)
+        last = tournament.matches.aggregate(last=Max('match_number'))['last'] or 0
+        matches.extend(
+            TournamentMatch(
+                tournament=tournament, round_number=1, match_number=last + number, mode=mode,
+                team1_id=first.team_id, team2_id=second.team_id, scheduled_time=now,
+            )
+            for number, (first, second) in enumerate(bucket_pairs, start=1)
+        )
+    matches = TournamentMatch.objects.bulk_create(matches)
+    outbox.record_bulk(matches, 'created')
+    return matches
+
+
+def run_loop(queue, once=False):
+    interval = getattr(settings, 'MATCHMAKING_INTERVAL_SECONDS', 1.0)
+    while True:
+        try:
+            close_old_connections()
+            queue.sync()
+            pairs = queue.take_pairs()
+            if pairs:
+                try:
+                    create_matches(pairs)
+                except Exception:
+                    # Put the teams back with their original queue times.
+                    for ticket in (ticket for pair in pairs for ticket in pair):
+                        queue.enqueue(ticket)
+                    raise
+        except Exception:
+            if once:
+                raise
+            logger.exception('Matchmaking tick failed')
+        if once:
+            return
+        time.sleep(interval)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                if getattr(settings, 'MATCHMAKING_BACKEND', 'memory') == 'redis':
+                    _queue = RedisQueue(settings.MATCHMAKING_REDIS_URL)
+                elif getattr(settings, 'WEB_CONCURRENCY', 1) > 1:
+                    # Each worker would have its own queue and never see the others' teams.
+                    raise ImproperlyConfigured('MATCHMAKING_BACKEND must be "redis" when WEB_CONCURRENCY > 1')
+                else:
+                    _queue = InProcessQueue()
+    return _queue
+
+
+def start():
+    """Called by the WSGI/ASGI entry points so the memory backend has a matcher loop."""
+    get_queue().start()
@@ -0,0 +1,97 @@
+"""Which teams a user belongs to, and in what role.
+
+A user's memberships are one small {team id: role} map, loaded with a
+single query over the TeamMember (player) and Team (lead_player) indexes and
+memoised on the request, so permission checks and "my teams" need no queries
+of their own. The team a user leads has the role LEAD whatever their
+TeamMember row says.
+
+When MEMBERSHIP_CACHE_SECONDS is set (settings only does so with a cache
+shared by every process) the map is also kept in the Django cache. Writes to
+Team and TeamMember drop the affected users' entries (see signals); bulk
+writes call ``invalidate`` themselves.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Value
+
+from .models import Team, TeamMember
+
+LEAD = 'LEAD'
+MANAGERS = (LEAD, 'CAPTAIN', 'CO_LEAD')
+
+
+class Membership:
+    def __init__(self, roles):
+        self.roles = roles
+
+    @property
+    def team_ids(self):
+        return set(self.roles)
+
+    def role(self, team_id):
+        return self.roles.get(_team_id(team_id))
+
+    def is_member(self, team_id):
+        return self.role(team_id) is not None
+
+    def leads(self, team_id):
+        return self.role(team_id) == LEAD
+
+    def manages(self, team_id):
+        return self.role(team_id) in MANAGERS
+
+    def managed_team_ids(self):
+        return {team_id for team_id, role in self.roles.items() if role in MANAGERS}
+
+
+def _team_id(team_id):
+    try:
+        return int(team_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def _key(user_id):
+    return f'membership:{user_id}'
+
+
+def load(user_id):
+    rows = TeamMember.objects.filter(player_id=user_id).values_list('team_id', 'role').union(
+        Team.objects.filter(lead_player_id=user_id).annotate(role=Value(LEAD)).values_list('id', 'role'),
+        all=True,
+    )
+    roles = {}
+    for team_id, role in rows:
+        if roles.get(team_id) != LEAD:
+            roles[team_id] = role
+    return roles
+
+
+def for_user(user_id):
+    timeout = getattr(settings, 'MEMBERSHIP_CACHE_SECONDS', 0)
+    if not timeout:
+        return Membership(load(user_id))
+    roles = cache.get(_key(user_id))
+    if roles is None:
+        roles = load(user_id)
+        cache.set(_key(user_id), roles, timeout)
+    return Membership(roles)
+
+
+def for_request(request):
+    """The requesting user's Membership, loaded at most once per request."""
+    membership = getattr(request, '_membership', None)
+    if membership is None:
+        membership = request._membership = for_user(request.user.id)
+    return membership
+
+
+def invalidate(user_ids):
+    """Drop cached memberships now and again on commit, so a read racing the
+    transaction cannot leave the old value behind."""
+    keys = [_key(user_id) for user_id in set(user_ids) if user_id is not None]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,267 @@
+import functools
+import hmac
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import ExitStack
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+PHASES = ('auth', 'perm', 'db', 'ser', 'render', 'total')
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_timings', default=None)
+
+# Histogram files are named <pid>-<token>.json: the token keeps a recycled pid
+# from overwriting a dead worker's file, and the pid lets collect() remove
+# files of workers that have exited.
+_file_token = uuid.uuid4().hex[:12]
+
+
+class Timings:
+    __slots__ = ('phases', 'active')
+
+    def __init__(self):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.active = set()
+
+    def add(self, phase, seconds):
+        self.phases[phase] += seconds
+
+
+def timed(phase, func):
+    """Attribute the wrapped call's wall time to ``phase`` of the current request.
+
+    Re-entrant calls (nested serializers, permission checks calling each other)
+    are only counted once.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        timings = _current.get()
+        if timings is None or phase in timings.active:
+            return func(*args, **kwargs)
+        timings.active.add(phase)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timings.add(phase, time.perf_counter() - start)
+            timings.active.discard(phase)
+    wrapper.__timed__ = True
+    return wrapper
+
+
+def _wrap_method(cls, name, phase):
+    func = getattr(cls, name)
+    if not getattr(func, '__timed__', False):
+        setattr(cls, name, timed(phase, func))
+
+
+def _wrap_property(cls, name, phase):
+    prop = cls.__dict__[name]
+    if not getattr(prop.fget, '__timed__', False):
+        setattr(cls, name, property(timed(phase, prop.fget), prop.fset, prop.fdel, prop.__doc__))
+
+
+def install():
+    """Hook DRF's authentication, permission, serializer and render steps. Called from AppConfig.ready()."""
+    from rest_framework.response import Response
+    from rest_framework.serializers import ListSerializer, Serializer
+    from rest_framework.views import APIView
+
+    _wrap_method(APIView, 'perform_authentication', 'auth')
+    _wrap_method(APIView, 'check_permissions', 'perm')
+    _wrap_method(APIView, 'check_object_permissions', 'perm')
+    _wrap_property(Serializer, 'data', 'ser')
+    _wrap_property(ListSerializer, 'data', 'ser')
+    _wrap_property(Response, 'rendered_content', 'render')
+
+
+class DatabaseTimer:
+    def __init__(self, timings):
+        self.timings = timings
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.timings.add('db', time.perf_counter() - start)
+
+
+class HistogramRegistry:
+    """Per-process latency histograms, periodically written to METRICS_DIR so the
+    metrics endpoint of any worker can report totals for all of them."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.series = {}
+        self.last_flush = 0.0
+
+    def observe(self, view, phases):
+        with self.lock:
+            for phase, seconds in phases.items():
+                series = self.series.get((view, phase))
+                if series is None:
+                    series = self.series[view, phase] = {'buckets': [0] * (len(BUCKETS_MS) + 1), 'sum': 0.0}
+                ms = seconds * 1000
+                for index, bound in enumerate(BUCKETS_MS):
+                    if ms <= bound:
+                        break
+                else:
+                    index = len(BUCKETS_MS)
+                series['buckets'][index] += 1
+                series['sum'] += seconds
+        self.flush(force=False)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                f'{view}\t{phase}': {'buckets': list(series['buckets']), 'sum': series['sum']}
+                for (view, phase), series in self.series.items()
+            }
+
+    def flush(self, force=True):
+        """Write this process's histograms to its file; errors are logged, never raised,
+        so metrics cannot fail a request."""
+        now = time.monotonic()
+        with self.lock:
+            if not force and now - self.last_flush < getattr(settings, 'METRICS_FLUSH_SECONDS', 5):
+                return
+            self.last_flush = now
+        directory = metrics_dir()
+        temporary = None
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile('w', dir=directory, suffix='.tmp', delete=False) as handle:
+                temporary = handle.name
+                handle.write(json.dumps(self.snapshot()))
+            os.replace(temporary, directory / own_file_name())
+        except OSError:
+            logger.exception('Could not write metrics to %s', directory)
+            if temporary is not None:
+                Path(temporary).unlink(missing_ok=True)
+
+
+registry = HistogramRegistry()
+
+
+def metrics_dir():
+    return Path(getattr(settings, 'METRICS_DIR', Path(tempfile.gettempdir()) / 'lvl-metrics'))
+
+
+def own_file_name():
+    return f'{os.getpid()}-{_file_token}.json'
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect():
+    """Merge this process's live histograms with the files written by the others,
+    deleting the files of workers that have exited."""
+    merged = registry.snapshot()
+    own = own_file_name()
+    for path in metrics_dir().glob('*.json'):
+        if path.name == own:
+            continue
+        pid = path.stem.split('-')[0]
+        if not pid.isdigit() or not _alive(int(pid)):
+            path.unlink(missing_ok=True)
+            continue
+        try:
+            snapshot = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        for key, series in snapshot.items():
+            target = merged.setdefault(key, {'buckets': [0] * (len(BUCKETS_MS) + 1), 'sum': 0.0})
+            target['buckets'] = [a + b for a, b in zip(target['buckets'], series['buckets'])]
+            target['sum'] += series['sum']
+    return merged
+
+
+def render_text(merged):
+    lines = [
+        '# HELP lvl_request_phase_seconds Request latency by URL name and phase.',
+        '# TYPE lvl_request_phase_seconds histogram',
+    ]
+    for key in sorted(merged):
+        view, phase = key.split('\t')
+        series = merged[key]
+        labels = f'view="{view}",phase="{phase}"'
+        cumulative = 0
+        for bound, count in zip(BUCKETS_MS + ('+Inf',), series['buckets']):
+            cumulative += count
+            le = bound if bound == '+Inf' else bound / 1000
+            lines.append(f'lvl_request_phase_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f'lvl_request_phase_seconds_sum{{{labels}}} {series["sum"]:.6f}')
+        lines.append(f'lvl_request_phase_seconds_count{{{labels}}} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+class ServerTimingMiddleware:
+    """Adds a Server-Timing header (auth, perm, db, ser, render, total) and records
+    the same phases in per-URL-name histograms. `ser` includes the queries a
+    serializer triggers, so phases can overlap."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = Timings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(DatabaseTimer(timings)))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        timings.phases['total'] = time.perf_counter() - start
+
+        response['Server-Timing'] = ', '.join(
+            f'{phase};dur={seconds * 1000:.2f}' for phase, seconds in timings.phases.items()
+        )
+        match = getattr(request, 'resolver_match', None)
+        registry.observe(match.url_name if match and match.url_name else 'unmatched', timings.phases)
+        return response
+
+
+def _authorized(request):
+    """METRICS_TOKEN as a bearer token (for scrapers), or an admin's access token."""
+    header = request.headers.get('Authorization', '')
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()):
+        return True
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except (InvalidToken, AuthenticationFailed):
+        return False
+    return authenticated is not None and authenticated[0].is_admin
+
+
+def metrics_view(request):
+    """Text exposition of the latency histograms, for the scraper."""
+    if not _authorized(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render_text(collect()), content_type='text/plain; version=0.0.4')
@@ -1,5 +1,6 @@
 from django.utils import timezone
 from .models import Player
+from .realtime import publish_on_commit
 from django.conf import settings
 
 class OnlineStatusMiddleware:
@@ -31,4 +32,8 @@ class OnlineStatusMiddleware:
         is_now_online = user.last_activity >= threshold
         
         if was_online != is_now_online:
-            Player.objects.filter(pk=user.pk).update(is_online=is_now_online)
\ No newline at end of file
+            Player.objects.filter(pk=user.pk).update(is_online=is_now_online)
+            publish_on_commit('presence', 'presence.changed', {
+                'player_id': user.pk,
+                'is_online': is_now_online,
+            })
\ No newline at end of file
@@ -0,0 +1,186 @@
+# Generated by Django 5.2.3 on 2026-10-19 07:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0010_alter_team_join_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='News',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+                ('image', models.URLField()),
+                ('date', models.DateField(auto_now_add=True)),
+                ('more_link', models.URLField()),
+            ],
+            options={
+                'db_table': 'news',
+            },
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='country_code',
+            field=models.CharField(blank=True, max_length=2, null=True),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='discord_id',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='is_team_captain',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='kill_death_ratio',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='points',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='preferred_roles',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='rank',
+            field=models.CharField(choices=[('RECRUIT', 'Recruit'), ('PRIVATE', 'Private'), ('CORPORAL', 'Corporal'), ('SERGEANT', 'Sergeant'), ('STAFF_SERGEANT', 'Staff Sergeant'), ('SERGEANT_MAJOR', 'Sergeant Major'), ('LIEUTENANT', 'Lieutenant'), ('CAPTAIN', 'Captain'), ('MAJOR', 'Major'), ('COLONEL', 'Colonel'), ('GENERAL', 'General')], default='Private', max_length=30),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='skill_rating',
+            field=models.IntegerField(default=1000),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='tier',
+            field=models.CharField(choices=[('BRONZE', 'Bronze'), ('SILVER', 'Silver'), ('GOLD', 'Gold'), ('PLATINUM', 'Platinum'), ('DIAMOND', 'Diamond')], default='BRONZE', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='win_rate',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='team',
+            name='tier',
+            field=models.CharField(choices=[('BRONZE', 'Bronze'), ('SILVER', 'Silver'), ('GOLD', 'Gold'), ('PLATINUM', 'Platinum'), ('DIAMOND', 'Diamond')], default='BRONZE', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='teammember',
+            name='role',
+            field=models.CharField(choices=[('MEMBER', 'Member'), ('CO_LEAD', 'Co-Lead'), ('CAPTAIN', 'Captain')], default='MEMBER', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='bracket_type',
+            field=models.CharField(choices=[('SINGLE_ELIM', 'Single Elimination'), ('DOUBLE_ELIM', 'Double Elimination'), ('SWISS', 'Swiss'), ('ROUND_ROBIN', 'Round Robin')], default='SINGLE_ELIM', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='current_round',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='is_completed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='is_started',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='tournamentmatch',
+            name='mode',
+            field=models.CharField(blank=True, choices=[('16v16', '16v16'), ('32v32', '32v32'), ('64v64', '64v64')], max_length=30),
+        ),
+        migrations.AddField(
+            model_name='tournamentmatch',
+            name='team1_score',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tournamentmatch',
+            name='team2_score',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='join_code',
+            field=models.CharField(default='93FE064866', max_length=10, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='lead_player',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='led_team', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='tournament',
+            name='level',
+            field=models.CharField(choices=[('BRONZE', 'Bronze'), ('SILVER', 'Silver'), ('GOLD', 'Gold'), ('PLATINUM', 'Platinum'), ('DIAMOND', 'Diamond')], max_length=15),
+        ),
+        migrations.AlterField(
+            model_name='tournament',
+            name='mode',
+            field=models.CharField(choices=[('16v16', '16v16'), ('32v32', '32v32'), ('64v64', '64v64')], max_length=10),
+        ),
+        migrations.AlterModelTable(
+            name='socialaccount',
+            table='social_account',
+        ),
+        migrations.CreateModel(
+            name='Squad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('squad_type', models.CharField(choices=[('ALPHA', 'Alpha'), ('BRAVO', 'Bravo'), ('CHARLIE', 'Charlie'), ('DELTA', 'Delta'), ('ECHO', 'Echo'), ('FOXTROT', 'Foxtrot'), ('GOLF', 'Golf'), ('HOTEL', 'Hotel'), ('INDIA', 'India'), ('JULIET', 'Juliet')], max_length=15)),
+                ('participant', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='squads', to='tournaments.tournamentparticipant')),
+            ],
+            options={
+                'verbose_name': 'Squad',
+                'verbose_name_plural': 'Squads',
+                'unique_together': {('participant', 'squad_type')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SquadMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('CAPTAIN', 'Team Captain'), ('LEADER', 'Squad Leader'), ('NONE', 'No Role')], default='NONE', max_length=10)),
+                ('action_role', models.CharField(choices=[('INFANTRY', 'Infantry'), ('ARMOR', 'Armor'), ('HELI', 'Heli'), ('JET', 'Jet')], default='INFANTRY', max_length=10)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='squad_memberships', to=settings.AUTH_USER_MODEL)),
+                ('squad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='members', to='tournaments.squad')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('role', 'CAPTAIN')), fields=('squad',), name='unique_captain_per_squad'), models.UniqueConstraint(condition=models.Q(('role', 'LEADER')), fields=('squad',), name='unique_leader_per_squad')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TournamentTeam',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('color', models.CharField(choices=[('RED', 'Red'), ('BLUE', 'Blue')], max_length=10)),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tournaments.team')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tournament_teams', to='tournaments.tournament')),
+            ],
+            options={
+                'unique_together': {('tournament', 'color')},
+            },
+        ),
+    ]
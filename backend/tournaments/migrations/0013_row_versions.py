@@ -0,0 +1,72 @@
+# Generated by Django 5.2.3 on 2026-10-19 07:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0012_domain_event_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='squad',
+            name='row_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='squad',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='squadmember',
+            name='row_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='squadmember',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='row_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='tournamentmatch',
+            name='row_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='tournamentmatch',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='tournamentparticipant',
+            name='row_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='tournamentparticipant',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='join_code',
+            field=models.CharField(default='D263618467', max_length=10, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='domainevent',
+            index=models.Index(fields=['tournament_id', 'id'], name='domainevent_tournament_id'),
+        ),
+    ]
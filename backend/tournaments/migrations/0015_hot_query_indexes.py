@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-19 08:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('tournaments', '0014_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='team',
+            name='join_code',
+            field=models.CharField(default='E6D38ED482', max_length=10, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['last_activity'], name='player_last_activity'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['start_date'], name='tournament_active_start'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['level', 'start_date'], name='tournament_active_level_start'),
+        ),
+        migrations.AddIndex(
+            model_name='tournamentmatch',
+            index=models.Index(fields=['-scheduled_time'], name='match_scheduled_time'),
+        ),
+        migrations.AddIndex(
+            model_name='tournamentparticipant',
+            index=models.Index(fields=['team', '-registered_at'], name='participant_team_registered'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-19 08:12
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0015_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TournamentDetailProjection',
+            fields=[
+                ('tournament', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='detail_projection', serialize=False, to='tournaments.tournament')),
+                ('header', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('teams', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='join_code',
+            field=models.CharField(default='0A1D5CEB24', max_length=10, unique=True),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.3 on 2026-10-19 08:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0016_tournament_detail_projection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='matches_played',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='matches_won',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='total_assists',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='total_deaths',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='total_kills',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='join_code',
+            field=models.CharField(default='6A81863E97', max_length=10, unique=True),
+        ),
+        migrations.CreateModel(
+            name='PlayerMatchStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kills', models.IntegerField(default=0)),
+                ('deaths', models.IntegerField(default=0)),
+                ('assists', models.IntegerField(default=0)),
+                ('score', models.IntegerField(default=0)),
+                ('vehicles_destroyed', models.IntegerField(default=0)),
+                ('objectives_captured', models.IntegerField(default=0)),
+                ('revives', models.IntegerField(default=0)),
+                ('match_time', models.IntegerField(default=0)),
+                ('won', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player_stats', to='tournaments.tournamentmatch')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_stats', to=settings.AUTH_USER_MODEL)),
+                ('team', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='player_match_stats', to='tournaments.team')),
+            ],
+            options={
+                'unique_together': {('match', 'player')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-19 08:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0017_player_match_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournamentmatch',
+            name='server_slot',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='team',
+            name='join_code',
+            field=models.CharField(default='A91D8F2B27', max_length=10, unique=True),
+        ),
+    ]
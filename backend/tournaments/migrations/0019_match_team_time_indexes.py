@@ -0,0 +1,26 @@
+# Generated by Django 5.2.3 on 2026-10-19 08:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0018_match_server_slot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='team',
+            name='join_code',
+            field=models.CharField(default='63D12ED720', max_length=10, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='tournamentmatch',
+            index=models.Index(fields=['team1', 'scheduled_time'], name='match_team1_time'),
+        ),
+        migrations.AddIndex(
+            model_name='tournamentmatch',
+            index=models.Index(fields=['team2', 'scheduled_time'], name='match_team2_time'),
+        ),
+    ]
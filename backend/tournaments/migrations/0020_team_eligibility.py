@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-19 08:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0019_match_team_time_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='team',
+            name='join_code',
+            field=models.CharField(default='7DB59BB177', max_length=10, unique=True),
+        ),
+        migrations.CreateModel(
+            name='TeamEligibility',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateTimeField()),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eligible_tournaments', to='tournaments.team')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eligible_teams', to='tournaments.tournament')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['team', 'start_date'], name='eligibility_team_start')],
+                'unique_together': {('team', 'tournament')},
+            },
+        ),
+    ]
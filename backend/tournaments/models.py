@@ -1,8 +1,38 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.contrib.auth.models import AbstractUser, Group, Permission
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 import uuid
 import json
 
+class OutboxModel(models.Model):
+    """Saves run inside a transaction so the DomainEvent written by the
+    post_save receiver commits or rolls back together with the row."""
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(self.__class__, instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+class VersionedModel(OutboxModel):
+    """Rows served by the tournament change feed; row_version counts saves of the row."""
+    updated_at = models.DateTimeField(auto_now=True)
+    row_version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.row_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'row_version', 'updated_at'}
+        super().save(*args, **kwargs)
+
 class Player(AbstractUser):
     TIER_CHOICES = [
         ('BRONZE', 'Bronze'),
@@ -44,8 +74,19 @@ class Player(AbstractUser):
     win_rate = models.FloatField(default=0.0) 
     rank = models.CharField(max_length=30, choices=RANK_CHOICES, default='Private')
 
+    # Career running sums, maintained by stats.ingest_match_stats; the ratios
+    # above are derived from them in the same UPDATE.
+    total_kills = models.IntegerField(default=0)
+    total_deaths = models.IntegerField(default=0)
+    total_assists = models.IntegerField(default=0)
+    matches_played = models.IntegerField(default=0)
+    matches_won = models.IntegerField(default=0)
+
     class Meta:
         db_table = 'tournaments_player'
+        indexes = [
+            models.Index(fields=['last_activity'], name='player_last_activity'),
+        ]
 
     groups = models.ManyToManyField(
         Group,
@@ -97,7 +138,7 @@ class Team(models.Model):
     def __str__(self):
         return self.name
 
-class TeamMember(models.Model):
+class TeamMember(OutboxModel):
     ROLE_CHOICES = [
         ('MEMBER', 'Member'),
         ('CO_LEAD', 'Co-Lead'),
@@ -114,7 +155,7 @@ class TeamMember(models.Model):
     def __str__(self):
         return f"{self.player.email} in {self.team.name}"
 
-class Tournament(models.Model):
+class Tournament(VersionedModel):
     BRACKET_TYPES = [
         ('SINGLE_ELIM', 'Single Elimination'),
         ('DOUBLE_ELIM', 'Double Elimination'),
@@ -181,6 +222,13 @@ class Tournament(models.Model):
     is_completed = models.BooleanField(default=False)
     current_round = models.IntegerField(default=0)
 
+    class Meta:
+        # Listings only ever look at active tournaments, so index just those.
+        indexes = [
+            models.Index(fields=['start_date'], condition=models.Q(is_active=True), name='tournament_active_start'),
+            models.Index(fields=['level', 'start_date'], condition=models.Q(is_active=True), name='tournament_active_level_start'),
+        ]
+
     def generate_bracket(self):
         if self.bracket_type == 'SWISS':
             return self._generate_swiss_bracket()
@@ -219,18 +267,21 @@ class Tournament(models.Model):
     def __str__(self):
         return self.title
 
-class TournamentParticipant(models.Model):
+class TournamentParticipant(VersionedModel):
     team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='tournaments')
     tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name='participants')
     registered_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         unique_together = ('team', 'tournament')
+        indexes = [
+            models.Index(fields=['team', '-registered_at'], name='participant_team_registered'),
+        ]
     
     def __str__(self):
         return f"{self.team.name} in {self.tournament.title}"
 
-class TournamentMatch(models.Model):
+class TournamentMatch(VersionedModel):
     tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name='matches')
     round_number = models.IntegerField()
     match_number = models.IntegerField()
@@ -245,9 +296,17 @@ class TournamentMatch(models.Model):
 
     is_completed = models.BooleanField(default=False)
     scheduled_time = models.DateTimeField(null=True, blank=True)
+    # Game server the match is planned on, 0-based; set by scheduling.schedule.
+    server_slot = models.PositiveSmallIntegerField(null=True, blank=True)
 
     class Meta:
         unique_together = ('tournament', 'round_number', 'match_number')
+        indexes = [
+            models.Index(fields=['-scheduled_time'], name='match_scheduled_time'),
+            # Range lookups for conflicts.py: a team's matches near a time.
+            models.Index(fields=['team1', 'scheduled_time'], name='match_team1_time'),
+            models.Index(fields=['team2', 'scheduled_time'], name='match_team2_time'),
+        ]
 
     def __str__(self):
         return f"Match {self.match_number} (Round {self.round_number}) in {self.tournament.title}"
@@ -319,7 +378,7 @@ class SquadType(models.TextChoices):
     INDIA = 'INDIA', 'India'
     JULIET = 'JULIET', 'Juliet'
 
-class Squad(models.Model):
+class Squad(VersionedModel):
     participant = models.ForeignKey(
         'TournamentParticipant',
         on_delete=models.CASCADE,
@@ -339,7 +398,7 @@ class Squad(models.Model):
     def __str__(self):
         return f"{self.participant.team.name} - {self.squad_type} Squad in {self.participant.tournament.title}"
 
-class SquadMember(models.Model):
+class SquadMember(VersionedModel):
     ROLE_CHOICES = [
         ('CAPTAIN', 'Team Captain'),
         ('LEADER', 'Squad Leader'),
@@ -365,4 +424,119 @@ class SquadMember(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.player.email} in {self.squad} - {self.role}"
\ No newline at end of file
+        return f"{self.player.email} in {self.squad} - {self.role}"
+
+class PlayerMatchStats(models.Model):
+    match = models.ForeignKey(TournamentMatch, on_delete=models.CASCADE, related_name='player_stats')
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='match_stats')
+    team = models.ForeignKey(Team, on_delete=models.SET_NULL, null=True, blank=True, related_name='player_match_stats')
+    kills = models.IntegerField(default=0)
+    deaths = models.IntegerField(default=0)
+    assists = models.IntegerField(default=0)
+    score = models.IntegerField(default=0)
+    vehicles_destroyed = models.IntegerField(default=0)
+    objectives_captured = models.IntegerField(default=0)
+    revives = models.IntegerField(default=0)
+    match_time = models.IntegerField(default=0)
+    won = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('match', 'player')
+
+    def __str__(self):
+        return f"{self.player_id} in match {self.match_id}"
+
+class TournamentDetailProjection(models.Model):
+    """TournamentDetailSerializer output, kept current by the tournament_detail outbox consumer.
+
+    ``teams`` maps participant id to that participant's rendered entry so a
+    roster change only re-renders one participant.
+    """
+    tournament = models.OneToOneField(Tournament, on_delete=models.CASCADE, primary_key=True, related_name='detail_projection')
+    header = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    teams = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def as_document(self):
+        return {**self.header, 'teams': [self.teams[key] for key in sorted(self.teams, key=int)]}
+
+    def __str__(self):
+        return f"Detail of tournament #{self.tournament_id}"
+
+class TeamEligibility(models.Model):
+    """An upcoming tournament ``team`` can still enter, kept by eligibility.py.
+
+    start_date is copied from the tournament so a team's feed is one range
+    read on (team, start_date).
+    """
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='eligible_tournaments')
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name='eligible_teams')
+    start_date = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('team', 'tournament')
+        indexes = [
+            models.Index(fields=['team', 'start_date'], name='eligibility_team_start'),
+        ]
+
+    def __str__(self):
+        return f"Team #{self.team_id} can enter tournament #{self.tournament_id}"
+
+class DomainEvent(models.Model):
+    """Append-only log of domain writes, read in order by outbox consumers."""
+    topic = models.CharField(max_length=50)
+    event_type = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    tournament_id = models.BigIntegerField(null=True, blank=True)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['topic', 'id'], name='domainevent_topic_id'),
+            models.Index(fields=['tournament_id', 'id'], name='domainevent_tournament_id'),
+        ]
+
+    def __str__(self):
+        return f"{self.topic}.{self.event_type} #{self.object_id}"
+
+class Checkpoint(models.Model):
+    """Last processed position of a named consumer or resumable job."""
+    name = models.CharField(max_length=100, unique=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
+
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('SUCCEEDED', 'Succeeded'),
+        ('FAILED', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='QUEUED')
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(Player, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
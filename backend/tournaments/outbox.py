@@ -0,0 +1,150 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import router, transaction
+from django.utils import timezone
+
+from .models import (
+    Checkpoint, DomainEvent, Squad, SquadMember, TeamMember, Tournament, TournamentMatch, TournamentParticipant
+)
+
+TOPICS = {
+    Tournament: 'tournament',
+    Squad: 'squad',
+    TournamentMatch: 'tournament_match',
+    TournamentParticipant: 'tournament_participant',
+    TeamMember: 'team_member',
+    SquadMember: 'squad_member',
+}
+
+
+def _payload(instance):
+    return {field.attname: getattr(instance, field.attname) for field in instance._meta.concrete_fields}
+
+
+def _tournament_ids(instances):
+    """Map (model, pk) -> tournament id, resolving squads and their members with one query each."""
+    result = {}
+    participant_ids = set()
+    squad_ids = set()
+    for instance in instances:
+        if isinstance(instance, Tournament):
+            result[Tournament, instance.pk] = instance.pk
+        elif hasattr(instance, 'tournament_id'):
+            result[type(instance), instance.pk] = instance.tournament_id
+        elif isinstance(instance, Squad):
+            participant_ids.add(instance.participant_id)
+        elif isinstance(instance, SquadMember):
+            squad_ids.add(instance.squad_id)
+    if participant_ids:
+        participant_tournaments = dict(
+            TournamentParticipant.objects.filter(id__in=participant_ids).values_list('id', 'tournament_id')
+        )
+    if squad_ids:
+        squad_tournaments = dict(
+            Squad.objects.filter(id__in=squad_ids).values_list('id', 'participant__tournament_id')
+        )
+    for instance in instances:
+        if isinstance(instance, Squad):
+            result[Squad, instance.pk] = participant_tournaments.get(instance.participant_id)
+        elif isinstance(instance, SquadMember):
+            result[SquadMember, instance.pk] = squad_tournaments.get(instance.squad_id)
+    return result
+
+
+def build_events(instances, event_type):
+    instances = [i for i in instances if type(i) in TOPICS]
+    tournament_ids = _tournament_ids(instances)
+    return [
+        DomainEvent(
+            topic=TOPICS[type(instance)],
+            event_type=event_type,
+            object_id=instance.pk,
+            tournament_id=tournament_ids.get((type(instance), instance.pk)),
+            payload=_payload(instance),
+        )
+        for instance in instances
+    ]
+
+
+def record(instance, event_type, using=None):
+    record_bulk([instance], event_type, using=using)
+
+
+def record_bulk(instances, event_type, using=None):
+    """Append events for rows written with bulk_create/bulk_update/update, which bypass signals.
+
+    Call it inside the same transaction as the write.
+    """
+    events = build_events(instances, event_type)
+    if events:
+        using = using or router.db_for_write(DomainEvent)
+        DomainEvent.objects.using(using).bulk_create(events, batch_size=1000)
+    return events
+
+
+class Consumer:
+    """Processes DomainEvents in id order, at least once.
+
+    handle() runs in the same transaction that advances the checkpoint, so
+    database side effects are applied exactly once; anything external must be
+    idempotent because a crash before commit replays the batch.
+    """
+    name = None
+    topics = ()
+    batch_size = 200
+
+    def handle(self, events):
+        raise NotImplementedError
+
+
+_consumers = {}
+
+
+def register(consumer_class):
+    _consumers[consumer_class.name] = consumer_class
+    return consumer_class
+
+
+def get_consumer(name):
+    return _consumers[name]()
+
+
+def consumer_names():
+    return sorted(_consumers)
+
+
+def consume_batch(consumer):
+    """Process one batch for ``consumer``; returns the number of events handled."""
+    # Ids are allocated before commit, so a slow transaction can commit a lower
+    # id after a faster one. Only reading events older than the settle window
+    # keeps the checkpoint from skipping over them.
+    settled = timezone.now() - timedelta(seconds=getattr(settings, 'OUTBOX_SETTLE_SECONDS', 2))
+    using = router.db_for_write(Checkpoint)
+    with transaction.atomic(using=using):
+        checkpoint, _ = Checkpoint.objects.using(using).select_for_update().get_or_create(
+            name=f"consumer:{consumer.name}"
+        )
+        events = DomainEvent.objects.using(using).filter(
+            id__gt=checkpoint.position,
+            created_at__lte=settled,
+        )
+        if consumer.topics:
+            events = events.filter(topic__in=consumer.topics)
+        events = list(events.order_by('id')[:consumer.batch_size])
+        if not events:
+            return 0
+        consumer.handle(events)
+        checkpoint.position = events[-1].id
+        checkpoint.save(update_fields=['position', 'updated_at'])
+    return len(events)
+
+
+def run(consumers, once=False, interval=1.0):
+    while True:
+        handled = sum(consume_batch(consumer) for consumer in consumers)
+        if once and not handled:
+            return
+        if not handled:
+            time.sleep(interval)
@@ -0,0 +1,151 @@
+import cProfile
+import io
+import json
+import pstats
+import random
+import re
+import time
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+def profile_dir():
+    return Path(getattr(settings, 'PROFILING_DIR', settings.BASE_DIR / 'profiles'))
+
+
+class SqlTrace:
+    def __init__(self, alias, limit):
+        self.alias = alias
+        self.limit = limit
+        self.queries = []
+        self.count = 0
+        self.total = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.total += duration
+            if len(self.queries) < self.limit:
+                self.queries.append({'sql': sql, 'ms': round(duration * 1000, 3), 'many': many})
+
+
+class ProfilingMiddleware:
+    """Profiles requests sent by an admin with an `X-Profile: 1` header, plus a
+    PROFILING_SAMPLE_RATE fraction of all requests. Every other request only
+    pays for one header lookup."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+
+    def __call__(self, request):
+        if PROFILE_HEADER in request.META:
+            if self.is_admin(request):
+                return self.profile(request, 'header')
+        elif self.sample_rate and random.random() < self.sample_rate:
+            return self.profile(request, 'sampled')
+        return self.get_response(request)
+
+    def is_admin(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user.is_admin
+        from rest_framework.exceptions import AuthenticationFailed
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+        try:
+            authenticated = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return bool(authenticated and authenticated[0].is_admin)
+
+    def profile(self, request, trigger):
+        limit = getattr(settings, 'PROFILING_MAX_QUERIES', 500)
+        traces = [SqlTrace(alias, limit) for alias in connections]
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for trace in traces:
+                stack.enter_context(connections[trace.alias].execute_wrapper(trace))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duration = time.perf_counter() - started
+
+        profile_id = save_profile(profiler, {
+            'method': request.method,
+            'path': request.get_full_path(),
+            'status': response.status_code,
+            'trigger': trigger,
+            'duration_ms': round(duration * 1000, 3),
+            'created_at': time.time(),
+            'sql': {
+                trace.alias: {
+                    'count': trace.count,
+                    'total_ms': round(trace.total * 1000, 3),
+                    'queries': trace.queries,
+                }
+                for trace in traces if trace.count
+            },
+        })
+        response['X-Profile-Id'] = profile_id
+        return response
+
+
+def save_profile(profiler, meta):
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    profile_id = uuid.uuid4().hex
+
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(40)
+    meta = dict(meta, id=profile_id, summary=summary.getvalue())
+
+    profiler.dump_stats(directory / f'{profile_id}.prof')
+    (directory / f'{profile_id}.json').write_text(json.dumps(meta))
+    rotate(directory)
+    return profile_id
+
+
+def rotate(directory):
+    keep = getattr(settings, 'PROFILING_MAX_PROFILES', 50)
+    stored = sorted(directory.glob('*.json'), key=lambda path: path.stat().st_mtime, reverse=True)
+    for stale in stored[keep:]:
+        stale.unlink(missing_ok=True)
+        stale.with_suffix('.prof').unlink(missing_ok=True)
+
+
+def list_profiles():
+    profiles = []
+    for path in sorted(profile_dir().glob('*.json'), key=lambda path: path.stat().st_mtime, reverse=True):
+        meta = json.loads(path.read_text())
+        profiles.append({
+            'id': meta['id'],
+            'method': meta['method'],
+            'path': meta['path'],
+            'status': meta['status'],
+            'trigger': meta['trigger'],
+            'duration_ms': meta['duration_ms'],
+            'queries': sum(alias['count'] for alias in meta['sql'].values()),
+            'created_at': meta['created_at'],
+        })
+    return profiles
+
+
+def profile_path(profile_id, suffix):
+    if not PROFILE_ID.match(profile_id):
+        return None
+    path = profile_dir() / f'{profile_id}{suffix}'
+    return path if path.exists() else None
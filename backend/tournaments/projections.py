@@ -0,0 +1,97 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from . import outbox
+from .models import Squad, Tournament, TournamentDetailProjection, TournamentParticipant
+from .serializers import TournamentDetailHeaderSerializer, TournamentParticipantTeamSerializer
+
+
+def participants():
+    squads = Squad.objects.select_related('participant__tournament', 'participant__team').prefetch_related('members__player')
+    return TournamentParticipant.objects.select_related('team').prefetch_related(Prefetch('squads', queryset=squads))
+
+
+def render_teams(queryset):
+    return {participant.pk: TournamentParticipantTeamSerializer(participant).data for participant in queryset}
+
+
+def rebuild(tournament):
+    """Render the whole document for ``tournament``."""
+    teams = render_teams(participants().filter(tournament=tournament).order_by('id'))
+    projection, _ = TournamentDetailProjection.objects.update_or_create(
+        tournament=tournament,
+        defaults={
+            'header': TournamentDetailHeaderSerializer(tournament).data,
+            'teams': {str(pk): team for pk, team in teams.items()},
+        },
+    )
+    return projection
+
+
+@transaction.atomic
+def refresh(header_ids=(), participant_ids=None):
+    """Re-render the header of ``header_ids`` and only the listed participants
+    ({tournament id: participant ids}) of the others. Participants that no longer
+    exist are dropped; tournaments without a projection yet are built in full."""
+    participant_ids = participant_ids or {}
+    tournaments = Tournament.objects.in_bulk(set(header_ids) | set(participant_ids))
+    projections = TournamentDetailProjection.objects.select_for_update().in_bulk(list(tournaments))
+    for tournament_id, tournament in tournaments.items():
+        if tournament_id not in projections:
+            rebuild(tournament)
+
+    changed = [pk for tournament_id, ids in participant_ids.items() if tournament_id in projections for pk in ids]
+    rendered = defaultdict(dict)
+    for participant in participants().filter(id__in=changed):
+        rendered[participant.tournament_id][str(participant.pk)] = TournamentParticipantTeamSerializer(participant).data
+
+    now = timezone.now()
+    for tournament_id, projection in projections.items():
+        if tournament_id in header_ids:
+            projection.header = TournamentDetailHeaderSerializer(tournaments[tournament_id]).data
+        for pk in participant_ids.get(tournament_id, ()):
+            projection.teams.pop(str(pk), None)
+        projection.teams.update(rendered[tournament_id])
+        projection.updated_at = now
+    TournamentDetailProjection.objects.bulk_update(projections.values(), ['header', 'teams', 'updated_at'])
+
+
+def get_document(tournament):
+    """The rendered detail of ``tournament``, building the projection on first use."""
+    try:
+        projection = tournament.detail_projection
+    except TournamentDetailProjection.DoesNotExist:
+        projection = rebuild(tournament)
+    return projection.as_document()
+
+
+@outbox.register
+class TournamentDetailConsumer(outbox.Consumer):
+    name = 'tournament_detail'
+    topics = ('tournament', 'tournament_participant', 'squad', 'squad_member')
+
+    def handle(self, events):
+        header_ids = set()
+        participant_ids = defaultdict(set)
+        squad_ids = set()
+        for event in events:
+            if event.tournament_id is None:
+                continue
+            if event.topic == 'tournament':
+                header_ids.add(event.tournament_id)
+            elif event.topic == 'tournament_participant':
+                participant_ids[event.tournament_id].add(event.object_id)
+            elif event.topic == 'squad':
+                participant_ids[event.tournament_id].add(event.payload['participant_id'])
+            else:
+                squad_ids.add(event.payload['squad_id'])
+
+        # A deleted squad's members resolve to nothing here; the squad's own event covers them.
+        for tournament_id, participant_id in Squad.objects.filter(id__in=squad_ids).values_list(
+            'participant__tournament_id', 'participant_id'
+        ):
+            participant_ids[tournament_id].add(participant_id)
+        refresh(header_ids, participant_ids)
@@ -0,0 +1,236 @@
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Wait before reconnecting to Redis after an error, doubling up to the maximum.
+RECONNECT_DELAY = 0.5
+MAX_RECONNECT_DELAY = 30
+
+
+class Message:
+    __slots__ = ('id', 'channel', 'event', 'data')
+
+    def __init__(self, id, channel, event, data):
+        self.id = id
+        self.channel = channel
+        self.event = event
+        self.data = data
+
+    def encode(self):
+        payload = json.dumps({'channel': self.channel, 'data': self.data}, cls=DjangoJSONEncoder)
+        return f"id: {self.id}\nevent: {self.event}\ndata: {payload}\n\n"
+
+
+class Subscription:
+    """Bridges messages published from any thread into one asyncio consumer."""
+
+    def __init__(self, channels, loop, max_pending):
+        self.channels = frozenset(channels)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_pending)
+
+    def deliver(self, message):
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message):
+        if self.queue.full():
+            # Slow viewers lose the oldest update rather than stalling publishers.
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class InProcessBroker:
+    """Fans published events out to the subscribers of this process."""
+
+    def __init__(self, history=100, max_pending=500):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._subscribers = defaultdict(set)
+        self._history = defaultdict(lambda: deque(maxlen=history))
+
+    def publish(self, channel, event, data):
+        self.dispatch(channel, event, data)
+
+    def event_key(self, event_id):
+        """Sort key of an event id (e.g. a Last-Event-ID header), or None if it isn't one."""
+        try:
+            return int(event_id)
+        except (TypeError, ValueError):
+            return None
+
+    def dispatch(self, channel, event, data, event_id=None):
+        with self._lock:
+            message = Message(next(self._ids) if event_id is None else event_id, channel, event, data)
+            self._history[channel].append(message)
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+        return message
+
+    def subscribe(self, channels, last_event_id=None):
+        subscription = Subscription(channels, asyncio.get_running_loop(), self.max_pending)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+            last_key = self.event_key(last_event_id) if last_event_id is not None else None
+            if last_key is not None:
+                missed = sorted(
+                    (m for channel in subscription.channels for m in self._history.get(channel, ())
+                     if self.event_key(m.id) > last_key),
+                    key=lambda m: self.event_key(m.id),
+                )
+                for message in missed:
+                    subscription._put(message)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+
+class RedisBroker(InProcessBroker):
+    """Relays events through a Redis stream so every worker process sees them.
+
+    Every worker reads the same stream and uses its entry ids as event ids,
+    so a Last-Event-ID from one worker replays correctly on another.
+    """
+
+    def __init__(self, url, stream='lvl:events', max_length=10000, **kwargs):
+        super().__init__(**kwargs)
+        import redis
+
+        self.stream = stream
+        self.max_length = max_length
+        self.client = redis.Redis.from_url(url)
+        self._listener = threading.Thread(target=self._listen, name='realtime-redis', daemon=True)
+        self._listener.start()
+
+    def publish(self, channel, event, data):
+        payload = json.dumps({'channel': channel, 'event': event, 'data': data}, cls=DjangoJSONEncoder)
+        self.client.xadd(self.stream, {'body': payload}, maxlen=self.max_length, approximate=True)
+
+    def event_key(self, event_id):
+        if isinstance(event_id, bytes):
+            event_id = event_id.decode()
+        try:
+            milliseconds, sequence = str(event_id).split('-')
+            return int(milliseconds), int(sequence)
+        except ValueError:
+            return None
+
+    def _listen(self):
+        last_id = '$'
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                # Resuming from the last entry seen replays what was published
+                # while the connection was down.
+                for _, entries in self.client.xread({self.stream: last_id}, block=0):
+                    for entry_id, fields in entries:
+                        last_id = entry_id
+                        body = json.loads(fields[b'body'])
+                        self.dispatch(body['channel'], body['event'], body['data'], event_id=entry_id.decode())
+                delay = RECONNECT_DELAY
+            except Exception:
+                logger.exception('Realtime stream read failed; reconnecting in %ss', delay)
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                backend = getattr(settings, 'REALTIME_BROKER', 'memory')
+                history = getattr(settings, 'REALTIME_HISTORY', 100)
+                if backend == 'redis':
+                    _broker = RedisBroker(settings.REALTIME_REDIS_URL, history=history)
+                else:
+                    _broker = InProcessBroker(history=history)
+    return _broker
+
+
+def tournament_channel(tournament_id):
+    return f"tournament:{tournament_id}"
+
+
+def publish_on_commit(channel, event, data):
+    """Publish once the surrounding transaction commits, so viewers never see rolled-back writes.
+
+    The write has already committed by then, so a broker failure is logged
+    rather than failing the request.
+    """
+    transaction.on_commit(lambda: _publish(channel, event, data), robust=True)
+
+
+def _publish(channel, event, data):
+    try:
+        get_broker().publish(channel, event, data)
+    except Exception:
+        logger.exception('Could not publish %s on %s', event, channel)
+
+
+def publish_match(match, event='match.updated'):
+    """Publish ``match`` on its tournament's channel and the all-matches channel once committed."""
+    data = {
+        'id': match.id,
+        'tournament_id': match.tournament_id,
+        'round_number': match.round_number,
+        'match_number': match.match_number,
+        'team1_id': match.team1_id,
+        'team2_id': match.team2_id,
+        'team1_score': match.team1_score,
+        'team2_score': match.team2_score,
+        'winner_id': match.winner_id,
+        'is_completed': match.is_completed,
+        'scheduled_time': match.scheduled_time,
+        'server_slot': match.server_slot,
+    }
+    publish_on_commit(tournament_channel(match.tournament_id), event, data)
+    publish_on_commit('matches', event, data)
+
+
+async def event_stream(channels, last_event_id=None):
+    broker = get_broker()
+    heartbeat = getattr(settings, 'REALTIME_HEARTBEAT_SECONDS', 15)
+    subscription = broker.subscribe(channels, last_event_id)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield message.encode()
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,158 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+
+import numpy as np
+from django.db import connections, transaction
+from django.db.models import Max, Min
+
+from . import eligibility
+from .models import Checkpoint, Player, PlayerMatchStats, Team, TeamMember
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT = 'recompute:players'
+SHARD_SIZE = 5000
+STREAM_CHUNK = 20000
+WRITE_CHUNK = 1000
+# Career points needed for each tier; players without match history keep theirs.
+TIER_POINTS = [('DIAMOND', 400000), ('PLATINUM', 150000), ('GOLD', 50000), ('SILVER', 10000), ('BRONZE', 0)]
+STAT_COLUMNS = ('player_id', 'kills', 'deaths', 'assists', 'score', 'won')
+PLAYER_FIELDS = [
+    'total_kills', 'total_deaths', 'total_assists', 'points', 'matches_played', 'matches_won',
+    'kill_death_ratio', 'win_rate', 'tier',
+]
+
+
+def tier_for(points):
+    return next(tier for tier, threshold in TIER_POINTS if points >= threshold)
+
+
+def shard_totals(start, end):
+    """Sum each player's stat lines for ids in [start, end): {column: array indexed by id - start}."""
+    size = end - start
+    totals = {column: np.zeros(size, dtype=np.int64) for column in (*STAT_COLUMNS[1:], 'played')}
+    rows = (
+        PlayerMatchStats.objects.filter(player_id__gte=start, player_id__lt=end)
+        .values_list(*STAT_COLUMNS)
+        .iterator(chunk_size=STREAM_CHUNK)
+    )
+    while True:
+        chunk = np.array(list(islice(rows, STREAM_CHUNK)), dtype=np.int64).reshape(-1, len(STAT_COLUMNS))
+        if not len(chunk):
+            break
+        index = chunk[:, 0] - start
+        for column, name in enumerate(STAT_COLUMNS[1:], start=1):
+            totals[name] += np.bincount(index, weights=chunk[:, column], minlength=size).astype(np.int64)
+        totals['played'] += np.bincount(index, minlength=size)
+    return totals
+
+
+@transaction.atomic
+def recompute_shard(start, end):
+    """Rebuild the career sums, ratios and tier of players with ids in [start, end).
+
+    The players are locked first, so a concurrent stats.ingest() either
+    finishes before the stat lines are read or applies its delta afterwards.
+    Only rows that changed are written. Returns the number updated.
+    """
+    players = list(
+        Player.objects.select_for_update().filter(id__gte=start, id__lt=end).order_by('id').only('id', *PLAYER_FIELDS)
+    )
+    if not players:
+        return 0
+    totals = shard_totals(start, end)
+    kill_death_ratio = totals['kills'] / np.maximum(totals['deaths'], 1)
+    win_rate = 100.0 * totals['won'] / np.maximum(totals['played'], 1)
+
+    changed = []
+    for player in players:
+        index = player.id - start
+        values = {
+            'total_kills': int(totals['kills'][index]),
+            'total_deaths': int(totals['deaths'][index]),
+            'total_assists': int(totals['assists'][index]),
+            'points': int(totals['score'][index]),
+            'matches_played': int(totals['played'][index]),
+            'matches_won': int(totals['won'][index]),
+            'kill_death_ratio': float(kill_death_ratio[index]),
+            'win_rate': float(win_rate[index]),
+            'tier': tier_for(int(totals['score'][index])) if totals['played'][index] else player.tier,
+        }
+        if any(getattr(player, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(player, field, value)
+            changed.append(player)
+    Player.objects.bulk_update(changed, PLAYER_FIELDS, batch_size=WRITE_CHUNK)
+    return len(changed)
+
+
+def recompute_team_tiers():
+    """Set each team's tier from the mean points of its members who have played."""
+    rows = np.array(
+        list(TeamMember.objects.filter(player__matches_played__gt=0).values_list('team_id', 'player__points')),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    if not len(rows):
+        return 0
+    team_ids, index = np.unique(rows[:, 0], return_inverse=True)
+    means = np.bincount(index, weights=rows[:, 1]) / np.bincount(index)
+    tiers = {int(team_id): tier_for(mean) for team_id, mean in zip(team_ids, means)}
+    teams = [team for team in Team.objects.filter(id__in=tiers).only('id', 'tier') if team.tier != tiers[team.id]]
+    for team in teams:
+        team.tier = tiers[team.id]
+    Team.objects.bulk_update(teams, ['tier'], batch_size=WRITE_CHUNK)
+    eligibility.refresh_teams([team.id for team in teams])
+    return len(teams)
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def run(workers=1, shard_size=SHARD_SIZE, restart=False, progress=None):
+    """Recompute every player's aggregates, then team tiers.
+
+    Players are split into id-range shards, recomputed in a process pool when
+    ``workers`` > 1. The CHECKPOINT row holds the id below which every shard
+    is done, so a failed run picks up from there; it is cleared once the run
+    completes. ``progress`` is called with (shards done, shard count).
+    """
+    bounds = Player.objects.aggregate(low=Min('id'), high=Max('id'))
+    checkpoint, _ = Checkpoint.objects.get_or_create(name=CHECKPOINT)
+    if restart:
+        checkpoint.position = 0
+    first = max(bounds['low'] or 0, checkpoint.position)
+    starts = list(range(first, (bounds['high'] or 0) + 1, shard_size)) if bounds['high'] else []
+    result = {'resumed_from': checkpoint.position, 'shards': len(starts), 'players_updated': 0}
+
+    done = set()
+
+    def finished(start, updated):
+        done.add(start)
+        result['players_updated'] += updated
+        position = first
+        while position in done:
+            position += shard_size
+        if position != checkpoint.position:
+            checkpoint.position = position
+            checkpoint.save(update_fields=['position', 'updated_at'])
+        logger.info('Recompute: %s/%s shards, %s players updated', len(done), len(starts), result['players_updated'])
+        if progress:
+            progress(len(done), len(starts))
+
+    if workers <= 1 or len(starts) <= 1:
+        for start in starts:
+            finished(start, recompute_shard(start, start + shard_size))
+    else:
+        # Forked workers must not share the parent's database connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = {pool.submit(recompute_shard, start, start + shard_size): start for start in starts}
+            for future in as_completed(futures):
+                finished(futures[future], future.result())
+
+    result['teams_updated'] = recompute_team_tiers()
+    checkpoint.delete()
+    return result
@@ -0,0 +1,15 @@
+from rest_framework.renderers import BaseRenderer
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Selected with `Accept: application/msgpack` or `?format=msgpack`."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        import msgpack
+        if data is None:
+            return b''
+        return msgpack.packb(data, use_bin_type=True)
@@ -0,0 +1,35 @@
+from django.db.models import Q
+
+from .models import Player
+
+
+def resolve_players(identifiers, fields=('id',)):
+    """Resolve emails, usernames and discord ids to players in one query.
+
+    Follows TeamManagementView: values containing '@' are emails, anything else
+    may be a username or a discord id. Returns {identifier: player values dict};
+    unknown identifiers are missing from the result.
+    """
+    identifiers = {str(value).strip() for value in identifiers if value not in (None, '')}
+    emails = {value for value in identifiers if '@' in value}
+    names = identifiers - emails
+    if not identifiers:
+        return {}
+
+    query = Q()
+    if emails:
+        query |= Q(email__in=emails)
+    if names:
+        query |= Q(username__in=names) | Q(discord_id__in=names)
+
+    columns = set(fields) | {'email', 'username', 'discord_id'}
+    resolved = {}
+    for row in Player.objects.filter(query).values(*columns):
+        if row['email'] in emails:
+            resolved[row['email']] = row
+        # Usernames win over discord ids, as in TeamManagementView's lookup order.
+        if row['discord_id'] in names:
+            resolved.setdefault(row['discord_id'], row)
+        if row['username'] in names:
+            resolved[row['username']] = row
+    return resolved
@@ -0,0 +1,107 @@
+from django.db import transaction
+
+from . import membership, outbox
+from .models import TeamMember
+from .resolvers import resolve_players
+
+MAX_OPERATIONS = 200
+ROLES = {key for key, _ in TeamMember.ROLE_CHOICES}
+
+
+class RosterResult:
+    def __init__(self):
+        self.errors = []
+        self.added = []
+        self.removed = []
+        self.changed = []
+
+    def error(self, index, message):
+        self.errors.append({'index': index, 'error': message})
+
+    def as_dict(self):
+        return {
+            'added': self.added,
+            'removed': self.removed,
+            'role_changes': self.changed,
+            'errors': self.errors,
+        }
+
+
+def apply_operations(team, operations):
+    """Apply a list of add_member / remove_member / change_role operations to ``team``.
+
+    Operations use the same fields as TeamManagementView and are checked in
+    order against the team's current roster, so a batch may remove a player
+    and add them back. All players are resolved with one lookup; nothing is
+    written unless every operation is valid. The net change is applied with
+    one bulk_create, one bulk_update and one DELETE.
+    """
+    result = RosterResult()
+    resolved = resolve_players(
+        [(op.get('search_value') or '').strip() for op in operations if op.get('action') == 'add_member'],
+        fields=('id', 'username'),
+    )
+    current = {member.player_id: member for member in TeamMember.objects.filter(team=team)}
+    roster = {player_id: member.role for player_id, member in current.items()}
+
+    for index, op in enumerate(operations):
+        action = op.get('action')
+        if action == 'add_member':
+            player = resolved.get((op.get('search_value') or '').strip())
+            role = op.get('role') or 'MEMBER'
+            if player is None:
+                result.error(index, 'Player not found')
+            elif player['id'] in roster:
+                result.error(index, 'Player is already in this team')
+            elif role not in ROLES:
+                result.error(index, 'Invalid role')
+            else:
+                roster[player['id']] = role
+            continue
+
+        player_id = _player_id(op.get('player_id'))
+        if action not in ('remove_member', 'change_role'):
+            result.error(index, 'Invalid action')
+        elif player_id not in roster:
+            result.error(index, 'Player not found in team')
+        elif player_id == team.lead_player_id:
+            result.error(index, 'Cannot remove team lead' if action == 'remove_member' else 'Cannot change team lead role')
+        elif action == 'remove_member':
+            del roster[player_id]
+        elif op.get('new_role') not in ROLES:
+            result.error(index, 'Invalid role')
+        else:
+            roster[player_id] = op['new_role']
+
+    if result.errors:
+        return result
+
+    created = [TeamMember(team=team, player_id=player_id, role=role) for player_id, role in roster.items() if player_id not in current]
+    updated = []
+    for player_id, role in roster.items():
+        if player_id in current and current[player_id].role != role:
+            current[player_id].role = role
+            updated.append(current[player_id])
+    removed = [player_id for player_id in current if player_id not in roster]
+
+    with transaction.atomic():
+        created = TeamMember.objects.bulk_create(created)
+        TeamMember.objects.bulk_update(updated, ['role'])
+        if removed:
+            TeamMember.objects.filter(id__in=[current[player_id].id for player_id in removed]).delete()
+        outbox.record_bulk(created, 'created')
+        outbox.record_bulk(updated, 'updated')
+        membership.invalidate([member.player_id for member in created + updated] + removed)
+
+    usernames = {player['id']: player['username'] for player in resolved.values()}
+    result.added = [{'player_id': member.player_id, 'username': usernames.get(member.player_id), 'role': member.role} for member in created]
+    result.removed = removed
+    result.changed = [{'player_id': member.player_id, 'role': member.role} for member in updated]
+    return result
+
+
+def _player_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
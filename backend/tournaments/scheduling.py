@@ -0,0 +1,180 @@
+import heapq
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import outbox
+from .brackets import ELIMINATION
+from .models import TournamentMatch
+
+
+class Plan:
+    """Scheduling parameters; defaults come from the MATCH_* settings."""
+
+    def __init__(self, start, slots=None, duration=None, rest=None):
+        self.start = start
+        self.slots = slots or getattr(settings, 'MATCH_SERVER_SLOTS', 4)
+        self.duration = duration or timedelta(minutes=getattr(settings, 'MATCH_DURATION_MINUTES', 60))
+        self.rest = rest if rest is not None else timedelta(minutes=getattr(settings, 'MATCH_REST_MINUTES', 30))
+
+
+def dependencies(matches, bracket_type):
+    """{match id: [ids of the matches whose winners play in it]} (elimination brackets only)."""
+    if bracket_type not in ELIMINATION:
+        return {match.id: [] for match in matches}
+    by_key = {(match.round_number, match.match_number): match.id for match in matches}
+    return {
+        match.id: [
+            by_key[key] for key in ((match.round_number - 1, 2 * match.match_number - 1), (match.round_number - 1, 2 * match.match_number))
+            if key in by_key
+        ]
+        for match in matches
+    }
+
+
+def list_schedule(matches, depends_on, plan, fixed=(), priority=None, not_before=None):
+    """Assign (start, slot) to every match not in ``fixed``.
+
+    ``fixed`` maps match id -> (start, end, slot) for matches already played
+    or in progress; they hold their slot and teams until ``end``. The rest
+    are placed greedily: the ready match (all feeders placed) that can start
+    earliest goes on the server slot that frees up first. A match starts no
+    earlier than its feeders' end plus the rest period, nor before both its
+    teams have rested since their last match, nor before its entry in
+    ``not_before``; ties go by ``priority`` (default: bracket order).
+    Returns {match id: (start, slot)}.
+    """
+    not_before = not_before or {}
+    priority = priority or (lambda match: (match.round_number, match.match_number))
+    fixed = dict(fixed)
+    ends = {match_id: end for match_id, (_, end, _) in fixed.items()}
+    team_free = {}
+    slot_free = [plan.start] * plan.slots
+    for match in matches:
+        if match.id in fixed:
+            start, end, slot = fixed[match.id]
+            for team_id in (match.team1_id, match.team2_id):
+                if team_id is not None:
+                    team_free[team_id] = max(team_free.get(team_id, plan.start), end + plan.rest)
+            if slot is not None and slot < plan.slots:
+                slot_free[slot] = max(slot_free[slot], end)
+    slots = [(free_at, slot) for slot, free_at in enumerate(slot_free)]
+    heapq.heapify(slots)
+
+    by_id = {match.id: match for match in matches}
+    waiting = {match_id: sum(1 for feeder in feeders if feeder not in fixed) for match_id, feeders in depends_on.items() if match_id not in fixed}
+    feeds = {}
+    for match_id, feeders in depends_on.items():
+        for feeder in feeders:
+            feeds.setdefault(feeder, []).append(match_id)
+
+    def release(match):
+        times = [plan.start, not_before.get(match.id, plan.start)]
+        times.extend(ends[feeder] + plan.rest for feeder in depends_on[match.id])
+        times.extend(team_free[team_id] for team_id in (match.team1_id, match.team2_id) if team_id in team_free)
+        return max(times)
+
+    ready = [
+        (release(by_id[match_id]), priority(by_id[match_id]), match_id)
+        for match_id, count in waiting.items() if not count
+    ]
+    heapq.heapify(ready)
+    placed = {}
+    while ready:
+        earliest, rank, match_id = heapq.heappop(ready)
+        match = by_id[match_id]
+        current = release(match)
+        if current > earliest:
+            # A team played in the meantime; requeue with the later time.
+            heapq.heappush(ready, (current, rank, match_id))
+            continue
+        free_at, slot = heapq.heappop(slots)
+        start = max(earliest, free_at)
+        end = start + plan.duration
+        heapq.heappush(slots, (end, slot))
+        placed[match_id] = (start, slot)
+        ends[match_id] = end
+        for team_id in (match.team1_id, match.team2_id):
+            if team_id is not None:
+                team_free[team_id] = end + plan.rest
+        for successor in feeds.get(match_id, ()):
+            if successor in waiting:
+                waiting[successor] -= 1
+                if not waiting[successor]:
+                    following = by_id[successor]
+                    heapq.heappush(ready, (release(following), priority(following), successor))
+    return placed
+
+
+def _write(matches, placed):
+    now = timezone.now()
+    changed = []
+    for match in matches:
+        if match.id not in placed:
+            continue
+        start, slot = placed[match.id]
+        if (match.scheduled_time, match.server_slot) != (start, slot):
+            match.scheduled_time, match.server_slot = start, slot
+            match.row_version += 1
+            match.updated_at = now
+            changed.append(match)
+    TournamentMatch.objects.bulk_update(changed, ['scheduled_time', 'server_slot', 'row_version', 'updated_at'], batch_size=1000)
+    outbox.record_bulk(changed, 'updated')
+    return changed
+
+
+@transaction.atomic
+def move(moves):
+    """Set scheduled_time for {match id: start}; server slots are kept. Returns the matches that moved."""
+    matches = list(TournamentMatch.objects.select_for_update().filter(id__in=list(moves)))
+    return _write(matches, {match.id: (moves[match.id], match.server_slot) for match in matches})
+
+
+@transaction.atomic
+def schedule(tournament, plan=None, now=None):
+    """(Re)schedule every unfinished match of the tournament from ``plan.start`` (default: start_date).
+
+    Completed matches and those already under way keep their time and slot,
+    and nothing else is placed before ``now``. Returns the matches that moved.
+    """
+    now = now or timezone.now()
+    plan = plan or Plan(tournament.start_date)
+    matches = list(TournamentMatch.objects.select_for_update().filter(tournament=tournament).order_by('round_number', 'match_number'))
+    fixed = {
+        match.id: (match.scheduled_time, max(match.scheduled_time + plan.duration, now), match.server_slot)
+        for match in matches if match.scheduled_time and (match.is_completed or match.scheduled_time <= now)
+    }
+    placed = list_schedule(
+        matches, dependencies(matches, tournament.bracket_type), plan, fixed,
+        not_before={match.id: now for match in matches if match.id not in fixed},
+    )
+    return _write(matches, placed)
+
+
+@transaction.atomic
+def replan(tournament, late_match, expected_end, now=None, plan=None):
+    """Re-plan after ``late_match`` overruns to ``expected_end``.
+
+    Matches that are completed or already under way stay where they are; only
+    those not yet started are placed again, from ``now``, so matches that the
+    delay does not reach keep their times (nothing moves earlier). Returns
+    the matches that moved.
+    """
+    now = now or timezone.now()
+    plan = plan or Plan(now)
+    matches = list(TournamentMatch.objects.select_for_update().filter(tournament=tournament).order_by('round_number', 'match_number'))
+    fixed = {}
+    for match in matches:
+        if match.id == late_match.id:
+            fixed[match.id] = (match.scheduled_time or now, max(expected_end, now), match.server_slot)
+        elif match.scheduled_time and (match.is_completed or match.scheduled_time <= now):
+            fixed[match.id] = (match.scheduled_time, max(match.scheduled_time + plan.duration, now), match.server_slot)
+    # Unstarted matches keep their order from the previous plan.
+    placed = list_schedule(
+        matches, dependencies(matches, tournament.bracket_type), plan, fixed,
+        priority=lambda match: (match.scheduled_time or plan.start, match.round_number, match.match_number),
+        not_before={match.id: match.scheduled_time for match in matches if match.scheduled_time and match.id not in fixed},
+    )
+    return _write(matches, placed)
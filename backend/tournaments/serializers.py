@@ -1,8 +1,10 @@
 from rest_framework import serializers
-from .models import Player, Team, TeamMember, Tournament, TournamentParticipant, TournamentMatch, News, TournamentTeam, Squad, SquadMember, Player
+from .models import Player, Team, TeamMember, Tournament, TournamentParticipant, TournamentMatch, News, TournamentTeam, Squad, SquadMember, Player, Job
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.password_validation import validate_password
 
+from .loaders import BatchLoadMixin
+
 class PlayerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Player
@@ -32,7 +34,8 @@ class TeamSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at', 'lead_player', 'join_code']
 
-class TeamMemberSerializer(serializers.ModelSerializer):
+class TeamMemberSerializer(BatchLoadMixin, serializers.ModelSerializer):
+    batch_load = ('team__lead_player', 'player')
     team = TeamSerializer(read_only=True)
     player = PlayerSerializer(read_only=True)
     team_id = serializers.PrimaryKeyRelatedField(queryset=Team.objects.all(), source='team', write_only=True)
@@ -62,7 +65,8 @@ class TournamentParticipantSerializer(serializers.ModelSerializer):
         return SquadSerializer(obj.squads.all().prefetch_related('members__player'), many=True).data
 
 
-class TournamentMatchSerializer(serializers.ModelSerializer):
+class TournamentMatchSerializer(BatchLoadMixin, serializers.ModelSerializer):
+    batch_load = ('team1__lead_player', 'team2__lead_player', 'winner__lead_player')
     team1 = TeamSerializer(read_only=True)
     team2 = TeamSerializer(read_only=True)
     winner = TeamSerializer(read_only=True)
@@ -170,7 +174,8 @@ class NewsSerializer(serializers.ModelSerializer):
         model = News
         fields = '__all__'
 
-class SquadMemberSerializer(serializers.ModelSerializer):
+class SquadMemberSerializer(BatchLoadMixin, serializers.ModelSerializer):
+    batch_load = ('player',)
     player_id = serializers.IntegerField(source='player.id', read_only=True)
     player_name = serializers.CharField(source='player.username', read_only=True)
     player_email = serializers.CharField(source='player.email', read_only=True)
@@ -203,7 +208,8 @@ class SquadMemberSerializer(serializers.ModelSerializer):
         return f"/flags/{obj.player.country_code}.png"
 
 
-class SquadSerializer(serializers.ModelSerializer):
+class SquadSerializer(BatchLoadMixin, serializers.ModelSerializer):
+    batch_load = ('participant__tournament', 'participant__team')
     members = SquadMemberSerializer(many=True, read_only=True)
     icon = serializers.SerializerMethodField()
     tournament_id = serializers.SerializerMethodField()
@@ -300,6 +306,12 @@ class TournamentDetailSerializer(serializers.ModelSerializer):
         model = Tournament
         fields = ['title', 'max_players', 'registered_players', 'start_date', 'mode', 'region', 'platform', 'language', 'level', 'teams']
 
+class TournamentDetailHeaderSerializer(TournamentDetailSerializer):
+    teams = None
+
+    class Meta(TournamentDetailSerializer.Meta):
+        fields = [field for field in TournamentDetailSerializer.Meta.fields if field != 'teams']
+
 class MatchSerializer(serializers.ModelSerializer):
     teamA = serializers.SerializerMethodField()
     teamB = serializers.SerializerMethodField()
@@ -382,4 +394,13 @@ class AllTeamDetailsSerializer(serializers.ModelSerializer):
         fields = ['id', 'squad_type', 'has_squad_lead']
 
     def get_has_squad_lead(self, obj):
-        return SquadMember.objects.filter(squad=obj, role='LEADER').exists()
\ No newline at end of file
+        return SquadMember.objects.filter(squad=obj, role='LEADER').exists()
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'name', 'kwargs', 'status', 'attempts', 'max_attempts',
+            'run_at', 'result', 'error', 'created_at', 'finished_at'
+        ]
+
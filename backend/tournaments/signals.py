@@ -1,10 +1,83 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
-from .models import TournamentParticipant
+from .models import Player, Team, Tournament, TournamentParticipant, TournamentMatch, TeamMember, Squad, SquadMember
+from .realtime import publish_match, publish_on_commit, tournament_channel
+from . import eligibility, loaders, membership, outbox
 
 @receiver(post_save, sender=TournamentParticipant)
 def update_tournament_registration_count(sender, instance, created, **kwargs):
     if created:
         tournament = instance.tournament
         tournament.registered_players = tournament.participants.count()
-        tournament.save()
\ No newline at end of file
+        tournament.save()
+
+@receiver(post_save, sender=TournamentMatch)
+def publish_match_update(sender, instance, created, **kwargs):
+    publish_match(instance, 'match.created' if created else 'match.updated')
+
+@receiver(post_save, sender=TournamentParticipant)
+def publish_registration(sender, instance, created, **kwargs):
+    if created:
+        publish_on_commit(tournament_channel(instance.tournament_id), 'participant.registered', {
+            'id': instance.id,
+            'team_id': instance.team_id,
+            'registered_at': instance.registered_at,
+        })
+
+@receiver(post_delete, sender=TournamentParticipant)
+def publish_withdrawal(sender, instance, **kwargs):
+    publish_on_commit(tournament_channel(instance.tournament_id), 'participant.withdrawn', {
+        'id': instance.id,
+        'team_id': instance.team_id,
+    })
+
+@receiver(post_save, sender=Tournament)
+@receiver(post_save, sender=TournamentMatch)
+@receiver(post_save, sender=TournamentParticipant)
+@receiver(post_save, sender=TeamMember)
+@receiver(post_save, sender=Squad)
+@receiver(post_save, sender=SquadMember)
+def record_domain_write(sender, instance, created, using, **kwargs):
+    outbox.record(instance, 'created' if created else 'updated', using=using)
+
+@receiver(post_delete, sender=Tournament)
+@receiver(post_delete, sender=TournamentMatch)
+@receiver(post_delete, sender=TournamentParticipant)
+@receiver(post_delete, sender=TeamMember)
+@receiver(post_delete, sender=Squad)
+@receiver(post_delete, sender=SquadMember)
+def record_domain_delete(sender, instance, using, **kwargs):
+    outbox.record(instance, 'deleted', using=using)
+
+@receiver(post_save, sender=Team)
+def refresh_team_eligibility(sender, instance, created, update_fields=None, **kwargs):
+    # Teams aren't in the outbox; their feed only depends on tier and is_active.
+    if created or update_fields is None or {'tier', 'is_active'} & set(update_fields):
+        eligibility.refresh_teams([instance.id])
+
+@receiver(post_init, sender=Team)
+def remember_team_lead(sender, instance, **kwargs):
+    # __dict__ so a deferred lead_player_id isn't fetched.
+    instance._loaded_lead_player_id = instance.__dict__.get('lead_player_id')
+
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+def invalidate_lead_membership(sender, instance, **kwargs):
+    membership.invalidate([instance.lead_player_id, getattr(instance, '_loaded_lead_player_id', None)])
+    instance._loaded_lead_player_id = instance.lead_player_id
+
+@receiver(post_save, sender=Player)
+def clear_new_player_membership(sender, instance, created, **kwargs):
+    # Ids can be reused after a delete; a new account starts with no teams.
+    if created:
+        membership.invalidate([instance.id])
+
+@receiver(post_save, sender=TeamMember)
+@receiver(post_delete, sender=TeamMember)
+def invalidate_member_membership(sender, instance, **kwargs):
+    membership.invalidate([instance.player_id])
+
+@receiver(post_save)
+@receiver(post_delete)
+def evict_loaded_row(sender, instance, **kwargs):
+    loaders.evict(instance)
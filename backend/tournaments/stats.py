@@ -0,0 +1,140 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
+from django.db.models.functions import Cast, Greatest
+
+from .models import Player, PlayerMatchStats
+
+STAT_FIELDS = (
+    'kills', 'deaths', 'assists', 'score', 'vehicles_destroyed', 'objectives_captured', 'revives', 'match_time',
+)
+MAX_LINES = 128
+# Players per running-sum UPDATE; keeps the CASE parameters well under driver limits.
+UPDATE_CHUNK = 250
+# Player running sum -> the stat line value that feeds it.
+SUMS = {
+    'total_kills': 'kills',
+    'total_deaths': 'deaths',
+    'total_assists': 'assists',
+    'points': 'score',
+    'matches_played': 'played',
+    'matches_won': 'won',
+}
+
+
+def build_lines(match, lines):
+    """Validate raw stat line dicts for ``match``; returns (unsaved PlayerMatchStats, errors)."""
+    errors = []
+    if not isinstance(lines, list) or not lines:
+        return [], [{'line': None, 'error': 'lines must be a non-empty list'}]
+    if len(lines) > MAX_LINES:
+        return [], [{'line': None, 'error': f'At most {MAX_LINES} lines per match'}]
+
+    player_ids = set()
+    for line in lines:
+        if isinstance(line, dict):
+            try:
+                player_ids.add(int(line.get('player_id')))
+            except (TypeError, ValueError):
+                pass
+    known = set(Player.objects.filter(id__in=player_ids).values_list('id', flat=True))
+    teams = {match.team1_id, match.team2_id} - {None}
+
+    stats = []
+    seen = set()
+    for number, line in enumerate(lines):
+        try:
+            if not isinstance(line, dict):
+                raise ValueError('line must be an object')
+            player_id = int(line.get('player_id'))
+            if player_id not in known:
+                raise ValueError('player not found')
+            if player_id in seen:
+                raise ValueError('duplicate player')
+            team_id = line.get('team_id')
+            if team_id is not None:
+                team_id = int(team_id)
+                if teams and team_id not in teams:
+                    raise ValueError('team_id must be one of the match teams')
+            values = {field: int(line.get(field) or 0) for field in STAT_FIELDS}
+            if any(value < 0 for value in values.values()):
+                raise ValueError('stats cannot be negative')
+            won = line.get('won')
+            if won is None:
+                won = bool(match.winner_id and team_id == match.winner_id)
+            elif won not in (True, False):
+                raise ValueError('won must be true or false')
+        except ValueError as e:
+            errors.append({'line': number, 'error': str(e)})
+            continue
+        except TypeError:
+            errors.append({'line': number, 'error': 'player_id is required'})
+            continue
+        seen.add(player_id)
+        stats.append(PlayerMatchStats(match=match, player_id=player_id, team_id=team_id, won=bool(won), **values))
+    return stats, errors
+
+
+def _contribution(line, sign):
+    return Counter({
+        'kills': sign * line.kills,
+        'deaths': sign * line.deaths,
+        'assists': sign * line.assists,
+        'score': sign * line.score,
+        'played': sign,
+        'won': sign * int(line.won),
+    })
+
+
+def ingest_match_stats(match, stats):
+    """Store a match's stat lines, replacing any earlier upload for the match,
+    and move each player's career sums by the difference."""
+    return ingest({match.pk: stats})
+
+
+@transaction.atomic
+def ingest(lines_by_match):
+    """ingest_match_stats() for {match id: lines} at once, with a single UPDATE of the sums."""
+    previous = list(PlayerMatchStats.objects.select_for_update().filter(match_id__in=list(lines_by_match)))
+    deltas = defaultdict(Counter)
+    for line in previous:
+        deltas[line.player_id].update(_contribution(line, -1))
+    for lines in lines_by_match.values():
+        for line in lines:
+            deltas[line.player_id].update(_contribution(line, 1))
+
+    if previous:
+        PlayerMatchStats.objects.filter(match_id__in=list(lines_by_match)).delete()
+    created = PlayerMatchStats.objects.bulk_create(
+        [line for lines in lines_by_match.values() for line in lines], batch_size=1000
+    )
+    apply_deltas(deltas)
+    return created
+
+
+def apply_deltas(deltas):
+    """Add {player id: Counter of line values} to the players' running sums and
+    re-derive kill_death_ratio and win_rate. One UPDATE per UPDATE_CHUNK players,
+    so a whole 64v64 match is a single statement."""
+    deltas = [(player_id, delta) for player_id, delta in deltas.items() if any(delta.values())]
+    updated = 0
+    for start in range(0, len(deltas), UPDATE_CHUNK):
+        updated += _update_sums(dict(deltas[start:start + UPDATE_CHUNK]))
+    return updated
+
+
+def _update_sums(deltas):
+    def increment(key):
+        return Case(
+            *[When(id=player_id, then=Value(delta[key])) for player_id, delta in deltas.items() if delta[key]],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+
+    sums = {field: F(field) + increment(key) for field, key in SUMS.items()}
+    return Player.objects.filter(id__in=list(deltas)).update(
+        **sums,
+        kill_death_ratio=Cast(sums['total_kills'], FloatField()) / Greatest(sums['total_deaths'], Value(1)),
+        win_rate=Value(100.0) * Cast(sums['matches_won'], FloatField()) / Greatest(sums['matches_played'], Value(1)),
+    )
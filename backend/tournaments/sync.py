@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import DomainEvent, Squad, SquadMember, Tournament, TournamentMatch, TournamentParticipant
+
+# Change feed sections: key -> (outbox topic, model, tournament filter, flat fields)
+SECTIONS = {
+    'tournament': ('tournament', Tournament, 'id', [
+        'id', 'title', 'max_players', 'registered_players', 'mode', 'region', 'level', 'platform',
+        'start_date', 'is_active', 'is_started', 'is_completed', 'current_round', 'bracket_type',
+        'row_version', 'updated_at',
+    ]),
+    'participants': ('tournament_participant', TournamentParticipant, 'tournament_id', [
+        'id', 'team_id', 'team__name', 'registered_at', 'row_version', 'updated_at',
+    ]),
+    'matches': ('tournament_match', TournamentMatch, 'tournament_id', [
+        'id', 'round_number', 'match_number', 'team1_id', 'team2_id', 'winner_id', 'team1_score',
+        'team2_score', 'is_completed', 'scheduled_time', 'server_slot', 'mode', 'row_version', 'updated_at',
+    ]),
+    'squads': ('squad', Squad, 'participant__tournament_id', [
+        'id', 'participant_id', 'squad_type', 'row_version', 'updated_at',
+    ]),
+    'squad_members': ('squad_member', SquadMember, 'squad__participant__tournament_id', [
+        'id', 'squad_id', 'player_id', 'player__username', 'role', 'action_role', 'row_version', 'updated_at',
+    ]),
+}
+
+TOPIC_SECTIONS = {topic: key for key, (topic, _, _, _) in SECTIONS.items()}
+
+MAX_EVENTS = 5000
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+def parse_token(value):
+    if value in (None, ''):
+        return None
+    try:
+        token = int(value)
+    except (TypeError, ValueError):
+        raise InvalidToken(value)
+    if token < 0:
+        raise InvalidToken(value)
+    return token
+
+
+def settled_before():
+    # Ids are allocated before commit, so a slower transaction can still commit
+    # a lower id than a recent event; tokens never move past such events.
+    return timezone.now() - timedelta(seconds=getattr(settings, 'OUTBOX_SETTLE_SECONDS', 2))
+
+
+def current_token(tournament_id):
+    return DomainEvent.objects.filter(
+        tournament_id=tournament_id, created_at__lte=settled_before()
+    ).aggregate(last=Max('id'))['last'] or 0
+
+
+def snapshot(tournament_id):
+    """Every live row of the tournament, for clients without a token."""
+    # Read the token first: anything written while the rows are read is replayed
+    # by the next delta instead of being lost.
+    token = current_token(tournament_id)
+    changes = {}
+    for key, (_, model, tournament_filter, fields) in SECTIONS.items():
+        rows = list(model.objects.filter(**{tournament_filter: tournament_id}).values(*fields))
+        changes[key] = {'created': rows, 'updated': [], 'deleted': []}
+    return {'token': str(token), 'has_more': False, 'full': True, 'changes': changes}
+
+
+def changes_since(tournament_id, since, limit=MAX_EVENTS):
+    """Rows created, updated or deleted after ``since``, served from the (tournament_id, id) index.
+
+    Events inside the settle window are included but the token stops before
+    them, so they are sent again next time; re-sending a row is harmless.
+    """
+    settle = settled_before()
+    events = list(
+        DomainEvent.objects.filter(tournament_id=tournament_id, id__gt=since, topic__in=TOPIC_SECTIONS)
+        .order_by('id')
+        .values_list('id', 'topic', 'event_type', 'object_id', 'created_at')[:limit]
+    )
+    token = since
+    for event_id, _, _, _, created_at in events:
+        if created_at > settle:
+            break
+        token = event_id
+    touched = {}
+    created = set()
+    for _, topic, event_type, object_id, _ in events:
+        key = TOPIC_SECTIONS[topic]
+        touched.setdefault(key, {})[object_id] = event_type
+        if event_type == 'created':
+            created.add((key, object_id))
+
+    changes = {}
+    for key, objects in touched.items():
+        _, model, _, fields = SECTIONS[key]
+        live_ids = [pk for pk, event_type in objects.items() if event_type != 'deleted']
+        rows = {row['id']: row for row in model.objects.filter(pk__in=live_ids).values(*fields)} if live_ids else {}
+        section = {'created': [], 'updated': [], 'deleted': []}
+        for pk in objects:
+            row = rows.get(pk)
+            if row is None:
+                if (key, pk) not in created:
+                    section['deleted'].append(pk)
+            elif (key, pk) in created:
+                section['created'].append(row)
+            else:
+                section['updated'].append(row)
+        changes[key] = section
+
+    return {'token': str(token), 'has_more': len(events) == limit, 'full': False, 'changes': changes}
@@ -1,20 +1,75 @@
-from celery import shared_task
+import time
+
 from django.utils import timezone
-from .models import Player
+from .jobs import job
+from .models import Player, Tournament, TournamentParticipant
+from . import assignment, brackets, eligibility, projections, recompute, scheduling
 
-@shared_task
+@job()
 def update_online_statuses():
     from django.conf import settings
     threshold = timezone.now() - timezone.timedelta(
         minutes=settings.ONLINE_THRESHOLD_MINUTES
     )
     
-    Player.objects.filter(
+    went_offline = Player.objects.filter(
         is_online=True,
         last_activity__lt=threshold
     ).update(is_online=False)
     
-    Player.objects.filter(
+    came_online = Player.objects.filter(
         is_online=False,
         last_activity__gte=threshold
-    ).update(is_online=True)
\ No newline at end of file
+    ).update(is_online=True)
+
+    return {'went_offline': went_offline, 'came_online': came_online}
+
+@job()
+def refresh_tournament_details():
+    # Player and team fields (names, rank, presence) aren't in the outbox, so
+    # re-render upcoming tournaments periodically to pick those up.
+    upcoming = Tournament.objects.filter(is_active=True, start_date__gte=timezone.now())
+    for tournament in upcoming:
+        projections.rebuild(tournament)
+    return {'tournaments': len(upcoming)}
+
+@job(max_attempts=1)
+def generate_bracket(tournament_id):
+    tournament = Tournament.objects.get(id=tournament_id)
+    teams = [p.team for p in TournamentParticipant.objects.filter(tournament=tournament).select_related('team')]
+    matches_created = brackets.generate_matches(tournament, teams)
+    scheduling.schedule(tournament)
+    return {
+        'bracket_type': tournament.bracket_type,
+        'teams': len(teams),
+        'matches_created': matches_created,
+    }
+
+@job(max_attempts=1)
+def auto_assign_teams(tournament_id):
+    tournament = Tournament.objects.get(id=tournament_id)
+    started = time.perf_counter()
+    result = assignment.assign_tournament(tournament)
+    spreads = assignment.squad_spread(result)
+    return {
+        'teams_balanced': len(result),
+        'players_assigned': sum(len(squad) for squads in result.values() for squad in squads),
+        'squads_created': sum(len(squads) for squads in result.values()),
+        'squad_skill_spread': spreads,
+        'max_squad_skill_spread': max(spreads.values(), default=0),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        'algorithm_used': 'role_matching_squad_swap_search',
+    }
+
+@job(max_attempts=3, retry_delay=60)
+def recompute_player_aggregates(workers=1, restart=False):
+    # Retries resume from the checkpoint left by the failed attempt.
+    return recompute.run(workers=workers, restart=restart)
+
+@job()
+def prune_team_eligibility():
+    return {'pruned': eligibility.prune()}
+
+@job(max_attempts=1)
+def rebuild_team_eligibility():
+    return {'rows': len(eligibility.rebuild())}
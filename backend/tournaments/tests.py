@@ -1,6 +1,32 @@
-from django.test import TestCase
+import asyncio
+import io
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from unittest import mock
+from datetime import timedelta
+from django.core.cache import cache
+from django.test import TestCase, SimpleTestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.db import connection
+from django.utils import timezone
 from django.contrib.auth import get_user_model
-from .models import Team, Tournament, TournamentParticipant, TournamentMatch
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from .models import (
+    Player, Team, TeamMember, Tournament, TournamentParticipant, TournamentMatch, DomainEvent, Checkpoint, Job,
+    Squad, SquadMember, TournamentDetailProjection, PlayerMatchStats, TeamEligibility
+)
+from .realtime import InProcessBroker
+from .serializers import TournamentDetailSerializer, TournamentMatchSerializer, TeamMemberSerializer
+from .db_router import PrimaryReplicaRouter, ReplicaRoutingMiddleware, PRIMARY_COOKIE
+from . import assignment, brackets, browse, conflicts, eligibility, gamelogs, imports, jobs, loaders, matchmaking, membership, metrics, outbox, projections, recompute, rosters, scheduling, stats, sync
 
 User = get_user_model()
 
@@ -64,4 +90,1571 @@ class TournamentModelTests(TestCase):
         self.assertFalse(match.is_completed)
 
 class TournamentViewTests(TestCase):
-    pass
\ No newline at end of file
+    pass
+
+class RealtimeBrokerTests(SimpleTestCase):
+    def test_publish_reaches_channel_subscribers_only(self):
+        broker = InProcessBroker()
+
+        async def scenario():
+            watching = broker.subscribe(['tournament:1'])
+            other = broker.subscribe(['tournament:2'])
+            broker.publish('tournament:1', 'match.updated', {'id': 7})
+            message = await asyncio.wait_for(watching.get(), timeout=1)
+            self.assertTrue(other.queue.empty())
+            broker.unsubscribe(watching)
+            broker.unsubscribe(other)
+            return message
+
+        message = asyncio.run(scenario())
+        self.assertEqual(message.event, 'match.updated')
+        self.assertIn('event: match.updated\n', message.encode())
+        self.assertEqual(broker.subscriber_count('tournament:1'), 0)
+
+    def test_reconnect_replays_missed_events(self):
+        broker = InProcessBroker()
+        broker.publish('presence', 'presence.changed', {'player_id': 1})
+        broker.publish('presence', 'presence.changed', {'player_id': 2})
+
+        async def scenario():
+            subscription = broker.subscribe(['presence'], last_event_id=1)
+            return await asyncio.wait_for(subscription.get(), timeout=1)
+
+        self.assertEqual(asyncio.run(scenario()).data, {'player_id': 2})
+
+    def test_header_event_ids_are_parsed_by_the_broker(self):
+        broker = InProcessBroker()
+        broker.publish('matches', 'match.updated', {'id': 1})
+        broker.publish('matches', 'match.updated', {'id': 2})
+
+        async def scenario():
+            replayed = broker.subscribe(['matches'], last_event_id='1')
+            ignored = broker.subscribe(['matches'], last_event_id='not-an-id')
+            return await asyncio.wait_for(replayed.get(), timeout=1), ignored.queue.empty()
+
+        message, nothing_replayed = asyncio.run(scenario())
+        self.assertEqual(message.data, {'id': 2})
+        self.assertTrue(nothing_replayed)
+
+    def test_redis_listener_reconnects_and_resumes_after_errors(self):
+        from . import realtime
+
+        class Stop(BaseException):
+            pass
+
+        entry = (b'1-1', {b'body': json.dumps({'channel': 'matches', 'event': 'match.updated', 'data': {'id': 1}}).encode()})
+        client = mock.Mock()
+        client.xread.side_effect = [ConnectionError('down'), [(b'lvl:events', [entry])], ConnectionError('down again'), Stop()]
+        broker = realtime.RedisBroker.__new__(realtime.RedisBroker)
+        InProcessBroker.__init__(broker)
+        broker.stream, broker.client = 'lvl:events', client
+        with mock.patch.object(realtime.time, 'sleep') as sleep, self.assertLogs('tournaments.realtime', 'ERROR'), self.assertRaises(Stop):
+            broker._listen()
+        self.assertEqual([call.args[0] for call in client.xread.call_args_list], [{'lvl:events': '$'}, {'lvl:events': '$'}, {'lvl:events': b'1-1'}, {'lvl:events': b'1-1'}])
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [realtime.RECONNECT_DELAY, realtime.RECONNECT_DELAY])
+        self.assertEqual([message.id for message in broker._history['matches']], ['1-1'])
+
+
+class RealtimePublishTests(TestCase):
+    def test_publish_failure_after_commit_is_logged(self):
+        from . import realtime
+        broker = mock.Mock()
+        broker.publish.side_effect = ConnectionError('redis down')
+        with mock.patch.object(realtime, 'get_broker', return_value=broker), self.assertLogs('tournaments.realtime', 'ERROR'):
+            with self.captureOnCommitCallbacks(execute=True):
+                realtime.publish_on_commit('matches', 'match.updated', {'id': 1})
+        broker.publish.assert_called_once()
+
+
+class EventStreamAuthTests(TestCase):
+    def setUp(self):
+        self.player = User.objects.create_user(email='stream@test.com', username='stream', password='x')
+
+    def token(self, user):
+        return str(RefreshToken.for_user(user).access_token)
+
+    def test_streams_require_a_valid_token(self):
+        self.assertEqual(self.client.get('/api/tournaments/1/events/').status_code, 401)
+        self.assertEqual(self.client.get('/api/events/', {'channels': 'matches'}).status_code, 401)
+        self.assertEqual(self.client.get('/api/events/', {'channels': 'matches', 'token': 'garbage'}).status_code, 401)
+
+    def test_presence_is_admin_only(self):
+        response = self.client.get('/api/events/', {'channels': 'matches,presence', 'token': self.token(self.player)})
+        self.assertEqual(response.status_code, 403)
+
+@override_settings(OUTBOX_SETTLE_SECONDS=0)
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.lead = User.objects.create_user(email='lead@test.com', username='lead', password='testpass123')
+        self.member = User.objects.create_user(email='member@test.com', username='member', password='testpass123')
+        self.team = Team.objects.create(name='Outbox Team', lead_player=self.lead, join_code='OUTBOX1')
+
+    def test_writes_append_events(self):
+        membership = TeamMember.objects.create(team=self.team, player=self.member)
+        membership.role = 'CO_LEAD'
+        membership.save()
+        membership_id = membership.id
+        membership.delete()
+
+        events = list(DomainEvent.objects.filter(topic='team_member').values_list('event_type', 'object_id'))
+        self.assertEqual(events, [('created', membership_id), ('updated', membership_id), ('deleted', membership_id)])
+
+    def test_consumer_checkpoints_progress(self):
+        seen = []
+
+        class Recorder(outbox.Consumer):
+            name = 'test-recorder'
+            topics = ('team_member',)
+            batch_size = 1
+
+            def handle(self, events):
+                seen.extend(event.object_id for event in events)
+
+        TeamMember.objects.create(team=self.team, player=self.lead)
+        TeamMember.objects.create(team=self.team, player=self.member)
+
+        consumer = Recorder()
+        self.assertEqual(outbox.consume_batch(consumer), 1)
+        self.assertEqual(outbox.consume_batch(consumer), 1)
+        self.assertEqual(outbox.consume_batch(consumer), 0)
+        self.assertEqual(len(seen), 2)
+        self.assertEqual(
+            Checkpoint.objects.get(name='consumer:test-recorder').position,
+            DomainEvent.objects.filter(topic='team_member').latest('id').id
+        )
+
+@override_settings(OUTBOX_SETTLE_SECONDS=0)
+class TournamentChangeFeedTests(TestCase):
+    def setUp(self):
+        self.lead = User.objects.create_user(email='sync@test.com', username='sync', password='testpass123')
+        self.team = Team.objects.create(name='Sync Team', lead_player=self.lead, join_code='SYNC001')
+        self.tournament = Tournament.objects.create(
+            title='Sync Cup', max_players=16, mode='16v16', region='EU', level='GOLD', platform='PC',
+            start_date='2030-01-01T00:00:00Z', language='English', tournament_type='Single Elimination'
+        )
+        self.match = TournamentMatch.objects.create(tournament=self.tournament, round_number=1, match_number=1)
+
+    def test_snapshot_then_delta(self):
+        initial = sync.snapshot(self.tournament.id)
+        self.assertEqual([row['id'] for row in initial['changes']['matches']['created']], [self.match.id])
+
+        self.match.team1_score = 3
+        self.match.save()
+        participant = TournamentParticipant.objects.create(tournament=self.tournament, team=self.team)
+        doomed = TournamentMatch.objects.create(tournament=self.tournament, round_number=1, match_number=2)
+        doomed_id = doomed.id
+        doomed.delete()
+
+        delta = sync.changes_since(self.tournament.id, int(initial['token']))
+        matches = delta['changes']['matches']
+        self.assertEqual([row['team1_score'] for row in matches['updated']], [3])
+        self.assertEqual(matches['updated'][0]['row_version'], 2)
+        self.assertEqual(matches['created'], [])
+        self.assertNotIn(doomed_id, matches['deleted'])
+        self.assertEqual([row['id'] for row in delta['changes']['participants']['created']], [participant.id])
+        self.assertEqual(delta['changes']['tournament']['updated'][0]['registered_players'], 1)
+
+        self.assertEqual(sync.changes_since(self.tournament.id, int(delta['token']))['changes'], {})
+
+    @override_settings(OUTBOX_SETTLE_SECONDS=60)
+    def test_token_stops_before_unsettled_events(self):
+        settled = DomainEvent.objects.filter(tournament_id=self.tournament.id).latest('id')
+        DomainEvent.objects.filter(id__lte=settled.id).update(created_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(sync.snapshot(self.tournament.id)['token'], str(settled.id))
+
+        self.match.team1_score = 1
+        self.match.save()
+        delta = sync.changes_since(self.tournament.id, settled.id)
+        self.assertEqual([row['team1_score'] for row in delta['changes']['matches']['updated']], [1])
+        # Sent now, and again next time, since a lower id may still commit.
+        self.assertEqual(delta['token'], str(settled.id))
+
+@jobs.job(name='test_flaky', max_attempts=2, retry_delay=0)
+def flaky_job(fail):
+    if fail:
+        raise RuntimeError('boom')
+    return {'ok': True}
+
+class JobRunnerTests(TestCase):
+    def test_worker_runs_queued_job(self):
+        queued = jobs.enqueue('test_flaky', {'fail': False})
+        jobs.run_worker(once=True)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'SUCCEEDED')
+        self.assertEqual(queued.result, {'ok': True})
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        queued = jobs.enqueue('test_flaky', {'fail': True})
+        jobs.run_worker(once=True)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, 'FAILED')
+        self.assertEqual(queued.attempts, 2)
+        self.assertIn('boom', queued.error)
+
+    def test_failed_attempts_are_logged(self):
+        jobs.enqueue('test_flaky', {'fail': True})
+        with self.assertLogs('tournaments.jobs', level='ERROR') as logs:
+            jobs.run_worker(once=True)
+        self.assertTrue(any('test_flaky' in line for line in logs.output))
+
+    def test_abandoned_job_is_rerun_only_while_attempts_remain(self):
+        stale = timezone.now() - timedelta(hours=1)
+        retry = Job.objects.create(name='test_flaky', kwargs={'fail': False}, max_attempts=2, attempts=1, status='RUNNING', locked_by='gone', locked_at=stale)
+        spent = Job.objects.create(name='test_flaky', kwargs={'fail': False}, max_attempts=1, attempts=1, status='RUNNING', locked_by='gone', locked_at=stale)
+        with self.assertLogs('tournaments.jobs', level='ERROR'):
+            claimed = jobs.claim('worker', limit=10)
+        self.assertEqual([job.pk for job in claimed], [retry.pk])
+        spent.refresh_from_db()
+        self.assertEqual((spent.status, spent.attempts, spent.locked_at), ('FAILED', 1, None))
+        self.assertIn('stopped responding', spent.error)
+
+    def test_heartbeat_keeps_a_long_job_claimed(self):
+        stale = timezone.now() - timedelta(hours=1)
+        running = Job.objects.create(name='test_flaky', kwargs={'fail': False}, max_attempts=2, attempts=1, status='RUNNING', locked_by='busy', locked_at=stale)
+        jobs.Heartbeat(running).beat()
+        self.assertEqual(jobs.claim('worker', limit=10), [])
+        running.refresh_from_db()
+        self.assertEqual((running.status, running.locked_by), ('RUNNING', 'busy'))
+
+    @override_settings(JOBS_PERIODIC={'update_online_statuses': 60})
+    def test_periodic_jobs_are_enqueued_once_per_interval(self):
+        jobs.schedule_periodic()
+        jobs.schedule_periodic()
+        self.assertEqual(Job.objects.filter(name='update_online_statuses').count(), 1)
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='admin@test.com', username='admin', password='testpass123', is_admin=True)
+        self.team = Team.objects.create(name='Export Team', lead_player=self.admin, join_code='EXPORT1')
+        self.tournament = Tournament.objects.create(
+            title='Export Cup', max_players=16, mode='16v16', region='EU', level='GOLD', platform='PC',
+            start_date='2030-01-01T00:00:00Z', language='English', tournament_type='Single Elimination'
+        )
+        TournamentParticipant.objects.create(tournament=self.tournament, team=self.team)
+        TournamentMatch.objects.create(tournament=self.tournament, round_number=1, match_number=1, team1=self.team, team1_score=5)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_csv_export_streams_flat_rows(self):
+        response = self.client.get(f'/api/tournaments/{self.tournament.id}/exports/matches.csv')
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertTrue(lines[0].startswith('id,round_number,match_number'))
+        self.assertIn('Export Team,5', lines[1])
+
+    def test_ndjson_participants_include_squadless_teams(self):
+        response = self.client.get(f'/api/tournaments/{self.tournament.id}/exports/participants.ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['team__name'], 'Export Team')
+        self.assertIsNone(rows[0]['squads__id'])
+
+    def test_asgi_exports_are_streamed_asynchronously(self):
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncClient
+        token = str(RefreshToken.for_user(self.admin).access_token)
+
+        async def fetch():
+            response = await AsyncClient().get(
+                f'/api/tournaments/{self.tournament.id}/exports/matches.csv', headers={'Authorization': f'Bearer {token}'}
+            )
+            return response, b''.join([chunk async for chunk in response.streaming_content])
+
+        response, body = async_to_sync(fetch)()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        self.assertIn('Export Team,5', body.decode().splitlines()[1])
+
+    def test_exports_require_admin(self):
+        self.client.force_authenticate(User.objects.create_user(email='x@test.com', username='x', password='testpass123'))
+        self.assertEqual(self.client.get('/api/exports/players.csv').status_code, 403)
+
+class ImportPipelineTests(TestCase):
+    def rows(self, text):
+        return imports.read_rows(io.BytesIO(text.encode()), 'csv')
+
+    def test_players_then_teams_then_members(self):
+        User.objects.create_user(email='taken@test.com', username='taken', password='testpass123')
+        players = imports.PlayerImporter().run(self.rows(
+            'email,username,discord_id,tier\n'
+            'a@test.com,alpha,111,gold\n'
+            'b@test.com,bravo,,\n'
+            'TAKEN@test.com,someone,,\n'
+        ))
+        self.assertEqual((players.created, players.skipped, players.errors), (2, 1, []))
+        self.assertEqual(User.objects.get(username='alpha').tier, 'GOLD')
+        self.assertFalse(User.objects.get(username='alpha').has_usable_password())
+
+        teams = imports.TeamImporter().run(self.rows('name,lead\nAlpha Squad,111\n'))
+        self.assertEqual(teams.created, 1)
+        team = Team.objects.get(name='Alpha Squad')
+        self.assertEqual(team.members.get().role, 'CAPTAIN')
+
+        members = imports.TeamMemberImporter().run(self.rows(
+            f'team,player,role\n{team.join_code},b@test.com,\n{team.join_code},alpha,\n'
+        ))
+        self.assertEqual((members.created, members.skipped), (1, 1))
+
+    def test_invalid_rows_block_the_commit(self):
+        result = imports.PlayerImporter().run(self.rows('email,username,tier\nok@test.com,ok,\nbad@test.com,bad,WOOD\n'))
+        self.assertEqual(result.errors[0]['row'], 2)
+        self.assertEqual(result.created, 0)
+        self.assertFalse(User.objects.filter(username='ok').exists())
+
+    def test_ndjson_values_are_coerced_and_bad_lines_reported(self):
+        result = imports.PlayerImporter(partial=True).run(imports.read_rows(io.BytesIO(
+            b'{"email": "n@test.com", "username": "numbers", "discord_id": 4242, "skill_rating": 1500}\n'
+            b'[1, 2]\n'
+            b'"x"\n'
+            b'{"email": "l@test.com", "username": "listy", "skill_rating": [1]}\n'
+            b'{not json\n'
+        ), 'ndjson'))
+        self.assertEqual(result.created, 1)
+        self.assertEqual([error['row'] for error in result.errors], [2, 3, 4, 5])
+        player = User.objects.get(username='numbers')
+        self.assertEqual((player.discord_id, player.skill_rating), ('4242', 1500))
+
+    @override_settings(OUTBOX_SETTLE_SECONDS=0)
+    def test_naive_tournament_start_dates_are_made_aware(self):
+        index = browse.BrowseIndex()
+        index.load()
+        result = imports.TournamentImporter().run(self.rows(
+            'title,max_players,mode,region,level,platform,start_date,language,tournament_type\n'
+            'Naive Cup,32,16v16,EU,GOLD,PC,2030-01-01T10:00:00,English,x\n'
+        ))
+        self.assertEqual((result.created, result.errors), (1, []))
+        tournament = Tournament.objects.get(title='Naive Cup')
+        self.assertEqual(tournament.start_date, timezone.make_aware(timezone.datetime(2030, 1, 1, 10)))
+
+        # Events written before the fix still carry naive strings.
+        payload = dict(DomainEvent.objects.get(topic='tournament', object_id=tournament.id).payload, id=tournament.id + 1, start_date='2030-01-02T10:00:00')
+        DomainEvent.objects.create(topic='tournament', event_type='created', object_id=tournament.id + 1, tournament_id=tournament.id + 1, payload=payload)
+        index.catch_up()
+        ids, count, _ = index.search({}, timezone.now())
+        self.assertEqual(ids[-2:], [tournament.id, tournament.id + 1])
+
+class ReplicaRoutingTests(SimpleTestCase):
+    def route(self, request, write=False):
+        router = PrimaryReplicaRouter()
+        seen = {}
+
+        def view(request):
+            if write:
+                router.db_for_write(Team)
+            seen['read'] = router.db_for_read(Team)
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(view)(request)
+        return seen['read'], response
+
+    def test_safe_requests_read_from_replica(self):
+        alias, response = self.route(RequestFactory().get('/api/teams/'))
+        self.assertEqual(alias, 'replica')
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+
+    def test_writes_pin_client_to_primary(self):
+        alias, response = self.route(RequestFactory().post('/api/teams/'))
+        self.assertEqual(alias, 'default')
+        cookie = response.cookies[PRIMARY_COOKIE].value
+
+        factory = RequestFactory()
+        factory.cookies[PRIMARY_COOKIE] = cookie
+        alias, _ = self.route(factory.get('/api/teams/'))
+        self.assertEqual(alias, 'default')
+
+    def test_token_clients_are_pinned_without_cookies(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        def bearer(user_id):
+            token = AccessToken()
+            token['user_id'] = user_id
+            return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+        cache.delete_many(['db_primary_until:9001', 'db_primary_until:9002'])
+        _, response = self.route(RequestFactory().post('/api/teams/', **bearer(9001)))
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+        self.assertEqual(self.route(RequestFactory().get('/api/teams/', **bearer(9001)))[0], 'default')
+        self.assertEqual(self.route(RequestFactory().get('/api/teams/', **bearer(9002)))[0], 'replica')
+
+    def test_reads_after_a_write_in_the_same_request_use_primary(self):
+        alias, response = self.route(RequestFactory().get('/api/teams/'), write=True)
+        self.assertEqual(alias, 'default')
+        self.assertIn(PRIMARY_COOKIE, response.cookies)
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(PrimaryReplicaRouter().db_for_read(Team), 'default')
+
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.profile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.profile_dir.cleanup)
+        self.admin = User.objects.create_user(email='prof@test.com', username='prof', password='testpass123', is_admin=True)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.admin).access_token}')
+
+    def test_admin_header_stores_downloadable_profile(self):
+        with self.settings(PROFILING_DIR=self.profile_dir.name):
+            response = self.client.get('/api/admin/stats/', HTTP_X_PROFILE='1')
+            profile_id = response['X-Profile-Id']
+
+            detail = self.client.get(f'/api/admin/profiles/{profile_id}/').json()
+            self.assertEqual(detail['path'], '/api/admin/stats/')
+            self.assertGreater(detail['sql']['default']['count'], 0)
+
+            download = self.client.get(f'/api/admin/profiles/{profile_id}/?download=1')
+            self.assertEqual(download.status_code, 200)
+
+    def test_non_admin_header_is_ignored(self):
+        player = User.objects.create_user(email='np@test.com', username='np', password='testpass123')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(player).access_token}')
+        with self.settings(PROFILING_DIR=self.profile_dir.name):
+            response = self.client.get('/api/admin/stats/', HTTP_X_PROFILE='1')
+        self.assertNotIn('X-Profile-Id', response)
+
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        self.metrics_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.metrics_dir.cleanup)
+        admin = User.objects.create_user(email='timing@test.com', username='timing', password='testpass123', is_admin=True)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(admin).access_token}')
+
+    def test_response_carries_phase_breakdown(self):
+        Tournament.objects.create(
+            title='Timed', max_players=64, mode='64v64', region='NA', level='ALL',
+            platform='PC', start_date='2030-01-01T00:00:00Z', language='English', tournament_type='x'
+        )
+        with self.settings(METRICS_DIR=self.metrics_dir.name):
+            response = self.client.get('/api/tournaments/')
+        phases = dict(part.split(';dur=') for part in response['Server-Timing'].split(', '))
+        self.assertEqual(set(phases), set(metrics.PHASES))
+        self.assertGreater(float(phases['db']), 0)
+        self.assertGreater(float(phases['ser']), 0)
+        self.assertGreaterEqual(float(phases['total']), float(phases['render']))
+
+    def test_metrics_endpoint_merges_other_processes(self):
+        other = {'tournament-list\ttotal': {'buckets': [2] + [0] * len(metrics.BUCKETS_MS), 'sum': 0.004}}
+        with self.settings(METRICS_DIR=self.metrics_dir.name):
+            self.client.get('/api/tournaments/')
+            before = metrics.collect()['tournament-list\ttotal']
+            with open(f'{self.metrics_dir.name}/{os.getppid()}-other.json', 'w') as f:
+                json.dump(other, f)
+            body = self.client.get('/api/metrics/').content.decode()
+        count = sum(before['buckets']) + 2
+        self.assertIn(f'lvl_request_phase_seconds_count{{view="tournament-list",phase="total"}} {count}', body)
+
+    def test_files_of_exited_workers_are_removed(self):
+        exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+        exited.wait()
+        path = f'{self.metrics_dir.name}/{exited.pid}-gone.json'
+        with open(path, 'w') as f:
+            json.dump({'tournament-list\ttotal': {'buckets': [5] + [0] * len(metrics.BUCKETS_MS), 'sum': 1.0}}, f)
+        with self.settings(METRICS_DIR=self.metrics_dir.name):
+            self.assertEqual(metrics.collect(), metrics.registry.snapshot())
+        self.assertFalse(os.path.exists(path))
+
+    def test_unwritable_metrics_dir_does_not_fail_requests(self):
+        blocked = f'{self.metrics_dir.name}/not-a-directory'
+        open(blocked, 'w').close()
+        metrics.registry.last_flush = 0
+        with self.settings(METRICS_DIR=blocked), self.assertLogs('tournaments.metrics', 'ERROR'):
+            self.assertEqual(self.client.get('/api/tournaments/').status_code, 200)
+
+    def test_concurrent_flushes_do_not_collide(self):
+        import threading
+        errors = []
+
+        def flush():
+            try:
+                for _ in range(20):
+                    metrics.registry.flush()
+            except Exception as e:
+                errors.append(e)
+
+        with self.settings(METRICS_DIR=self.metrics_dir.name):
+            threads = [threading.Thread(target=flush) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(os.listdir(self.metrics_dir.name), [metrics.own_file_name()])
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_metrics_endpoint_requires_admin_or_token(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 200)
+        player = User.objects.create_user(email='nometrics@test.com', username='nometrics', password='x')
+        anonymous = APIClient()
+        self.assertEqual(anonymous.get('/api/metrics/').status_code, 403)
+        anonymous.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(player).access_token}')
+        self.assertEqual(anonymous.get('/api/metrics/').status_code, 403)
+        anonymous.credentials(HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(anonymous.get('/api/metrics/').status_code, 200)
+
+class HotQueryIndexTests(TestCase):
+    """Each hot view queryset must be answered from an index on a realistically sized table."""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        levels = [key for key, _ in Tournament.LEVEL_CHOICES]
+        tournaments = Tournament.objects.bulk_create([
+            Tournament(
+                title=f'T{i}', max_players=64, mode='64v64', region='NA', level=levels[i % len(levels)],
+                platform='PC', start_date=now + timedelta(hours=i - 4000), language='English',
+                tournament_type='x', is_active=i % 10 == 0,
+            )
+            for i in range(5000)
+        ])
+        players = User.objects.bulk_create([
+            User(email=f'idx{i}@test.com', username=f'idx{i}', password='!') for i in range(2000)
+        ])
+        teams = Team.objects.bulk_create([
+            Team(name=f'Idx{i}', lead_player=players[i], join_code=f'IDX{i:06d}') for i in range(200)
+        ])
+        TournamentParticipant.objects.bulk_create([
+            TournamentParticipant(team=teams[i % 200], tournament=tournaments[i]) for i in range(4000)
+        ])
+        TournamentMatch.objects.bulk_create([
+            TournamentMatch(
+                tournament=tournaments[i // 2], round_number=1, match_number=i % 2,
+                scheduled_time=now + timedelta(minutes=i),
+            )
+            for i in range(8000)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cls.team = teams[0]
+
+    def plans(self, call, table):
+        """EXPLAIN output of each query on ``table`` that ``call`` runs."""
+        with CaptureQueriesContext(connection) as queries:
+            call()
+        statements = [query['sql'] for query in queries if f'FROM "{table}"' in query['sql']]
+        self.assertTrue(statements, f'no query on {table}')
+        plans = []
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}')
+                plans.append('\n'.join(str(row[-1]) for row in cursor.fetchall()))
+        return plans
+
+    def assertUsesIndex(self, call, table, index):
+        plans = self.plans(call, table)
+        self.assertTrue(any(index in plan for plan in plans), plans)
+
+    def assertNoFullScan(self, call, table):
+        for plan in self.plans(call, table):
+            for line in plan.splitlines():
+                self.assertNotRegex(line, rf'Seq Scan on {table}\b|SCAN {table}$')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def test_upcoming_tournaments(self):
+        self.assertUsesIndex(
+            lambda: APIClient().get('/api/upcoming_tournaments/'), 'tournaments_tournament', 'tournament_active_start'
+        )
+
+    def test_available_tournaments(self):
+        # The available feed is filled per team from the open tournaments of its tier.
+        self.assertUsesIndex(
+            lambda: eligibility.refresh_teams([self.team.id]), 'tournaments_tournament', 'tournament_active_level_start'
+        )
+
+    def test_recent_matches(self):
+        # Depending on how many tournaments are active the planner either walks
+        # match_scheduled_time or the active tournaments; neither scans all matches.
+        self.assertNoFullScan(lambda: APIClient().get('/api/matches/'), 'tournaments_tournamentmatch')
+
+    def test_online_players(self):
+        client = self.client_for(self.team.lead_player)
+        plans = self.plans(lambda: client.get('/api/member-stats/'), 'tournaments_player')
+        # Online now and active today are range searches; the third query is the plain total.
+        self.assertEqual(sum('player_last_activity (last_activity>' in plan or 'Index Cond' in plan for plan in plans), 2, plans)
+
+    def test_team_registrations(self):
+        client = self.client_for(self.team.lead_player)
+        self.assertUsesIndex(
+            lambda: client.get('/api/tournaments/registered/', {'team_id': self.team.id}),
+            'tournaments_tournamentparticipant', 'participant_team_registered'
+        )
+
+
+@override_settings(OUTBOX_SETTLE_SECONDS=0)
+class TournamentDetailProjectionTests(TestCase):
+    def setUp(self):
+        self.tournament = Tournament.objects.create(
+            title='Projected', max_players=64, mode='64v64', region='NA', level='GOLD', platform='PC',
+            start_date=timezone.now() + timedelta(days=2), language='English', tournament_type='x'
+        )
+        self.players = [
+            User.objects.create_user(email=f'proj{i}@test.com', username=f'proj{i}', password='testpass123')
+            for i in range(3)
+        ]
+        self.team = Team.objects.create(name='Projection Team', lead_player=self.players[0], join_code='PROJ1')
+        self.participant = TournamentParticipant.objects.create(tournament=self.tournament, team=self.team)
+        self.squad = Squad.objects.create(participant=self.participant, squad_type='INFANTRY')
+        SquadMember.objects.create(squad=self.squad, player=self.players[0], role='LEADER')
+        self.consumer = outbox.get_consumer('tournament_detail')
+
+    def expected(self):
+        return json.loads(json.dumps(TournamentDetailSerializer(self.tournament).data))
+
+    def drain(self):
+        while outbox.consume_batch(self.consumer):
+            pass
+
+    def test_consumer_keeps_document_in_sync(self):
+        self.drain()
+        projection = TournamentDetailProjection.objects.get(pk=self.tournament.pk)
+        self.assertEqual(projection.as_document(), self.expected())
+
+        SquadMember.objects.create(squad=self.squad, player=self.players[1])
+        self.drain()
+        projection.refresh_from_db()
+        self.assertEqual(len(projection.as_document()['teams'][0]['squads'][0]['members']), 2)
+        self.assertEqual(projection.as_document(), self.expected())
+
+        self.participant.delete()
+        self.drain()
+        projection.refresh_from_db()
+        self.assertEqual(projection.as_document()['teams'], [])
+
+    def test_change_rerenders_only_the_affected_participant(self):
+        other_team = Team.objects.create(name='Other', lead_player=self.players[2], join_code='PROJ2')
+        TournamentParticipant.objects.create(tournament=self.tournament, team=other_team)
+        self.drain()
+
+        SquadMember.objects.create(squad=self.squad, player=self.players[1])
+        rendered = []
+        original = projections.TournamentParticipantTeamSerializer.to_representation
+        def spy(serializer, instance):
+            rendered.append(instance.pk)
+            return original(serializer, instance)
+        projections.TournamentParticipantTeamSerializer.to_representation = spy
+        try:
+            self.drain()
+        finally:
+            projections.TournamentParticipantTeamSerializer.to_representation = original
+        self.assertEqual(rendered, [self.participant.pk])
+
+    def test_upcoming_view_reads_projection_in_one_query(self):
+        self.drain()
+        with self.assertNumQueries(1):
+            response = APIClient().get('/api/upcoming_tournament/')
+        self.assertEqual(response.json(), self.expected())
+
+    def test_upcoming_view_builds_missing_projection(self):
+        response = APIClient().get('/api/upcoming_tournament/')
+        self.assertEqual(response.json(), self.expected())
+        self.assertTrue(TournamentDetailProjection.objects.filter(pk=self.tournament.pk).exists())
+
+
+class BracketEndpointTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='bracket@test.com', username='bracket', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tournament = Tournament.objects.create(
+            title='Bracket', max_players=8, mode='16v16', region='EU', level='GOLD', platform='PC',
+            start_date=timezone.now(), language='English', tournament_type='x', bracket_type='SINGLE_ELIM'
+        )
+        leads = [User.objects.create_user(email=f'b{i}@test.com', username=f'b{i}', password='x') for i in range(4)]
+        self.teams = [Team.objects.create(name=f'B{i}', lead_player=lead, join_code=f'BRK{i}') for i, lead in enumerate(leads)]
+        brackets.generate_matches(self.tournament, self.teams)
+
+    def test_bracket_is_normalised_with_advancement(self):
+        with self.assertNumQueries(2):
+            brackets.bracket_payload(self.tournament)
+        payload = self.client.get(f'/api/tournaments/{self.tournament.id}/bracket/').json()
+        self.assertEqual(payload['rounds'], [[1, 0, 2], [2, 2, 1]])
+        self.assertEqual(len(payload['teams']), 4)
+        fields = payload['match_fields']
+        first, second, final = (dict(zip(fields, row)) for row in payload['matches'])
+        self.assertEqual((first['next'], first['slot']), (2, 0))
+        self.assertEqual((second['next'], second['slot']), (2, 1))
+        self.assertIsNone(final['next'])
+        self.assertIsNone(final['team1'])
+        team_names = {payload['teams'][first['team1']][1], payload['teams'][first['team2']][1]}
+        self.assertEqual(len(team_names), 2)
+
+    def test_failed_regeneration_keeps_the_existing_bracket(self):
+        existing = set(TournamentMatch.objects.filter(tournament=self.tournament).values_list('id', flat=True))
+        failing = mock.Mock(side_effect=RuntimeError('generator failed'))
+        with mock.patch.dict(brackets.GENERATORS, {'SINGLE_ELIM': failing}), self.assertRaises(RuntimeError):
+            brackets.generate_matches(self.tournament, self.teams)
+        self.assertEqual(set(TournamentMatch.objects.filter(tournament=self.tournament).values_list('id', flat=True)), existing)
+
+    def test_msgpack_encoding(self):
+        import msgpack
+        response = self.client.get(f'/api/tournaments/{self.tournament.id}/bracket/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        json_payload = self.client.get(f'/api/tournaments/{self.tournament.id}/bracket/').json()
+        self.assertEqual(msgpack.unpackb(response.content), json_payload)
+
+
+class AutoBalanceTests(TestCase):
+    def setUp(self):
+        self.tournament = Tournament.objects.create(
+            title='Balance', max_players=128, mode='64v64', region='EU', level='GOLD', platform='PC',
+            start_date=timezone.now() + timedelta(days=1), language='English', tournament_type='x'
+        )
+        tiers = [key for key, _ in Player.TIER_CHOICES]
+        roles = [['INFANTRY'], ['ARMOR'], ['HELI'], ['JET'], []]
+        players = User.objects.bulk_create([
+            User(
+                email=f'bal{i}@test.com', username=f'bal{i}', password='!',
+                skill_rating=600 + (i * 37) % 1400, tier=tiers[i % 5], preferred_roles=roles[i % 5],
+            )
+            for i in range(128)
+        ])
+        teams = Team.objects.bulk_create([
+            Team(name=f'Clan {i}', lead_player=players[i], join_code=f'BAL{i}') for i in range(2)
+        ])
+        # A stacked clan and a weak one; neither may borrow the other's players.
+        ordered = sorted(players, key=lambda player: -player.skill_rating)
+        TeamMember.objects.bulk_create([
+            TeamMember(team=teams[0] if index < 64 else teams[1], player=player)
+            for index, player in enumerate(ordered)
+        ])
+        for team in teams:
+            TournamentParticipant.objects.create(tournament=self.tournament, team=team)
+
+    def test_64v64_is_balanced_quickly(self):
+        import time
+        started = time.perf_counter()
+        result = assignment.solve_tournament(self.tournament)
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+        for participant in TournamentParticipant.objects.filter(tournament=self.tournament):
+            side = result[participant.id]
+            self.assertEqual(
+                {player['id'] for squad in side for player, _, _ in squad},
+                set(TeamMember.objects.filter(team=participant.team).values_list('player_id', flat=True)),
+            )
+            self.assertEqual(len(side), 8)
+            self.assertTrue(all(len(squad) == 8 for squad in side))
+        self.assertLess(max(assignment.squad_spread(result).values()), 150)
+
+    def test_captain_keeps_the_role_within_their_own_team(self):
+        participant = TournamentParticipant.objects.filter(tournament=self.tournament).first()
+        captain = TeamMember.objects.filter(team=participant.team).first()
+        captain.role = 'CAPTAIN'
+        captain.save()
+        side = assignment.solve_tournament(self.tournament)[participant.id]
+        self.assertEqual([player['id'] for squad in side for player, _, role in squad if role == 'CAPTAIN'], [captain.player_id])
+
+    def test_job_persists_squads_with_one_leader_each(self):
+        from .tasks import auto_assign_teams
+        result = auto_assign_teams(tournament_id=self.tournament.id)
+        self.assertEqual(result['players_assigned'], 128)
+        self.assertEqual(result['algorithm_used'], 'role_matching_squad_swap_search')
+        self.assertLess(result['max_squad_skill_spread'], 150)
+        self.assertEqual(Squad.objects.filter(participant__tournament=self.tournament).count(), 16)
+        self.assertEqual(SquadMember.objects.filter(squad__participant__tournament=self.tournament).count(), 128)
+        self.assertEqual(SquadMember.objects.filter(role='LEADER').count(), 16)
+        self.assertEqual(DomainEvent.objects.filter(topic='squad_member', event_type='created').count(), 128)
+
+
+class SquadAssignmentTests(TestCase):
+    def test_hungarian_matches_brute_force(self):
+        import itertools
+        import numpy as np
+        rng = np.random.default_rng(7)
+        for _ in range(20):
+            cost = rng.integers(0, 20, size=(5, 6)).astype(float)
+            best = min(sum(cost[row, column] for row, column in enumerate(columns))
+                       for columns in itertools.permutations(range(6), 5))
+            chosen = assignment.hungarian(cost)
+            self.assertEqual(len(set(chosen)), 5)
+            self.assertEqual(cost[np.arange(5), chosen].sum(), best)
+
+    def test_participant_squads_follow_preferences_with_one_leader_each(self):
+        tournament = Tournament.objects.create(
+            title='Squads', max_players=64, mode='32v32', region='EU', level='GOLD', platform='PC',
+            start_date=timezone.now() + timedelta(days=1), language='English', tournament_type='x'
+        )
+        preferences = [['JET']] * 2 + [['HELI', 'INFANTRY']] * 3 + [['ARMOR']] * 6 + [['INFANTRY']] * 21
+        players = User.objects.bulk_create([
+            User(email=f'sq{i}@test.com', username=f'sq{i}', password='!', skill_rating=800 + 15 * i, preferred_roles=roles)
+            for i, roles in enumerate(preferences)
+        ])
+        team = Team.objects.create(name='Squad Team', lead_player=players[-1], join_code='SQUAD1')
+        TeamMember.objects.bulk_create([
+            TeamMember(team=team, player=player, role='CAPTAIN' if player == players[-1] else 'MEMBER') for player in players
+        ])
+        participant = TournamentParticipant.objects.create(tournament=tournament, team=team)
+        client = APIClient()
+        client.force_authenticate(players[-1])
+
+        response = client.post(f'/api/tournament-participants/{participant.id}/assign_squads/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 6)
+
+        members = SquadMember.objects.filter(squad__participant=participant)
+        self.assertEqual(members.count(), 32)
+        for squad in Squad.objects.filter(participant=participant):
+            self.assertEqual(squad.members.filter(role='LEADER').count(), 1)
+        self.assertEqual(members.get(role='CAPTAIN').player, players[-1])
+        roles = {member.player_id: member.action_role for member in members}
+        self.assertEqual([roles[player.id] for player in players[:2]], ['JET', 'JET'])
+        self.assertEqual([roles[player.id] for player in players[2:5]], ['HELI'] * 3)
+        self.assertEqual([roles[player.id] for player in players[5:11]], ['ARMOR'] * 6)
+
+
+class BulkRosterTests(TestCase):
+    def setUp(self):
+        self.lead = User.objects.create_user(email='rlead@test.com', username='rlead', password='testpass123')
+        self.team = Team.objects.create(name='Roster', lead_player=self.lead, join_code='ROSTER1')
+        TeamMember.objects.create(team=self.team, player=self.lead, role='CAPTAIN')
+        self.players = User.objects.bulk_create([
+            User(email=f'r{i}@test.com', username=f'r{i}', password='!', discord_id=f'disc{i}') for i in range(40)
+        ])
+        TeamMember.objects.bulk_create([TeamMember(team=self.team, player=player) for player in self.players[:10]])
+        self.client = APIClient()
+        self.client.force_authenticate(self.lead)
+
+    def post(self, operations):
+        return self.client.post('/api/team/manage/bulk/', {'team_id': self.team.id, 'operations': operations}, format='json')
+
+    def test_mixed_batch_is_applied_with_constant_queries(self):
+        operations = (
+            [{'action': 'add_member', 'search_value': f'r{i}@test.com'} for i in range(10, 25)]
+            + [{'action': 'add_member', 'search_value': f'disc{i}', 'role': 'CO_LEAD'} for i in range(25, 40)]
+            + [{'action': 'remove_member', 'player_id': player.id} for player in self.players[:5]]
+            + [{'action': 'change_role', 'player_id': player.id, 'new_role': 'CO_LEAD'} for player in self.players[5:10]]
+        )
+        events_before = DomainEvent.objects.count()
+        response = self.post(operations)
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        self.assertEqual((len(body['added']), len(body['removed']), len(body['role_changes'])), (30, 5, 5))
+        self.assertEqual(TeamMember.objects.filter(team=self.team).count(), 36)
+        self.assertEqual(TeamMember.objects.filter(team=self.team, role='CO_LEAD').count(), 20)
+        self.assertEqual(DomainEvent.objects.count() - events_before, 40)
+
+        team = Team.objects.get(pk=self.team.pk)
+        more = [{'action': 'add_member', 'search_value': f'r{i}'} for i in range(5)]
+        with self.assertNumQueries(6):
+            # resolve, roster, savepoint pair, bulk insert, outbox insert
+            rosters.apply_operations(team, more)
+
+    def test_invalid_operation_rejects_whole_batch(self):
+        response = self.post([
+            {'action': 'add_member', 'search_value': 'r20@test.com'},
+            {'action': 'remove_member', 'player_id': self.lead.id},
+            {'action': 'add_member', 'search_value': 'nobody@test.com'},
+            {'action': 'change_role', 'player_id': self.players[0].id, 'new_role': 'KING'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.json()['errors']], [1, 2, 3])
+        self.assertFalse(TeamMember.objects.filter(player=self.players[20]).exists())
+
+    def test_remove_then_add_back_in_one_batch(self):
+        player = self.players[0]
+        response = self.post([
+            {'action': 'remove_member', 'player_id': player.id},
+            {'action': 'add_member', 'search_value': player.username, 'role': 'CO_LEAD'},
+        ])
+        self.assertEqual(response.json()['role_changes'], [{'player_id': player.id, 'role': 'CO_LEAD'}])
+        self.assertEqual(TeamMember.objects.get(team=self.team, player=player).role, 'CO_LEAD')
+
+
+class PlayerMatchStatsTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='stats@test.com', username='stats', password='x', is_admin=True, is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        tournament = Tournament.objects.create(
+            title='Stats', max_players=128, mode='64v64', region='EU', level='GOLD', platform='PC',
+            start_date=timezone.now(), language='English', tournament_type='x'
+        )
+        self.players = User.objects.bulk_create([
+            User(email=f'st{i}@test.com', username=f'st{i}', password='!') for i in range(128)
+        ])
+        self.red = Team.objects.create(name='Red', lead_player=self.players[0], join_code='RED1')
+        self.blue = Team.objects.create(name='Blue', lead_player=self.players[1], join_code='BLUE1')
+        self.match = TournamentMatch.objects.create(
+            tournament=tournament, round_number=1, match_number=1, team1=self.red, team2=self.blue, winner=self.red
+        )
+
+    def lines(self, kills):
+        return [
+            {'player_id': player.id, 'team_id': (self.red if i % 2 == 0 else self.blue).id,
+             'kills': kills, 'deaths': 2, 'assists': 1, 'score': 100 * kills}
+            for i, player in enumerate(self.players)
+        ]
+
+    def test_full_match_updates_running_sums_in_one_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f'/api/tournament-matches/{self.match.id}/stats/', {'lines': self.lines(4)}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(sum(1 for query in queries if query['sql'].startswith('UPDATE "tournaments_player" SET "total_kills"')), 1)
+
+        winner, loser = Player.objects.get(pk=self.players[0].pk), Player.objects.get(pk=self.players[1].pk)
+        self.assertEqual((winner.total_kills, winner.total_deaths, winner.matches_played, winner.matches_won), (4, 2, 1, 1))
+        self.assertEqual(winner.kill_death_ratio, 2.0)
+        self.assertEqual(winner.win_rate, 100.0)
+        self.assertEqual(loser.win_rate, 0.0)
+        self.assertEqual(PlayerMatchStats.objects.filter(match=self.match).count(), 128)
+
+    def test_reupload_applies_only_the_difference(self):
+        self.client.post(f'/api/tournament-matches/{self.match.id}/stats/', {'lines': self.lines(4)}, format='json')
+        self.client.post(f'/api/tournament-matches/{self.match.id}/stats/', {'lines': self.lines(6)[:100]}, format='json')
+        kept, dropped = Player.objects.get(pk=self.players[0].pk), Player.objects.get(pk=self.players[127].pk)
+        self.assertEqual((kept.total_kills, kept.matches_played, kept.points), (6, 1, 600))
+        self.assertEqual((dropped.total_kills, dropped.matches_played, dropped.points), (0, 0, 0))
+
+    def test_invalid_lines_are_rejected(self):
+        lines = self.lines(1)[:2] + [{'player_id': 999999}, {'player_id': self.players[0].id}, {'player_id': self.players[5].id, 'kills': -1}]
+        response = self.client.post(f'/api/tournament-matches/{self.match.id}/stats/', {'lines': lines}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['line'] for error in response.json()['errors']], [2, 3, 4])
+        self.assertFalse(PlayerMatchStats.objects.exists())
+
+    def test_won_must_be_a_boolean(self):
+        lines = self.lines(1)[:4]
+        lines[0]['won'], lines[1]['won'], lines[2]['won'], lines[3]['won'] = False, 1, 'false', '0'
+        response = self.client.post(f'/api/tournament-matches/{self.match.id}/stats/', {'lines': lines}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'], [{'line': 2, 'error': 'won must be true or false'}, {'line': 3, 'error': 'won must be true or false'}])
+
+        response = self.client.post(f'/api/tournament-matches/{self.match.id}/stats/', {'lines': lines[:2]}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(dict(PlayerMatchStats.objects.values_list('player_id', 'won')), {self.players[0].id: False, self.players[1].id: True})
+
+
+class GameLogIngestTests(TestCase):
+    def setUp(self):
+        tournament = Tournament.objects.create(
+            title='Logs', max_players=32, mode='16v16', region='EU', level='GOLD', platform='PC',
+            start_date=timezone.now(), language='English', tournament_type='x'
+        )
+        self.players = User.objects.bulk_create([User(email=f'gl{i}@test.com', username=f'gl{i}', password='!') for i in range(4)])
+        self.red = Team.objects.create(name='Red', lead_player=self.players[0], join_code='GLRED')
+        self.blue = Team.objects.create(name='Blue', lead_player=self.players[2], join_code='GLBLUE')
+        self.match = TournamentMatch.objects.create(tournament=tournament, round_number=1, match_number=1, team1=self.red, team2=self.blue)
+
+    def write_log(self, body):
+        handle = tempfile.NamedTemporaryFile('w', suffix='.log', delete=False)
+        with handle:
+            handle.write(body)
+        self.addCleanup(os.unlink, handle.name)
+        return handle.name
+
+    def test_log_sets_scores_and_player_stats(self):
+        m = self.match.id
+        path = self.write_log('\n'.join([
+            f'T0 MATCH_START match={m}',
+            f'T0 PLAYER match={m} player=gl0 side=1',
+            f'T0 PLAYER match={m} player=gl1 side=1',
+            f'T0 PLAYER match={m} player=gl2 side=2',
+            f'T0 PLAYER match={m} player=ghost side=2',
+            'T0 MATCH_START match=999',
+            f'T1 KILL match={m} killer=gl0 victim=gl2 assist=gl1',
+            f'T1 KILL match={m} killer=gl0 victim=gl2',
+            f'T1 KILL match={m} killer=gl2 victim=gl1',
+            'garbage line',
+            f'T2 ROUND_END match={m} winner=1',
+            f'T3 ROUND_END match={m} winner=2',
+            f'T4 ROUND_END match={m} winner=1',
+            f'T5 MATCH_END match={m}',
+        ]) + '\n')
+        result = gamelogs.ingest_file(path)
+
+        self.assertEqual((result['matches'], result['stat_lines'], result['incomplete'], result['unknown_players']), (1, 3, 1, 1))
+        self.match.refresh_from_db()
+        self.assertEqual((self.match.team1_score, self.match.team2_score, self.match.winner_id), (2, 1, self.red.id))
+        self.assertTrue(self.match.is_completed)
+        top = PlayerMatchStats.objects.get(match=self.match, player=self.players[0])
+        self.assertEqual((top.kills, top.score, top.won, top.team_id), (2, 200, True, self.red.id))
+        victim = Player.objects.get(pk=self.players[2].pk)
+        self.assertEqual((victim.total_kills, victim.total_deaths, victim.matches_played, victim.matches_won), (1, 2, 1, 0))
+
+    def test_reingesting_a_log_does_not_double_count(self):
+        m = self.match.id
+        path = self.write_log(f'T0 MATCH_START match={m}\nT1 KILL match={m} killer=gl0 victim=gl2\nT2 MATCH_END match={m}\n')
+        call_command('ingest_game_logs', path, stdout=io.StringIO())
+        call_command('ingest_game_logs', path, stdout=io.StringIO())
+        player = Player.objects.get(pk=self.players[0].pk)
+        self.assertEqual((player.total_kills, player.matches_played), (1, 1))
+
+    def test_empty_file(self):
+        self.assertEqual(gamelogs.ingest_file(self.write_log(''))['lines'], 0)
+
+    def test_logged_winner_advances_and_is_published(self):
+        final = TournamentMatch.objects.create(tournament=self.match.tournament, round_number=2, match_number=1)
+        m = self.match.id
+        path = self.write_log(f'T0 MATCH_START match={m}\nT1 ROUND_END match={m} winner=2\nT2 MATCH_END match={m}\n')
+        with mock.patch.object(gamelogs, 'publish_match') as publish:
+            gamelogs.ingest_file(path)
+
+        final.refresh_from_db()
+        self.assertEqual((final.team1_id, final.team2_id), (self.blue.id, None))
+        self.assertEqual([call.args[0].pk for call in publish.call_args_list], [m])
+
+    def test_duplicate_match_in_a_batch_keeps_the_first_log(self):
+        m = self.match.id
+        path = self.write_log(''.join(
+            f'T0 MATCH_START match={m}\nT1 ROUND_END match={m} winner={side}\nT2 MATCH_END match={m}\n' for side in (1, 2)
+        ))
+        result = gamelogs.ingest_file(path)
+
+        self.assertEqual((result['matches'], result['duplicate_matches']), (1, [m]))
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.winner_id, self.red.id)
+
+
+class AggregateRecomputeTests(TestCase):
+    def setUp(self):
+        tournament = Tournament.objects.create(
+            title='Recompute', max_players=32, mode='16v16', region='EU', level='GOLD', platform='PC',
+            start_date=timezone.now(), language='English', tournament_type='x'
+        )
+        self.players = User.objects.bulk_create([User(email=f'rc{i}@test.com', username=f'rc{i}', password='!') for i in range(6)])
+        self.team = Team.objects.create(name='Recompute', lead_player=self.players[0], join_code='RECOMP')
+        TeamMember.objects.bulk_create([TeamMember(team=self.team, player=player) for player in self.players[:2]])
+        matches = TournamentMatch.objects.bulk_create([
+            TournamentMatch(tournament=tournament, round_number=1, match_number=i) for i in range(3)
+        ])
+        PlayerMatchStats.objects.bulk_create([
+            PlayerMatchStats(match=match, player=self.players[0], kills=10, deaths=4, score=20000, won=number < 2)
+            for number, match in enumerate(matches)
+        ] + [PlayerMatchStats(match=matches[0], player=self.players[3], kills=1, deaths=0, score=100, won=False)])
+        # Drifted values, as after a bug in the running sums.
+        Player.objects.filter(pk=self.players[0].pk).update(points=5, total_kills=99, win_rate=1.0)
+        Player.objects.filter(pk=self.players[5].pk).update(tier='GOLD', points=7)
+
+    def test_recompute_rebuilds_players_and_team_tier(self):
+        result = recompute.run(shard_size=2)
+        self.assertEqual(result['players_updated'], 3)
+
+        player = Player.objects.get(pk=self.players[0].pk)
+        self.assertEqual((player.points, player.total_kills, player.matches_played, player.matches_won), (60000, 30, 3, 2))
+        self.assertAlmostEqual(player.kill_death_ratio, 2.5)
+        self.assertAlmostEqual(player.win_rate, 200 / 3)
+        self.assertEqual(player.tier, 'GOLD')
+        self.assertEqual(Player.objects.get(pk=self.players[3].pk).kill_death_ratio, 1.0)
+        idle = Player.objects.get(pk=self.players[5].pk)
+        self.assertEqual((idle.points, idle.tier), (0, 'GOLD'))
+        self.team.refresh_from_db()
+        self.assertEqual(self.team.tier, 'GOLD')
+        self.assertFalse(Checkpoint.objects.filter(name=recompute.CHECKPOINT).exists())
+
+    def test_resumes_after_the_checkpoint(self):
+        Checkpoint.objects.create(name=recompute.CHECKPOINT, position=self.players[2].pk)
+        result = recompute.run(shard_size=2)
+        self.assertEqual(result['resumed_from'], self.players[2].pk)
+        self.assertEqual(Player.objects.get(pk=self.players[0].pk).points, 5)
+        self.assertEqual(Player.objects.get(pk=self.players[3].pk).points, 100)
+        self.assertEqual(recompute.run(shard_size=2, restart=True)['resumed_from'], 0)
+        self.assertEqual(Player.objects.get(pk=self.players[0].pk).points, 60000)
+
+
+@override_settings(MATCHMAKING_BASE_WINDOW=50, MATCHMAKING_WIDEN_PER_SECOND=5, MATCHMAKING_MAX_WINDOW=500)
+class MatchmakingTests(TestCase):
+    def ticket(self, team_id, rating, waited=0, region='EU'):
+        return matchmaking.Ticket(team_id, region, 'PC', '16v16', rating, enqueued_at=1000 - waited)
+
+    def test_pairs_nearest_rating_within_both_windows(self):
+        matcher = matchmaking.Matcher()
+        for ticket in [self.ticket(1, 1000), self.ticket(2, 1200), self.ticket(3, 1030), self.ticket(4, 1010, region='NA')]:
+            matcher.add(ticket)
+        pairs = matcher.match(now=1000)
+        self.assertEqual([(a.team_id, b.team_id) for a, b in pairs], [(1, 3)])
+        self.assertEqual(set(matcher.tickets), {2, 4})
+
+    def test_window_widens_with_wait(self):
+        matcher = matchmaking.Matcher()
+        matcher.add(self.ticket(1, 1000, waited=20))
+        matcher.add(self.ticket(2, 1200, waited=20))
+        self.assertEqual(matcher.match(now=1000), [])
+        self.assertEqual(len(matcher.match(now=1000 + 10)), 1)
+
+    def test_queue_view_and_loop_create_ladder_match(self):
+        leads = User.objects.bulk_create([User(email=f'mm{i}@test.com', username=f'mm{i}', password='!') for i in range(2)])
+        teams = [Team.objects.create(name=f'MM{i}', lead_player=lead, join_code=f'MM{i}') for i, lead in enumerate(leads)]
+        TeamMember.objects.bulk_create([TeamMember(team=team, player=team.lead_player) for team in teams])
+        queue = matchmaking.InProcessQueue()
+        client = APIClient()
+        with mock.patch.object(matchmaking, 'get_queue', return_value=queue):
+            for team in teams:
+                client.force_authenticate(team.lead_player)
+                response = client.post('/api/matchmaking/queue/', {'team_id': team.id, 'region': 'EU', 'platform': 'PC', 'mode': '16v16'}, format='json')
+                self.assertEqual(response.status_code, 202, response.content)
+            self.assertTrue(client.get('/api/matchmaking/queue/', {'team_id': teams[1].id}).json()['queued'])
+            self.assertEqual(client.post('/api/matchmaking/queue/', {'team_id': teams[0].id, 'region': 'EU', 'platform': 'PC', 'mode': '16v16'}, format='json').status_code, 403)
+
+            matchmaking.run_loop(queue, once=True)
+            self.assertFalse(client.get('/api/matchmaking/queue/', {'team_id': teams[1].id}).json()['queued'])
+
+        match = TournamentMatch.objects.get()
+        self.assertEqual({match.team1_id, match.team2_id}, {team.id for team in teams})
+        self.assertEqual((match.tournament.tournament_type, match.tournament.region, match.tournament.is_active), ('LADDER', 'EU', False))
+        self.assertTrue(DomainEvent.objects.filter(topic='tournament_match', event_type='created', object_id=match.id).exists())
+
+    @override_settings(MATCHMAKING_BACKEND='memory', WEB_CONCURRENCY=4)
+    def test_memory_backend_is_refused_with_several_workers(self):
+        from django.core.exceptions import ImproperlyConfigured
+        with mock.patch.object(matchmaking, '_queue', None), self.assertRaises(ImproperlyConfigured):
+            matchmaking.get_queue()
+
+    def test_ladders_are_not_listed(self):
+        ladder = matchmaking.ladder('EU', 'PC', '16v16')
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(email='mml@test.com', username='mml', password='x'))
+        response = client.get('/api/tournaments/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(ladder.id, [row['id'] for row in response.json()])
+        self.assertEqual(client.get(f'/api/tournaments/{ladder.id}/').status_code, 200)
+
+
+@override_settings(MATCH_DURATION_MINUTES=60, MATCH_REST_MINUTES=30, MATCH_SERVER_SLOTS=4)
+class MatchSchedulingTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='sched@test.com', username='sched', password='x', is_admin=True, is_staff=True)
+        self.players = User.objects.bulk_create([User(email=f'sc{i}@test.com', username=f'sc{i}', password='!') for i in range(16)])
+        self.teams = Team.objects.bulk_create([Team(name=f'S{i}', lead_player=player, join_code=f'SCHED{i}') for i, player in enumerate(self.players)])
+        self.start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+
+    def tournament(self, bracket_type):
+        return Tournament.objects.create(
+            title='Sched', max_players=64, mode='16v16', region='EU', level='GOLD', platform='PC',
+            start_date=self.start, language='English', tournament_type='x', bracket_type=bracket_type
+        )
+
+    def assertFeasible(self, matches, rest=timedelta(minutes=30), duration=timedelta(hours=1), slots=4):
+        by_team = {}
+        for match in matches:
+            for team_id in (match.team1_id, match.team2_id):
+                if team_id:
+                    by_team.setdefault(team_id, []).append(match.scheduled_time)
+        for times in by_team.values():
+            times.sort()
+            self.assertTrue(all(b - a >= duration + rest for a, b in zip(times, times[1:])))
+        by_slot = {}
+        for match in matches:
+            self.assertIn(match.server_slot, range(slots))
+            by_slot.setdefault(match.server_slot, []).append(match.scheduled_time)
+        for times in by_slot.values():
+            times.sort()
+            self.assertTrue(all(b - a >= duration for a, b in zip(times, times[1:])))
+
+    def test_round_robin_is_packed_onto_server_slots(self):
+        tournament = self.tournament('ROUND_ROBIN')
+        brackets.generate_round_robin(tournament, self.teams)
+        scheduling.schedule(tournament)
+        matches = list(tournament.matches.all())
+        self.assertEqual(len(matches), 120)
+        self.assertFeasible(matches)
+        # 120 one-hour matches on 4 servers: 30 hours of play, not 120 days.
+        self.assertLess(max(match.scheduled_time for match in matches) - self.start, timedelta(hours=40))
+
+    def test_elimination_rounds_wait_for_their_feeders(self):
+        tournament = self.tournament('SINGLE_ELIM')
+        brackets.generate_single_elimination(tournament, self.teams)
+        scheduling.schedule(tournament)
+        matches = {(m.round_number, m.match_number): m for m in tournament.matches.all()}
+        self.assertFeasible(matches.values())
+        for (round_number, number), match in matches.items():
+            for feeder in (matches.get((round_number - 1, 2 * number - 1)), matches.get((round_number - 1, 2 * number))):
+                if feeder:
+                    self.assertGreaterEqual(match.scheduled_time, feeder.scheduled_time + timedelta(minutes=90))
+
+    def test_late_match_pushes_back_only_what_it_reaches(self):
+        tournament = self.tournament('ROUND_ROBIN')
+        brackets.generate_round_robin(tournament, self.teams[:6])
+        scheduling.schedule(tournament)
+        first = tournament.matches.order_by('scheduled_time', 'server_slot').first()
+        before = {m.id: m.scheduled_time for m in tournament.matches.all()}
+
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        with mock.patch('django.utils.timezone.now', return_value=first.scheduled_time + timedelta(minutes=30)):
+            response = client.post(f'/api/tournament-matches/{first.id}/delay/', {'minutes_late': 120}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        moved = {row['id'] for row in response.json()['moved']}
+        self.assertTrue(moved)
+
+        after = list(tournament.matches.all())
+        self.assertTrue(all(match.scheduled_time >= before[match.id] for match in after))
+        expected_end = first.scheduled_time + timedelta(hours=3)
+        for match in after:
+            if match.id != first.id and {match.team1_id, match.team2_id} & {first.team1_id, first.team2_id}:
+                self.assertGreaterEqual(match.scheduled_time, expected_end + timedelta(minutes=30))
+
+    def test_naive_start_is_read_in_the_current_time_zone(self):
+        tournament = self.tournament('ROUND_ROBIN')
+        brackets.generate_round_robin(tournament, self.teams[:4])
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        naive = self.start.replace(tzinfo=None, hour=10, minute=0, second=0)
+        response = client.post(f'/api/tournaments/{tournament.id}/schedule/', {'start': naive.isoformat()}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        first = tournament.matches.order_by('scheduled_time').values_list('scheduled_time', flat=True).first()
+        self.assertEqual(first, timezone.make_aware(naive))
+        response = client.post(f'/api/tournaments/{tournament.id}/schedule/', {'start': '2026-13-01T10:00:00'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_rescheduling_an_ongoing_tournament_keeps_matches_under_way(self):
+        tournament = self.tournament('ROUND_ROBIN')
+        brackets.generate_round_robin(tournament, self.teams[:6])
+        scheduling.schedule(tournament)
+        now = self.start + timedelta(minutes=90)
+        before = {m.id: m.scheduled_time for m in tournament.matches.all()}
+        scheduling.schedule(tournament, scheduling.Plan(self.start), now=now)
+        for match in tournament.matches.all():
+            if before[match.id] <= now:
+                self.assertEqual(match.scheduled_time, before[match.id])
+            else:
+                self.assertGreaterEqual(match.scheduled_time, now)
+        self.assertTrue(any(time <= now for time in before.values()))
+
+    def test_list_schedule_handles_thousands_of_matches(self):
+        matches = [
+            TournamentMatch(id=number, round_number=1, match_number=number, team1_id=a, team2_id=b)
+            for number, (a, b) in enumerate(itertools.combinations(range(64), 2), start=1)
+        ]
+        plan = scheduling.Plan(self.start, slots=16)
+        started = time.perf_counter()
+        placed = scheduling.list_schedule(matches, {match.id: [] for match in matches}, plan)
+        self.assertEqual(len(placed), 2016)
+        self.assertLess(time.perf_counter() - started, 1.0)
+
+
+@override_settings(MATCH_DURATION_MINUTES=60)
+class ScheduleConflictTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(email='conf@test.com', username='conf', password='x', is_admin=True, is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        players = User.objects.bulk_create([User(email=f'cf{i}@test.com', username=f'cf{i}', password='!') for i in range(4)])
+        self.teams = Team.objects.bulk_create([Team(name=f'C{i}', lead_player=player, join_code=f'CONF{i}') for i, player in enumerate(players)])
+        self.league, self.cup = [
+            Tournament.objects.create(
+                title=title, max_players=64, mode='16v16', region='EU', level='GOLD', platform='PC',
+                start_date=timezone.now(), language='English', tournament_type='x'
+            )
+            for title in ('League', 'Cup')
+        ]
+        self.noon = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        a, b, c, d = self.teams
+        self.league_match = TournamentMatch.objects.create(tournament=self.league, round_number=1, match_number=1, team1=a, team2=b, scheduled_time=self.noon)
+        self.cup_match = TournamentMatch.objects.create(tournament=self.cup, round_number=1, match_number=1, team1=a, team2=c, scheduled_time=self.noon + timedelta(minutes=30))
+        self.free_match = TournamentMatch.objects.create(tournament=self.league, round_number=1, match_number=2, team1=c, team2=d, scheduled_time=self.noon + timedelta(hours=3))
+
+    def test_tournament_conflicts_include_other_tournaments(self):
+        response = self.client.get(f'/api/tournaments/{self.league.id}/conflicts/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['team_id'], row['match_id'], row['conflicts_with']) for row in response.json()['conflicts']],
+            [(self.teams[0].id, self.league_match.id, self.cup_match.id)],
+        )
+
+    def test_single_edit_is_rejected_on_overlap(self):
+        url = f'/api/tournament-matches/{self.free_match.id}/'
+        clash = (self.noon + timedelta(minutes=45)).isoformat()
+        self.assertEqual(self.client.patch(url, {'scheduled_time': clash}, format='json').status_code, 400)
+        fine = (self.noon + timedelta(hours=2)).isoformat()
+        self.assertEqual(self.client.patch(url, {'scheduled_time': fine}, format='json').status_code, 200)
+
+    def test_score_edit_is_not_blocked_by_an_existing_overlap(self):
+        url = f'/api/tournament-matches/{self.league_match.id}/'
+        self.assertEqual(self.client.patch(url, {'team1_score': 3}, format='json').status_code, 200)
+        same_time = self.noon.isoformat()
+        self.assertEqual(self.client.patch(url, {'scheduled_time': same_time, 'team2_score': 1}, format='json').status_code, 200)
+        later = (self.noon + timedelta(minutes=10)).isoformat()
+        self.assertEqual(self.client.patch(url, {'scheduled_time': later}, format='json').status_code, 400)
+
+    def test_bulk_reschedule_checks_moves_against_each_other(self):
+        later = self.noon + timedelta(hours=5)
+        response = self.client.post('/api/tournament-matches/reschedule/', {'moves': [
+            {'id': self.cup_match.id, 'scheduled_time': later.isoformat()},
+            {'id': self.free_match.id, 'scheduled_time': (later + timedelta(minutes=20)).isoformat()},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['conflicts'][0]['team_id'], self.teams[2].id)
+
+        response = self.client.post('/api/tournament-matches/reschedule/', {'moves': [
+            {'id': self.cup_match.id, 'scheduled_time': later.isoformat()},
+        ]}, format='json')
+        self.assertEqual(response.json(), {'moved': 1})
+        self.assertEqual(self.client.get(f'/api/tournaments/{self.league.id}/conflicts/').json()['count'], 0)
+
+    def test_bulk_reschedule_reads_naive_times_in_the_current_time_zone(self):
+        clash = (self.noon + timedelta(minutes=45)).replace(tzinfo=None)
+        response = self.client.post('/api/tournament-matches/reschedule/', {'moves': [
+            {'id': self.free_match.id, 'scheduled_time': clash.isoformat()},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Schedule conflict')
+
+        later = (self.noon + timedelta(hours=5)).replace(tzinfo=None)
+        response = self.client.post('/api/tournament-matches/reschedule/', {'moves': [
+            {'id': self.free_match.id, 'scheduled_time': later.isoformat()},
+        ]}, format='json')
+        self.assertEqual(response.json(), {'moved': 1})
+        self.free_match.refresh_from_db()
+        self.assertEqual(self.free_match.scheduled_time, timezone.make_aware(later))
+
+    def test_overlap_lookup_uses_the_team_time_index(self):
+        queryset = conflicts._team_matches([self.teams[0].id], self.noon, self.noon + timedelta(hours=1))
+        plan = queryset.explain()
+        self.assertIn('match_team1_time', plan)
+
+
+class FacetedBrowseTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='browse@test.com', username='browse', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        soon = timezone.now() + timedelta(days=3)
+        self.tournaments = [
+            Tournament.objects.create(
+                title=f'B{i}', max_players=16, mode=mode, region=region, level='GOLD', platform=platform,
+                start_date=start, language='English', tournament_type='x'
+            )
+            for i, (region, platform, mode, start) in enumerate([
+                ('EU', 'PC', '16v16', soon),
+                ('EU', 'CONSOLE', '32v32', soon + timedelta(days=1)),
+                ('NA', 'PC', '16v16', soon + timedelta(days=2)),
+                ('EU', 'PC', '64v64', timezone.now() - timedelta(days=1)),
+            ])
+        ]
+        Tournament.objects.create(
+            title='Hidden', max_players=16, mode='16v16', region='EU', level='GOLD', platform='PC',
+            start_date=soon, language='English', tournament_type='x', is_active=False
+        )
+        self.index = browse.BrowseIndex()
+        patcher = mock.patch.object(browse, 'get_index', return_value=self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_filters_and_facet_counts(self):
+        response = self.client.get('/api/tournaments/browse/', {'region': 'EU', 'status': 'upcoming'})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual([row['title'] for row in body['results']], ['B0', 'B1'])
+        self.assertEqual(body['count'], 2)
+        # Each facet is counted against the other filters only.
+        self.assertEqual(body['facets']['region'], {'EU': 2, 'NA': 1})
+        self.assertEqual(body['facets']['status'], {'upcoming': 2, 'ongoing': 1})
+        self.assertEqual(body['facets']['platform'], {'PC': 1, 'CONSOLE': 1})
+
+    def test_index_follows_tournament_changes(self):
+        self.client.get('/api/tournaments/browse/')
+        changed = self.tournaments[2]
+        changed.region = 'EU'
+        changed.save()
+        self.tournaments[0].delete()
+        self.index.refreshed_at = 0
+
+        with self.assertNumQueries(1):
+            ids, count, facets = self.index.query({'region': {'EU'}, 'platform': {'PC'}})
+        self.assertEqual(ids, [self.tournaments[3].id, changed.id])
+        self.assertEqual(facets['region'], {'EU': 2})
+
+    def test_load_starts_before_unsettled_events(self):
+        settled = DomainEvent.objects.order_by('id').first()
+        DomainEvent.objects.filter(pk=settled.pk).update(created_at=timezone.now() - timedelta(minutes=1))
+        self.index.load()
+        self.assertEqual(self.index.settled, settled.id)
+
+    def test_pagination(self):
+        body = self.client.get('/api/tournaments/browse/', {'offset': 1, 'limit': 2}).json()
+        self.assertEqual([row['title'] for row in body['results']], ['B0', 'B1'])
+        self.assertEqual(body['count'], 4)
+
+
+@override_settings(OUTBOX_SETTLE_SECONDS=0)
+class EligibilityFeedTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='elig@test.com', username='elig', password='x')
+        other = User.objects.create_user(email='elig2@test.com', username='elig2', password='x')
+        rival = User.objects.create_user(email='elig3@test.com', username='elig3', password='x')
+        self.gold = Team.objects.create(name='Gold', lead_player=self.user, join_code='ELIGG', tier='GOLD')
+        self.silver = Team.objects.create(name='Silver', lead_player=other, join_code='ELIGS', tier='SILVER')
+        TeamMember.objects.create(team=self.silver, player=self.user, role='CAPTAIN')
+        self.rival = Team.objects.create(name='Rival', lead_player=rival, join_code='ELIGR', tier='GOLD')
+        soon = timezone.now() + timedelta(days=2)
+
+        def tournament(title, level, **kwargs):
+            fields = dict(
+                title=title, max_players=8, mode='16v16', region='EU', level=level, platform='PC',
+                start_date=soon, language='English', tournament_type='x'
+            )
+            fields.update(kwargs)
+            return Tournament.objects.create(**fields)
+
+        self.open_gold = tournament('Open gold', 'GOLD')
+        self.open_silver = tournament('Open silver', 'SILVER', start_date=soon + timedelta(days=1))
+        full = tournament('Full', 'GOLD', max_players=1)
+        TournamentParticipant.objects.create(tournament=full, team=self.rival)
+        tournament('Past', 'GOLD', start_date=timezone.now() - timedelta(days=1))
+        tournament('Inactive', 'GOLD', is_active=False)
+        self.consume()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def consume(self):
+        consumer = outbox.get_consumer('team_eligibility')
+        while outbox.consume_batch(consumer):
+            pass
+
+    def test_feed_covers_all_of_the_users_teams(self):
+        response = self.client.get('/api/tournaments/available/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['title'], row['eligible_team_ids']) for row in response.json()],
+            [('Open gold', [self.gold.id]), ('Open silver', [self.silver.id])],
+        )
+        only_silver = self.client.get('/api/tournaments/available/', {'team_id': self.silver.id}).json()
+        self.assertEqual([row['title'] for row in only_silver], ['Open silver'])
+        self.assertEqual(self.client.get('/api/tournaments/available/', {'team_id': self.rival.id}).status_code, 403)
+
+    def test_registration_and_tier_changes_update_the_feed(self):
+        TournamentParticipant.objects.create(tournament=self.open_gold, team=self.gold)
+        self.consume()
+        self.assertFalse(TeamEligibility.objects.filter(team=self.gold, tournament=self.open_gold).exists())
+        self.assertTrue(TeamEligibility.objects.filter(team=self.rival, tournament=self.open_gold).exists())
+
+        self.silver.tier = 'GOLD'
+        self.silver.save()
+        self.assertEqual(
+            set(TeamEligibility.objects.filter(team=self.silver).values_list('tournament_id', flat=True)), {self.open_gold.id}
+        )
+
+    def test_feed_read_is_constant_in_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/tournaments/available/')
+        feed_queries = [q for q in queries if 'tournaments_teameligibility' in q['sql']]
+        self.assertEqual(len(feed_queries), 1)
+
+
+@override_settings(MEMBERSHIP_CACHE_SECONDS=300)
+class MembershipTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.lead = User.objects.create_user(email='mlead@test.com', username='mlead', password='x')
+        self.member = User.objects.create_user(email='mmember@test.com', username='mmember', password='x')
+        self.outsider = User.objects.create_user(email='mout@test.com', username='mout', password='x')
+        self.team = Team.objects.create(name='Members', lead_player=self.lead, join_code='MEMB1')
+        TeamMember.objects.create(team=self.team, player=self.lead, role='CAPTAIN')
+        self.membership = TeamMember.objects.create(team=self.team, player=self.member)
+        self.client = APIClient()
+
+    def test_roles_are_cached_and_invalidated_by_writes(self):
+        self.assertEqual(membership.for_user(self.lead.id).roles, {self.team.id: 'LEAD'})
+        self.assertEqual(membership.for_user(self.member.id).roles, {self.team.id: 'MEMBER'})
+        with self.assertNumQueries(0):
+            self.assertFalse(membership.for_user(self.member.id).manages(self.team.id))
+
+        self.membership.role = 'CO_LEAD'
+        self.membership.save()
+        self.assertTrue(membership.for_user(self.member.id).manages(self.team.id))
+
+        self.team.lead_player = self.outsider
+        self.team.save()
+        self.assertEqual(membership.for_user(self.lead.id).roles, {self.team.id: 'CAPTAIN'})
+        self.assertTrue(membership.for_user(self.outsider.id).leads(self.team.id))
+
+        self.membership.delete()
+        self.assertEqual(membership.for_user(self.member.id).roles, {})
+
+    def test_bulk_roster_changes_invalidate_roles(self):
+        self.membership.role = 'CO_LEAD'
+        self.membership.save()
+        self.assertTrue(membership.for_user(self.member.id).manages(self.team.id))
+        self.assertEqual(membership.for_user(self.outsider.id).roles, {})
+
+        result = rosters.apply_operations(self.team, [
+            {'action': 'change_role', 'player_id': self.member.id, 'new_role': 'MEMBER'},
+            {'action': 'add_member', 'search_value': self.outsider.username},
+        ])
+        self.assertFalse(result.errors)
+        self.assertFalse(membership.for_user(self.member.id).manages(self.team.id))
+        self.assertEqual(membership.for_user(self.outsider.id).roles, {self.team.id: 'MEMBER'})
+
+    @override_settings(MEMBERSHIP_CACHE_SECONDS=0)
+    def test_roles_are_not_cached_across_requests_without_a_shared_cache(self):
+        membership.for_user(self.member.id)
+        with self.assertNumQueries(1):
+            membership.for_user(self.member.id)
+
+    def test_my_teams_and_permission_checks_use_the_membership(self):
+        self.client.force_authenticate(self.member)
+        self.assertEqual([team['id'] for team in self.client.get('/api/teams/').json()], [self.team.id])
+        membership.for_user(self.member.id)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/api/tournaments/registered/', {'team_id': self.team.id}).status_code, 200)
+            self.assertEqual(self.client.get('/api/user-squad-status/', {'team_id': self.team.id}).json(), {'in_squad': False})
+        self.assertFalse([q for q in queries if 'FROM "tournaments_team' in q['sql']])
+        self.assertEqual(self.client.get('/api/allteamdetails/', {'teamId': self.team.id}).status_code, 403)
+
+        self.client.force_authenticate(self.outsider)
+        self.assertEqual(self.client.get('/api/teams/').json(), [])
+        self.assertEqual(self.client.get('/api/tournaments/registered/', {'team_id': self.team.id}).status_code, 403)
+        self.assertEqual(self.client.get('/api/tournaments/registered/', {'team_id': 999999}).status_code, 404)
+        self.assertEqual(self.client.get('/api/user-squad-status/', {'team_id': 999999}).status_code, 404)
+
+        self.client.force_authenticate(self.lead)
+        response = self.client.get('/api/allteamdetails/', {'teamId': self.team.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['has_team_captain'])
+
+
+class BatchLoaderTests(TestCase):
+    def setUp(self):
+        self.tournament = Tournament.objects.create(
+            title='Loader cup', max_players=8, mode='16v16', region='EU', level='GOLD', platform='PC',
+            start_date=timezone.now(), language='English', tournament_type='x'
+        )
+        self.teams = []
+        for number in range(4):
+            lead = User.objects.create_user(email=f'load{number}@test.com', username=f'load{number}', password='x')
+            self.teams.append(Team.objects.create(name=f'Loaded {number}', lead_player=lead, join_code=f'LOAD{number}'))
+            TeamMember.objects.create(team=self.teams[-1], player=lead, role='CAPTAIN')
+        for number, (team1, team2) in enumerate(itertools.combinations(self.teams, 2), start=1):
+            TournamentMatch.objects.create(
+                tournament=self.tournament, round_number=1, match_number=number, team1=team1, team2=team2, winner=team1
+            )
+
+    def matches(self):
+        return TournamentMatch.objects.filter(tournament=self.tournament).order_by('match_number')
+
+    def test_relations_are_fetched_in_one_query_per_model(self):
+        with loaders.scope():
+            with self.assertNumQueries(3):
+                data = TournamentMatchSerializer(self.matches(), many=True).data
+            self.assertEqual(data[0]['team2']['lead_player']['username'], 'load1')
+            self.assertEqual(data[-1]['winner']['name'], 'Loaded 2')
+
+            # Rows already in the request's identity map are not fetched again.
+            with self.assertNumQueries(1):
+                TeamMemberSerializer(TeamMember.objects.all(), many=True).data
+            with self.assertNumQueries(1):
+                TournamentMatchSerializer(self.matches().first()).data
+
+    def test_saved_rows_are_evicted(self):
+        with loaders.scope():
+            TournamentMatchSerializer(self.matches(), many=True).data
+            # update() bypasses signals, so the request keeps the row it already has.
+            Team.objects.filter(id=self.teams[0].id).update(name='Stale')
+            team = Team.objects.get(id=self.teams[1].id)
+            team.name = 'Renamed'
+            team.save()
+            data = TournamentMatchSerializer(self.matches(), many=True).data
+        self.assertEqual(data[0]['team1']['name'], 'Loaded 0')
+        self.assertEqual(data[0]['team2']['name'], 'Renamed')
+
+    def test_match_list_endpoint(self):
+        user = User.objects.create_user(email='loadview@test.com', username='loadview', password='x')
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/tournament-matches/', {'tournament_id': self.tournament.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len([q for q in queries if 'FROM "tournaments_team"' in q['sql']]), 1)
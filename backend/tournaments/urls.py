@@ -1,8 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from .metrics import metrics_view
 from .views import (
     PlayerViewSet, TeamViewSet, TeamMemberViewSet, SquadViewSet, SquadMemberViewSet, TournamentTeamViewSet, AllTeamDetailsView, UserSquadStatusView,
-    TournamentViewSet, AssignRolesView, TournamentParticipantViewSet, CountryCodeUpdateView, TeamViewSet, TournamentMatchViewSet, AccountTypeUpdateView, JoinTeamView, member_stats, LoginView, TournamentListView, RegistrationView, SocialSignupView, SocialCallbackView, SocialLoginView, NewsListView, UpcomingTournamentView, MatchListView, AdminStatsView, AdminRecentPlayersView, AdminRecentTeamsView, TeamManagementView, PlayerSearchView, TournamentAutoAssignView, TournamentGenerateBracketView
+    TournamentViewSet, AssignRolesView, TournamentParticipantViewSet, CountryCodeUpdateView, TeamViewSet, TournamentMatchViewSet, AccountTypeUpdateView, JoinTeamView, member_stats, LoginView, TournamentListView, RegistrationView, SocialSignupView, SocialCallbackView, SocialLoginView, NewsListView, UpcomingTournamentView, MatchListView, AdminStatsView, AdminRecentPlayersView, AdminRecentTeamsView, TeamManagementView, TeamRosterBulkView, MatchmakingQueueView, PlayerSearchView, TournamentAutoAssignView, TournamentGenerateBracketView,
+    tournament_event_stream, event_stream_view, JobListView, JobStatusView,
+    ExportView, ImportView, ProfileListView, ProfileDetailView
 )
 
 router = DefaultRouter()
@@ -37,7 +40,19 @@ urlpatterns = [
     path('admin/recent-players/', AdminRecentPlayersView.as_view(), name='admin-recent-players'),
     path('admin/recent-teams/', AdminRecentTeamsView.as_view(), name='admin-recent-teams'),
     path('team/manage/', TeamManagementView.as_view(), name='team-management'),
+    path('team/manage/bulk/', TeamRosterBulkView.as_view(), name='team-management-bulk'),
+    path('matchmaking/queue/', MatchmakingQueueView.as_view(), name='matchmaking-queue'),
     path('players/search/', PlayerSearchView.as_view(), name='player-search'),
     path('tournaments/<int:tournament_id>/auto-assign/', TournamentAutoAssignView.as_view(), name='tournament-auto-assign'),
     path('tournaments/<int:tournament_id>/generate-bracket/', TournamentGenerateBracketView.as_view(), name='tournament-generate-bracket'),
-]
\ No newline at end of file
+    path('tournaments/<int:tournament_id>/events/', tournament_event_stream, name='tournament-events'),
+    path('events/', event_stream_view, name='event-stream'),
+    path('jobs/', JobListView.as_view(), name='job-list'),
+    path('jobs/<int:job_id>/', JobStatusView.as_view(), name='job-status'),
+    path('exports/<str:dataset>.<str:fmt>', ExportView.as_view(), name='export'),
+    path('admin/import/<str:kind>/', ImportView.as_view(), name='admin-import'),
+    path('metrics/', metrics_view, name='metrics'),
+    path('admin/profiles/', ProfileListView.as_view(), name='admin-profiles'),
+    path('admin/profiles/<str:profile_id>/', ProfileDetailView.as_view(), name='admin-profile-detail'),
+    path('tournaments/<int:tournament_id>/exports/<str:dataset>.<str:fmt>', ExportView.as_view(), name='tournament-export'),
+]
@@ -3,31 +3,43 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework.decorators import action, api_view
+from rest_framework.settings import api_settings
 from django.contrib.auth import get_user_model, authenticate
 from django.shortcuts import get_object_or_404
 from django.core.exceptions import ValidationError, PermissionDenied
 from django.utils import timezone
 from django.utils.timezone import now
-from django.http import JsonResponse
+from django.utils.dateparse import parse_datetime
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
 from django.conf import settings
 from django.contrib.auth.models import BaseUserManager
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from asgiref.sync import sync_to_async
 from datetime import timedelta
 from .models import Player, SocialToken
+import json
 import random
+import re
 import string
 import os
 import requests
 from django.db import models
 from django.db.models import Q
-from .models import Player, Team, TeamMember, Tournament, TournamentParticipant, TournamentMatch, SocialAccount, News, TournamentTeam, SquadMember, Squad
+from .models import Player, Team, TeamMember, Tournament, TournamentParticipant, TournamentMatch, SocialAccount, News, TournamentTeam, SquadMember, Squad, Job
 from .serializers import (
     PlayerSerializer, TeamSerializer, AllTeamDetailsSerializer, TeamMemberSerializer, SquadSerializer, TournamentTeamSerializer, RegisteredTournamentSerializer,
     TournamentSerializer, TournamentParticipantSerializer, TournamentMatchSerializer,
-    UserRegistrationSerializer, LoginAuthSerializer, NewsSerializer, SignUpAuthSerializer, TournamentDetailSerializer, MatchSerializer, SquadMemberSerializer
+    UserRegistrationSerializer, LoginAuthSerializer, NewsSerializer, SignUpAuthSerializer, MatchSerializer, SquadMemberSerializer,
+    JobSerializer
 )
 from django.db import transaction
 from rest_framework import generics
+from .realtime import event_stream, tournament_channel
+from .renderers import MessagePackRenderer
+from . import assignment, brackets, browse, conflicts, eligibility, exports, imports, jobs, matchmaking, membership, profiling, projections, rosters, scheduling, stats, sync
 
 User = get_user_model()
 
@@ -409,10 +421,7 @@ class TeamViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
     def get_queryset(self):
-        return Team.objects.filter(
-            Q(lead_player=self.request.user) |
-            Q(members__player=self.request.user)
-        ).distinct()
+        return Team.objects.filter(id__in=membership.for_request(self.request).team_ids)
     
     def perform_create(self, serializer):
         if not self.request.user.is_team_lead:
@@ -538,12 +547,14 @@ class TournamentViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     
     def get_permissions(self):
-        if self.action in ['list', 'retrieve', 'available', 'register', 'registered']:
+        if self.action in ['list', 'retrieve', 'available', 'register', 'registered', 'changes', 'bracket', 'browse']:
             return [IsAuthenticated()]
         return [IsAdminUser()]
     
     def get_queryset(self):
         queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.exclude(tournament_type=matchmaking.LADDER_TYPE)
         status = self.request.query_params.get('status')
         if status == 'upcoming':
             queryset = queryset.filter(start_date__gt=timezone.now(), is_active=True)
@@ -554,6 +565,21 @@ class TournamentViewSet(viewsets.ModelViewSet):
         
         return queryset.order_by('start_date')
 
+    @action(detail=False, methods=['get'])
+    def browse(self, request):
+        """Active tournaments filtered by game, region, platform, level, mode and status (comma separated
+        values), with the count for every facet value"""
+        try:
+            offset = max(0, int(request.query_params.get('offset', 0)))
+            limit = min(100, max(1, int(request.query_params.get('limit', 20))))
+        except ValueError:
+            return Response({'error': 'offset and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+        ids, count, facets = browse.get_index().query(browse.parse_filters(request.query_params), offset=offset, limit=limit)
+        tournaments = Tournament.objects.in_bulk(ids)
+        serializer = self.get_serializer([tournaments[i] for i in ids if i in tournaments], many=True)
+        return Response({'count': count, 'facets': facets, 'results': serializer.data})
+
     @action(detail=True, methods=['post'])
     def register(self, request, pk=None):
         tournament = self.get_object()
@@ -584,33 +610,34 @@ class TournamentViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def available(self, request):
-        try:
-            team_member = TeamMember.objects.get(
-                player=request.user,
-                role__in=['CAPTAIN', 'CO_LEAD']
-            )
-            team = team_member.team
-            available_tournaments = Tournament.objects.filter(
-                is_active=True,
-                start_date__gt=timezone.now(),
-                level=team.tier
-            ).exclude(
-                participants__team=team
-            ).order_by('start_date')
-            
-            page = self.paginate_queryset(available_tournaments)
-            if page is not None:
-                serializer = self.get_serializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
-            
-            serializer = self.get_serializer(available_tournaments, many=True)
-            return Response(serializer.data)
-            
-        except TeamMember.DoesNotExist:
+        """Upcoming tournaments the user's teams can still enter, each with the eligible team ids;
+        ?team_id narrows it to one team"""
+        team_ids = membership.for_request(request).managed_team_ids()
+        if not team_ids:
             return Response(
                 {'error': 'You are not a captain or co-lead of any team'},
                 status=status.HTTP_403_FORBIDDEN
             )
+        team_id = request.query_params.get('team_id')
+        if team_id:
+            if not team_id.isdigit() or int(team_id) not in team_ids:
+                return Response({'error': 'You are not a captain or co-lead of this team'}, status=status.HTTP_403_FORBIDDEN)
+            team_ids = {int(team_id)}
+
+        tournaments = {}
+        eligible = {}
+        for team_id, rows in eligibility.feed(sorted(team_ids)).items():
+            for tournament in rows:
+                tournaments.setdefault(tournament.id, tournament)
+                eligible.setdefault(tournament.id, []).append(team_id)
+        available_tournaments = sorted(tournaments.values(), key=lambda tournament: (tournament.start_date, tournament.id))
+
+        page = self.paginate_queryset(available_tournaments)
+        serializer = self.get_serializer(page if page is not None else available_tournaments, many=True)
+        data = [dict(row, eligible_team_ids=eligible[row['id']]) for row in serializer.data]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
 
     @action(detail=False, methods=['get'])
     def registered(self, request):
@@ -622,29 +649,80 @@ class TournamentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            team = Team.objects.get(id=team_id)
-
-            if not TeamMember.objects.filter(team=team, player=request.user).exists():
+        if not membership.for_request(request).is_member(team_id):
+            if not team_id.isdigit() or not Team.objects.filter(id=team_id).exists():
                 return Response(
-                    {'error': 'You are not a member of this team'},
-                    status=status.HTTP_403_FORBIDDEN
+                    {'error': 'Team not found'},
+                    status=status.HTTP_404_NOT_FOUND
                 )
+            return Response(
+                {'error': 'You are not a member of this team'},
+                status=status.HTTP_403_FORBIDDEN
+            )
 
-            participants = TournamentParticipant.objects.filter(team=team).select_related('tournament', 'team').order_by('-registered_at')
+        participants = TournamentParticipant.objects.filter(team_id=team_id).select_related('tournament', 'team').order_by('-registered_at')
 
-            page = self.paginate_queryset(participants)
-            serializer = RegisteredTournamentSerializer(page or participants, many=True)
+        page = self.paginate_queryset(participants)
+        serializer = RegisteredTournamentSerializer(page or participants, many=True)
 
-            if page is not None:
-                return self.get_paginated_response(serializer.data)
-            return Response(serializer.data)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
 
-        except Team.DoesNotExist:
-            return Response(
-                {'error': 'Team not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+    @action(detail=True, methods=['get'], renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, MessagePackRenderer])
+    def bracket(self, request, pk=None):
+        tournament = self.get_object()
+        return Response(brackets.bracket_payload(tournament))
+
+    @action(detail=True, methods=['get'])
+    def conflicts(self, request, pk=None):
+        """Overlapping matches of this tournament's teams, including in other tournaments"""
+        tournament = self.get_object()
+        found = conflicts.tournament_conflicts(tournament)
+        return Response({'count': len(found), 'conflicts': found})
+
+    @action(detail=True, methods=['post'])
+    def schedule(self, request, pk=None):
+        """Plan every unfinished match; start, slots, duration_minutes and rest_minutes override the defaults."""
+        tournament = self.get_object()
+        start = request.data.get('start')
+        try:
+            start = parse_datetime(start) if start else tournament.start_date
+        except (TypeError, ValueError):
+            start = None
+        try:
+            slots = int(request.data.get('slots') or 0) or None
+            duration = int(request.data.get('duration_minutes') or 0)
+            rest = request.data.get('rest_minutes')
+            rest = int(rest) if rest not in (None, '') else None
+        except (TypeError, ValueError):
+            return Response({'error': 'slots, duration_minutes and rest_minutes must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if start is None:
+            return Response({'error': 'start must be an ISO 8601 datetime'}, status=status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(start):
+            start = timezone.make_aware(start)
+
+        plan = scheduling.Plan(
+            start, slots=slots,
+            duration=timedelta(minutes=duration) if duration else None,
+            rest=timedelta(minutes=rest) if rest is not None else None,
+        )
+        moved = scheduling.schedule(tournament, plan)
+        last = tournament.matches.order_by('-scheduled_time').values_list('scheduled_time', flat=True).first()
+        return Response({'matches_moved': len(moved), 'slots': plan.slots, 'ends_at': last + plan.duration if last else None})
+
+    @action(detail=True, methods=['get'])
+    def changes(self, request, pk=None):
+        """Rows changed since ?since=<token>; omit the token for a full snapshot."""
+        tournament = self.get_object()
+        try:
+            since = sync.parse_token(request.query_params.get('since'))
+        except sync.InvalidToken:
+            return Response({'error': 'since must be a token returned by this endpoint'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if since is None:
+            return Response(sync.snapshot(tournament.id))
+        return Response(sync.changes_since(tournament.id, since))
 
     @action(detail=True, methods=['get'])
     def participants(self, request, pk=None):
@@ -669,6 +747,7 @@ class TournamentViewSet(viewsets.ModelViewSet):
         tournament.save()
         
         self._create_initial_matches(tournament, bracket)
+        scheduling.schedule(tournament)
         
         return Response(bracket)
 
@@ -713,19 +792,14 @@ class SquadMemberViewSet(viewsets.ModelViewSet):
         player_id = self.request.data.get('player')
 
 
-        current_player = self.request.user
-
         try:
-            squad = Squad.objects.get(
-                id=squad_id,
-                participant__team__lead_player=current_player
-            )
+            squad = Squad.objects.select_related('participant').get(id=squad_id)
+            player = Player.objects.get(id=player_id)
+        except (Squad.DoesNotExist, Player.DoesNotExist, ValueError, TypeError):
+            raise PermissionDenied("Invalid squad or player not in team.")
 
-            player = TeamMember.objects.get(
-                team=squad.participant.team,
-                player__id=player_id
-            ).player
-        except (Squad.DoesNotExist, TeamMember.DoesNotExist):
+        team_id = squad.participant.team_id if squad.participant else None
+        if not membership.for_request(self.request).leads(team_id) or not membership.for_user(player.id).is_member(team_id):
             raise PermissionDenied("Invalid squad or player not in team.")
 
         serializer.save(squad=squad, player=player)
@@ -779,6 +853,18 @@ class TournamentParticipantViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("You cannot delete this participant.")
         instance.delete()
 
+    @action(detail=True, methods=['post'])
+    def assign_squads(self, request, pk=None):
+        participant = self.get_object()
+        if participant.tournament.is_started:
+            return Response({'error': 'Cannot reassign squads after tournament has started'}, status=status.HTTP_400_BAD_REQUEST)
+
+        assignment.assign_participant(participant)
+        squads = Squad.objects.filter(participant=participant).select_related(
+            'participant__tournament', 'participant__team'
+        ).prefetch_related('members__player').order_by('id')
+        return Response(SquadSerializer(squads, many=True).data)
+
 class TournamentMatchViewSet(viewsets.ModelViewSet):
     queryset = TournamentMatch.objects.all()
     serializer_class = TournamentMatchSerializer
@@ -793,7 +879,76 @@ class TournamentMatchViewSet(viewsets.ModelViewSet):
         if tournament_id:
             return self.queryset.filter(tournament_id=tournament_id)
         return self.queryset
-    
+
+    def update(self, request, *args, **kwargs):
+        match = self.get_object()
+        serializer = self.get_serializer(match, data=request.data, partial=kwargs.get('partial', False))
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        team_ids = [
+            team.id if team else None
+            for team in (data.get('team1', match.team1), data.get('team2', match.team2))
+        ]
+        scheduled_time = data.get('scheduled_time', match.scheduled_time)
+        moved = (team_ids, scheduled_time) != ([match.team1_id, match.team2_id], match.scheduled_time)
+        found = moved and conflicts.check_match(match.id, team_ids, scheduled_time)
+        if found:
+            return Response({'error': 'A team already has a match at that time', 'conflicts': found},
+                            status=status.HTTP_400_BAD_REQUEST)
+        self.perform_update(serializer)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['post'])
+    def reschedule(self, request):
+        """Move several matches at once: {"moves": [{"id": ..., "scheduled_time": ...}]}; all or nothing."""
+        moves = {}
+        for move in request.data.get('moves') or []:
+            try:
+                match_id = int(move['id'])
+                start = parse_datetime(move['scheduled_time'])
+            except (KeyError, TypeError, ValueError):
+                start = None
+            if start is None:
+                return Response({'error': 'Each move needs an id and an ISO 8601 scheduled_time'}, status=status.HTTP_400_BAD_REQUEST)
+            moves[match_id] = timezone.make_aware(start) if timezone.is_naive(start) else start
+        if not moves:
+            return Response({'error': 'moves must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+
+        found = conflicts.check_moves(moves)
+        if found:
+            return Response({'error': 'Schedule conflict', 'conflicts': found}, status=status.HTTP_400_BAD_REQUEST)
+        moved = scheduling.move(moves)
+        return Response({'moved': len(moved)})
+
+    @action(detail=True, methods=['post'])
+    def stats(self, request, pk=None):
+        match = self.get_object()
+        lines, errors = stats.build_lines(match, request.data.get('lines'))
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        created = stats.ingest_match_stats(match, lines)
+        return Response({'match_id': match.id, 'lines': len(created)}, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def delay(self, request, pk=None):
+        """Report that a match will end late and re-plan the matches after it."""
+        match = self.get_object()
+        try:
+            minutes = int(request.data.get('minutes_late'))
+        except (TypeError, ValueError):
+            return Response({'error': 'minutes_late is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if minutes <= 0 or match.scheduled_time is None:
+            return Response({'error': 'Only a scheduled match can run late'}, status=status.HTTP_400_BAD_REQUEST)
+
+        plan = scheduling.Plan(timezone.now())
+        expected_end = match.scheduled_time + plan.duration + timedelta(minutes=minutes)
+        moved = scheduling.replan(match.tournament, match, expected_end, plan=plan)
+        return Response({
+            'expected_end': expected_end,
+            'moved': [{'id': m.id, 'scheduled_time': m.scheduled_time, 'server_slot': m.server_slot} for m in moved],
+        })
+
     @action(detail=True, methods=['post'])
     def set_winner(self, request, pk=None):
         match = self.get_object()
@@ -819,28 +974,11 @@ class TournamentMatchViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        match.winner = winner
-        match.is_completed = True
-        match.save()
-        
-        next_round = match.round_number + 1
-        next_match_number = (match.match_number + 1) // 2
-        
-        try:
-            next_match = TournamentMatch.objects.get(
-                tournament=match.tournament,
-                round_number=next_round,
-                match_number=next_match_number
-            )
-            
-            if match.match_number % 2 == 1:
-                next_match.team1 = winner
-            else:
-                next_match.team2 = winner
-            
-            next_match.save()
-        except TournamentMatch.DoesNotExist:
-            pass
+        with transaction.atomic():
+            match.winner = winner
+            match.is_completed = True
+            match.save()
+            brackets.advance_winners([match])
         
         return Response({'success': 'Winner set successfully'}, status=status.HTTP_200_OK)
 
@@ -853,9 +991,9 @@ def member_stats(request):
         last_activity__gte=threshold
     ).count()
     
-    today = timezone.now().date()
+    today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
     active_today = Player.objects.filter(
-        last_activity__date=today
+        last_activity__gte=today
     ).count()
     
     return Response({
@@ -927,12 +1065,13 @@ class TournamentListView(generics.ListAPIView):
 class UpcomingTournamentView(APIView):
     permission_classes = [AllowAny]
     def get(self, request):
-        tournament = Tournament.objects.filter(start_date__gte=now(), is_active=True).order_by('start_date').first()
+        tournament = Tournament.objects.filter(
+            start_date__gte=now(), is_active=True
+        ).select_related('detail_projection').order_by('start_date').first()
         if not tournament:
             return Response({"error": "No upcoming tournament found."}, status=status.HTTP_404_NOT_FOUND)
 
-        serializer = TournamentDetailSerializer(tournament)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(projections.get_document(tournament), status=status.HTTP_200_OK)
 
 class MatchListView(APIView):
     permission_classes = [AllowAny]
@@ -985,13 +1124,11 @@ class AllTeamDetailsView(APIView):
         if not team_id:
             return Response({'error': 'teamId is required'}, status=400)
 
-        try:
-            team = Team.objects.get(id=team_id)
-        except Team.DoesNotExist:
-            raise NotFound("Team not found")
-
-        if team.lead_player != request.user:
+        if not membership.for_request(request).leads(team_id):
+            if not team_id.isdigit() or not Team.objects.filter(id=team_id).exists():
+                raise NotFound("Team not found")
             raise PermissionDenied("You are not authorized to view this team's details")
+        team = Team.objects.get(id=team_id)
 
         squads = Squad.objects.filter(participant__team=team)
         serialized_data = AllTeamDetailsSerializer(squads, many=True).data
@@ -1083,18 +1220,13 @@ class UserSquadStatusView(APIView):
         if not team_id:
             return Response({"error": "team_id is required"}, status=400)
 
-        try:
-            team = Team.objects.get(id=team_id)
-        except Team.DoesNotExist:
-            return Response({"error": "Team not found"}, status=404)
-
-        player = request.user
-
-        participants = TournamentParticipant.objects.filter(team=team)
+        if not membership.for_request(request).is_member(team_id):
+            # Squads are drawn from the team's members, so only existence is left to check.
+            if not team_id.isdigit() or not Team.objects.filter(id=team_id).exists():
+                return Response({"error": "Team not found"}, status=404)
+            return Response({"in_squad": False})
 
-        squads = Squad.objects.filter(participant__in=participants)
-
-        in_squad = SquadMember.objects.filter(squad__in=squads, player=player).exists()
+        in_squad = SquadMember.objects.filter(squad__participant__team_id=team_id, player=request.user).exists()
 
         return Response({"in_squad": in_squad})
 
@@ -1270,6 +1402,91 @@ class TeamManagementView(APIView):
             return Response({'error': 'Player not found in team'}, status=status.HTTP_404_NOT_FOUND)
 
 
+class TeamRosterBulkView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """Apply a batch of add_member, remove_member and change_role operations"""
+        team_id = request.data.get('team_id')
+        operations = request.data.get('operations')
+
+        if not team_id:
+            return Response({'error': 'team_id is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(operations, list) or not operations:
+            return Response({'error': 'operations must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > rosters.MAX_OPERATIONS:
+            return Response({'error': f'At most {rosters.MAX_OPERATIONS} operations per request'}, status=status.HTTP_400_BAD_REQUEST)
+        if not all(isinstance(op, dict) for op in operations):
+            return Response({'error': 'Each operation must be an object'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            team = Team.objects.get(id=team_id)
+        except Team.DoesNotExist:
+            return Response({'error': 'Team not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        if not (request.user.is_admin or team.lead_player_id == request.user.id):
+            return Response({'error': 'Permission denied. Only team leads or admins can manage teams.'},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        result = rosters.apply_operations(team, operations)
+        if result.errors:
+            return Response(result.as_dict(), status=status.HTTP_400_BAD_REQUEST)
+        return Response(result.as_dict(), status=status.HTTP_200_OK)
+
+
+class MatchmakingQueueView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def _team(self, request, team_id):
+        try:
+            team = Team.objects.get(id=team_id)
+        except (Team.DoesNotExist, ValueError, TypeError):
+            return None, Response({'error': 'Team not found'}, status=status.HTTP_404_NOT_FOUND)
+        if not (request.user.is_admin or team.lead_player_id == request.user.id):
+            return None, Response({'error': 'Only the team lead can queue the team'}, status=status.HTTP_403_FORBIDDEN)
+        return team, None
+
+    def get(self, request):
+        """Queue status of a team"""
+        team, error = self._team(request, request.query_params.get('team_id'))
+        if error:
+            return error
+        ticket = matchmaking.get_queue().status(team.id)
+        if ticket is None:
+            return Response({'queued': False})
+        return Response({'queued': True, **ticket.as_dict()})
+
+    def post(self, request):
+        """Queue a team for a scrim against a team of similar rating"""
+        team, error = self._team(request, request.data.get('team_id'))
+        if error:
+            return error
+        choices = {
+            'region': Tournament.REGION_CHOICES,
+            'platform': Tournament.PLATFORM_CHOICES,
+            'mode': Tournament.MODE_CHOICES,
+        }
+        for field, options in choices.items():
+            if request.data.get(field) not in dict(options):
+                return Response({'error': f'Invalid {field}'}, status=status.HTTP_400_BAD_REQUEST)
+        rating = matchmaking.team_rating(team.id)
+        if rating is None:
+            return Response({'error': 'Team has no members'}, status=status.HTTP_400_BAD_REQUEST)
+
+        ticket = matchmaking.Ticket(team.id, request.data['region'], request.data['platform'], request.data['mode'], rating)
+        matchmaking.get_queue().enqueue(ticket)
+        return Response({'queued': True, **ticket.as_dict()}, status=status.HTTP_202_ACCEPTED)
+
+    def delete(self, request):
+        """Leave the queue"""
+        team, error = self._team(request, request.query_params.get('team_id'))
+        if error:
+            return error
+        if not matchmaking.get_queue().cancel(team.id):
+            return Response({'error': 'Team is not queued'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class PlayerSearchView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -1305,7 +1522,7 @@ class TournamentAutoAssignView(APIView):
     permission_classes = [IsAuthenticated]
     
     def post(self, request, tournament_id):
-        """Auto-assign players to teams for better balance"""
+        """Queue a job that balances each team's players across its squads"""
         if not request.user.is_admin:
             return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
         
@@ -1317,31 +1534,22 @@ class TournamentAutoAssignView(APIView):
         if tournament.is_started:
             return Response({'error': 'Cannot auto-assign teams after tournament has started'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Get all participants
-        participants = TournamentParticipant.objects.filter(tournament=tournament)
-        
-        if participants.count() < 2:
+        if TournamentParticipant.objects.filter(tournament=tournament).count() < 2:
             return Response({'error': 'Need at least 2 teams to balance'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # For now, just return success - actual balancing logic would go here
-        # In a real implementation, this would:
-        # 1. Get all team members
-        # 2. Calculate skill balancing based on tiers
-        # 3. Redistribute players across teams
-        # 4. Update team rosters
-        
+        queued = jobs.enqueue('auto_assign_teams', {'tournament_id': tournament.id}, user=request.user)
         return Response({
-            'message': 'Teams auto-balanced successfully',
-            'teams_balanced': participants.count(),
-            'algorithm_used': 'skill_tier_balancing'
-        }, status=status.HTTP_200_OK)
+            'message': 'Auto-assign queued',
+            'job_id': queued.id,
+            'status_url': f'/api/jobs/{queued.id}/'
+        }, status=status.HTTP_202_ACCEPTED)
 
 
 class TournamentGenerateBracketView(APIView):
     permission_classes = [IsAuthenticated]
     
     def post(self, request, tournament_id):
-        """Generate tournament bracket"""
+        """Queue a job that generates the tournament bracket"""
         if not request.user.is_admin:
             return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
         
@@ -1353,92 +1561,175 @@ class TournamentGenerateBracketView(APIView):
         if tournament.is_started:
             return Response({'error': 'Tournament bracket already generated'}, status=status.HTTP_400_BAD_REQUEST)
         
-        participants = TournamentParticipant.objects.filter(tournament=tournament)
-        
-        if participants.count() < 2:
+        if TournamentParticipant.objects.filter(tournament=tournament).count() < 2:
             return Response({'error': 'Need at least 2 teams to generate bracket'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Clear existing matches for regeneration
-        TournamentMatch.objects.filter(tournament=tournament).delete()
-        
-        # Generate bracket based on tournament type
-        teams = [p.team for p in participants]
-        
-        if tournament.bracket_type == 'SINGLE_ELIMINATION':
-            self._generate_single_elimination_bracket(tournament, teams)
-        elif tournament.bracket_type == 'DOUBLE_ELIMINATION':
-            self._generate_double_elimination_bracket(tournament, teams)
-        elif tournament.bracket_type == 'ROUND_ROBIN':
-            self._generate_round_robin_bracket(tournament, teams)
-        else:
+        if tournament.bracket_type not in brackets.GENERATORS:
             return Response({'error': 'Unsupported bracket type'}, status=status.HTTP_400_BAD_REQUEST)
         
+        queued = jobs.enqueue('generate_bracket', {'tournament_id': tournament.id}, user=request.user)
         return Response({
-            'message': 'Tournament bracket generated successfully',
+            'message': 'Bracket generation queued',
             'bracket_type': tournament.bracket_type,
-            'teams': participants.count(),
-            'matches_created': TournamentMatch.objects.filter(tournament=tournament).count()
-        }, status=status.HTTP_200_OK)
-    
-    def _generate_single_elimination_bracket(self, tournament, teams):
-        """Generate single elimination bracket"""
-        import random
-        import math
-        
-        # Shuffle teams for random seeding
-        teams_list = list(teams)
-        random.shuffle(teams_list)
-        
-        # Calculate number of rounds needed
-        num_teams = len(teams_list)
-        num_rounds = math.ceil(math.log2(num_teams))
-        
-        # Create first round matches
-        match_number = 1
-        for i in range(0, len(teams_list) - 1, 2):
-            TournamentMatch.objects.create(
-                tournament=tournament,
-                team1=teams_list[i],
-                team2=teams_list[i + 1] if i + 1 < len(teams_list) else None,
-                round_number=1,
-                match_number=match_number,
-                scheduled_time=tournament.start_date
-            )
-            match_number += 1
-        
-        # Create placeholder matches for subsequent rounds
-        for round_num in range(2, num_rounds + 1):
-            matches_in_round = max(1, num_teams // (2 ** round_num))
-            for match_num in range(1, matches_in_round + 1):
-                TournamentMatch.objects.create(
-                    tournament=tournament,
-                    team1=None,
-                    team2=None,
-                    round_number=round_num,
-                    match_number=match_num,
-                    scheduled_time=tournament.start_date + timedelta(days=round_num - 1)
-                )
-    
-    def _generate_double_elimination_bracket(self, tournament, teams):
-        """Generate double elimination bracket (simplified)"""
-        # For now, just create a single elimination bracket
-        # Full double elimination would require winner/loser brackets
-        self._generate_single_elimination_bracket(tournament, teams)
-    
-    def _generate_round_robin_bracket(self, tournament, teams):
-        """Generate round robin bracket"""
-        teams_list = list(teams)
-        match_number = 1
-        
-        # Create matches between every pair of teams
-        for i in range(len(teams_list)):
-            for j in range(i + 1, len(teams_list)):
-                TournamentMatch.objects.create(
-                    tournament=tournament,
-                    team1=teams_list[i],
-                    team2=teams_list[j],
-                    round_number=1,  # All matches are in round 1 for round robin
-                    match_number=match_number,
-                    scheduled_time=tournament.start_date + timedelta(days=match_number - 1)
-                )
-                match_number += 1
\ No newline at end of file
+            'job_id': queued.id,
+            'status_url': f'/api/jobs/{queued.id}/'
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class JobListView(generics.ListAPIView):
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        if not self.request.user.is_admin:
+            raise PermissionDenied('Admin access required')
+        queryset = Job.objects.order_by('-created_at')
+        job_status = self.request.query_params.get('status')
+        if job_status:
+            queryset = queryset.filter(status=job_status.upper())
+        return queryset[:100]
+
+
+class JobStatusView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        try:
+            queued = Job.objects.get(id=job_id)
+        except Job.DoesNotExist:
+            return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        if not (request.user.is_admin or queued.created_by_id == request.user.id):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+
+        return Response(JobSerializer(queued).data)
+
+
+class ExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, dataset, fmt, tournament_id=None):
+        """Stream a flat CSV/NDJSON export; memory use does not grow with the export size"""
+        if not request.user.is_admin:
+            return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
+
+        datasets = exports.DATASETS if tournament_id is None else exports.TOURNAMENT_DATASETS
+        if dataset not in datasets or fmt not in exports.CONTENT_TYPES:
+            return Response({'error': 'Unknown export'}, status=status.HTTP_404_NOT_FOUND)
+
+        if tournament_id is None:
+            fields, queryset = datasets[dataset]()
+            filename = f'{dataset}.{fmt}'
+        else:
+            if not Tournament.objects.filter(id=tournament_id).exists():
+                return Response({'error': 'Tournament not found'}, status=status.HTTP_404_NOT_FOUND)
+            fields, queryset = datasets[dataset](tournament_id)
+            filename = f'tournament-{tournament_id}-{dataset}.{fmt}'
+
+        stream = exports.astream if isinstance(request._request, ASGIRequest) else exports.stream
+        response = StreamingHttpResponse(stream(fields, queryset, fmt), content_type=exports.CONTENT_TYPES[fmt])
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class ImportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, kind):
+        """Bulk import players, teams, team-members or tournaments from an uploaded CSV/NDJSON file"""
+        if not request.user.is_admin:
+            return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
+
+        importer_class = imports.IMPORTERS.get(kind)
+        if importer_class is None:
+            return Response({'error': 'Unknown import type'}, status=status.HTTP_404_NOT_FOUND)
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'file is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        fmt = 'ndjson' if upload.name.lower().endswith(('.ndjson', '.jsonl')) else 'csv'
+        importer = importer_class(
+            dry_run=request.data.get('dry_run') in ('1', 'true', True),
+            partial=request.data.get('partial') in ('1', 'true', True),
+        )
+        try:
+            result = importer.run(imports.read_rows(upload, fmt))
+        except (TypeError, ValueError, UnicodeDecodeError) as e:
+            return Response({'error': f'Could not parse file: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        response_status = status.HTTP_400_BAD_REQUEST if result.errors and not importer.partial else status.HTTP_200_OK
+        return Response(result.as_dict(), status=response_status)
+
+
+class ProfileListView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not request.user.is_admin:
+            return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
+        return Response({'profiles': profiling.list_profiles()})
+
+
+class ProfileDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, profile_id):
+        """Profile summary and SQL trace; ?download=1 returns the raw .prof file for pstats/snakeviz"""
+        if not request.user.is_admin:
+            return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
+
+        if request.query_params.get('download'):
+            path = profiling.profile_path(profile_id, '.prof')
+            if path is None:
+                return Response({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
+            return FileResponse(path.open('rb'), as_attachment=True, filename=path.name)
+
+        path = profiling.profile_path(profile_id, '.json')
+        if path is None:
+            return Response({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(json.loads(path.read_text()))
+
+EVENT_CHANNEL_PATTERN = re.compile(r'^(matches|presence|tournament:\d+)$')
+
+def _stream_user(request):
+    """The user of the JWT in ?token= (EventSource can't send headers) or the Authorization header."""
+    authentication = JWTAuthentication()
+    raw_token = request.GET.get('token')
+    if not raw_token:
+        header = authentication.get_header(request)
+        raw_token = authentication.get_raw_token(header) if header else None
+    if not raw_token:
+        return None
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+def _event_stream_response(request, channels):
+    last_event_id = request.headers.get('Last-Event-ID') or None
+    response = StreamingHttpResponse(
+        event_stream(channels, last_event_id),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+async def tournament_event_stream(request, tournament_id):
+    """Live match, winner and registration updates for one tournament (ASGI only)."""
+    if await sync_to_async(_stream_user)(request) is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    return _event_stream_response(request, [tournament_channel(tournament_id)])
+
+async def event_stream_view(request):
+    """Subscribe to several channels at once, e.g. ?channels=matches,presence,tournament:4"""
+    channels = [c for c in request.GET.get('channels', '').split(',') if c]
+    if not channels or not all(EVENT_CHANNEL_PATTERN.match(c) for c in channels):
+        return JsonResponse({'error': 'channels must be a comma separated list of matches, presence or tournament:<id>'}, status=400)
+    user = await sync_to_async(_stream_user)(request)
+    if user is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    if 'presence' in channels and not user.is_admin:
+        return JsonResponse({'error': 'Admin access required for presence'}, status=403)
+    return _event_stream_response(request, channels)